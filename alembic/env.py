@@ -5,6 +5,9 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from backend.database import DATABASE_URL
+from backend.models.db_models import Base
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -14,11 +17,17 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+# the application's models; `alembic revision --autogenerate` diffs against these
+target_metadata = Base.metadata
+
+# same database as the app (backend/database.py) unless overridden with
+# `alembic -x db_url=postgresql://... upgrade head`
+config.set_main_option(
+    "sqlalchemy.url", context.get_x_argument(as_dictionary=True).get("db_url", DATABASE_URL)
+)
+
+# SQLite cannot ALTER most constraints in place; batch mode recreates the table
+RENDER_AS_BATCH = config.get_main_option("sqlalchemy.url").startswith("sqlite")
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -44,6 +53,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=RENDER_AS_BATCH,
     )
 
     with context.begin_transaction():
@@ -65,7 +75,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=RENDER_AS_BATCH,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,166 @@
+"""initial schema
+
+Creates every table of backend/models/db_models.py. Databases created
+before migrations (create_all at import / db/schema.sql) already hold some
+of these tables, so existing tables and indexes are left alone and only the
+missing ones are created; `alembic upgrade head` adopts such a database.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(name, *columns, indexes=(), constraints=()):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(name):
+        op.create_table(name, *columns, *constraints)
+        existing = set()
+    else:
+        existing = {ix["name"] for ix in inspector.get_indexes(name)}
+    for column in indexes:
+        ix = f"ix_{name}_{column}"
+        if ix not in existing:
+            op.create_index(ix, name, [column])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _create_table(
+        "applications",
+        sa.Column("app_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("dob", sa.Date()),
+        sa.Column("phone", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("aadhaar", sa.String()),
+        sa.Column("pan", sa.String()),
+        sa.Column("address", sa.Text()),
+        sa.Column("income", sa.Integer()),
+        sa.Column("loan_amount", sa.Integer()),
+        sa.Column("loan_tenure", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("status", sa.String()),
+        indexes=("app_id", "phone", "email", "aadhaar", "pan"),
+    )
+    _create_table(
+        "kyc_data",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("extracted_name", sa.String()),
+        sa.Column("extracted_dob", sa.String()),
+        sa.Column("extracted_aadhaar", sa.String()),
+        sa.Column("extracted_pan", sa.String()),
+        sa.Column("extracted_address", sa.Text()),
+        sa.Column("ocr_confidence", sa.Float()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "kyc_results",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("kyc_status", sa.String()),
+        sa.Column("failed_fields", sa.Text()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "credit_scores",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("model_score", sa.Float()),
+        sa.Column("approval_status", sa.String()),
+        sa.Column("sanctioned_amount", sa.Integer()),
+        sa.Column("sanctioned_tenure", sa.Integer()),
+        sa.Column("interest_rate", sa.Float()),
+        sa.Column("shap_top_features", sa.Text()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "fraud_checks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("doc_type", sa.String()),
+        sa.Column("fraud_score", sa.Float()),
+        sa.Column("blur_level", sa.Float()),
+        sa.Column("tamper_detected", sa.Boolean()),
+        sa.Column("signals", sa.Text()),
+        sa.Column("fraud_status", sa.String()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "kyc_checks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("face_match_score", sa.Float()),
+        sa.Column("liveness_score", sa.Float()),
+        sa.Column("name_match", sa.Boolean()),
+        sa.Column("dob_match", sa.Boolean()),
+        sa.Column("kyc_status", sa.String()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "face_embeddings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("image_hash", sa.String()),
+        sa.Column("kind", sa.String()),
+        sa.Column("embedding", sa.LargeBinary()),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=("id", "app_id", "image_hash"),
+    )
+    _create_table(
+        "decisions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("final_status", sa.String()),
+        sa.Column("explanation", sa.Text()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=("id", "app_id"),
+    )
+    _create_table(
+        "idempotency_keys",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("endpoint", sa.String()),
+        sa.Column("request_hash", sa.String()),
+        sa.Column("state", sa.String()),
+        sa.Column("status_code", sa.Integer()),
+        sa.Column("response", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("expires_at", sa.DateTime()),
+        indexes=("expires_at",),
+    )
+    _create_table(
+        "stage_results",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer()),
+        sa.Column("stage", sa.String()),
+        sa.Column("fingerprint", sa.String()),
+        sa.Column("result", sa.Text()),
+        sa.Column("updated_at", sa.DateTime()),
+        constraints=(sa.UniqueConstraint("app_id", "stage", name="uq_stage_results_app_stage"),),
+        indexes=("id", "app_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in ("stage_results", "idempotency_keys", "decisions", "face_embeddings", "kyc_checks",
+                 "fraud_checks", "credit_scores", "kyc_results", "kyc_data", "applications"):
+        op.drop_table(name)
@@ -0,0 +1,55 @@
+"""kyc_data.document_hash, kyc_data.doc_type
+
+OCR snapshots reference the uploaded document in the content-addressed
+document store (backend/utils/document_store.py) by its sha256, and record
+which agent wrote them (AADHAAR / PAN): a PAN snapshot without a readable
+PAN number looks like an Aadhaar one otherwise.
+
+Existing rows are backfilled from what was extracted; snapshots with
+neither a PAN nor an Aadhaar number / address keep doc_type NULL.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("kyc_data")}
+    indexes = {ix["name"] for ix in inspector.get_indexes("kyc_data")}
+    # databases created by create_all after the model change already have both
+    with op.batch_alter_table("kyc_data") as batch:
+        if "document_hash" not in columns:
+            batch.add_column(sa.Column("document_hash", sa.String(), nullable=True))
+        if "ix_kyc_data_document_hash" not in indexes:
+            batch.create_index("ix_kyc_data_document_hash", ["document_hash"])
+        if "doc_type" not in columns:
+            batch.add_column(sa.Column("doc_type", sa.String(), nullable=True))
+    if "doc_type" not in columns:
+        op.execute("UPDATE kyc_data SET doc_type = 'PAN' WHERE extracted_pan IS NOT NULL")
+        op.execute(
+            "UPDATE kyc_data SET doc_type = 'AADHAAR' WHERE doc_type IS NULL"
+            " AND (extracted_aadhaar IS NOT NULL OR extracted_address IS NOT NULL)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("kyc_data") as batch:
+        batch.drop_column("doc_type")
+        batch.drop_index("ix_kyc_data_document_hash")
+        batch.drop_column("document_hash")
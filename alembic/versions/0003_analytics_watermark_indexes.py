@@ -0,0 +1,43 @@
+"""analytics watermark indexes
+
+The analytics snapshot (backend/utils/analytics.py) reads applications by
+created_at and kyc_results / credit_scores by updated_at in keyset order;
+without these indexes every sync batch scans the whole table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-22 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_applications_created_at", "applications", "created_at"),
+    ("ix_kyc_results_updated_at", "kyc_results", "updated_at"),
+    ("ix_credit_scores_updated_at", "credit_scores", "updated_at"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table, column in INDEXES:
+        # databases created by create_all after the model change already have them
+        if name not in {ix["name"] for ix in inspector.get_indexes(table)}:
+            op.create_index(name, table, [column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,44 @@
+"""applications.updated_at
+
+Applications change after intake (PATCH /apply corrections, status), so
+the analytics snapshot syncs them by updated_at instead of created_at.
+Existing rows start at their created_at, which keeps them behind a
+snapshot watermark taken on created_at: nothing is synced twice.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-24 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("applications")}
+    indexes = {ix["name"] for ix in inspector.get_indexes("applications")}
+    # databases created by create_all after the model change already have both
+    if "updated_at" not in columns:
+        with op.batch_alter_table("applications") as batch:
+            batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute("UPDATE applications SET updated_at = created_at")
+    if "ix_applications_updated_at" not in indexes:
+        op.create_index("ix_applications_updated_at", "applications", ["updated_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_applications_updated_at", table_name="applications")
+    with op.batch_alter_table("applications") as batch:
+        batch.drop_column("updated_at")
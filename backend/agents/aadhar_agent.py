@@ -9,6 +9,9 @@ from fuzzywuzzy import fuzz
 
 from backend.database import SessionLocal
 from backend.models.db_models import KYCData, Application
+from backend.utils.ocr_utils import ocr_data
+from backend.utils.script_ocr import text_with_devanagari, devanagari_ratio, transliterate
+from backend.utils.metrics import span, timed
 
 # If you installed Tesseract in the default path on Windows, keep this.
 # Change if your tesseract executable is elsewhere.
@@ -18,13 +21,14 @@ pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tessera
 # -------- DOB Extractor --------
 def extract_dob(lines):
     """
-    Find DOB line by searching for "DOB" or "DATE OF BIRTH" and a DD/MM/YYYY pattern.
+    Find DOB line by searching for "DOB" or "DATE OF BIRTH" (or the Hindi
+    "जन्म", in case the label was read by the Hindi model) and a DD/MM/YYYY pattern.
     Returns tuple (dob_str, index) where dob_str is like "12/11/2006".
     """
     dob_pattern = r"\b\d{2}/\d{2}/\d{4}\b"
     for i, line in enumerate(lines):
         upper = line.upper()
-        if "DOB" in upper or "DATE OF BIRTH" in upper:
+        if "DOB" in upper or "DATE OF BIRTH" in upper or "जन्म" in line:
             m = re.search(dob_pattern, line)
             if m:
                 return m.group(), i
@@ -48,6 +52,22 @@ def extract_name_strict(lines, dob_index):
     return None
 
 
+# -------- Hindi Name (Devanagari line printed above the English name) --------
+def extract_name_devanagari(lines, dob_index):
+    """
+    Return the first Devanagari line within two lines above DOB, if any.
+    """
+    if dob_index is None:
+        return None
+
+    for i in range(dob_index - 1, max(dob_index - 3, -1), -1):
+        possible_name = lines[i].strip()
+        if len(possible_name) >= 2 and devanagari_ratio(possible_name) >= 0.8:
+            return possible_name
+
+    return None
+
+
 # -------- Text Extraction --------
 def extract_text(file_path: str) -> str:
     """
@@ -56,20 +76,43 @@ def extract_text(file_path: str) -> str:
     ext = os.path.splitext(file_path)[1].lower()
 
     if ext == ".pdf":
-        pages = convert_from_path(file_path)
+        with span("pdf_rasterise"):
+            pages = convert_from_path(file_path)
         text = ""
         for p in pages:
-            text += pytesseract.image_to_string(p, lang="eng")
+            with span("tesseract"):
+                text += pytesseract.image_to_string(p, lang="eng")
         return text
 
-    return pytesseract.image_to_string(file_path, lang="eng")
+    with span("tesseract"):
+        return pytesseract.image_to_string(file_path, lang="eng")
+
+
+def extract_text_from_pages(pages, artifacts: dict = None) -> str:
+    """
+    OCR already decoded pages. Uses image_to_data so the word boxes of the
+    first page can be handed to document forensics without a second pass.
+    Devanagari words of the eng pass are re-read with the Hindi model
+    (backend/utils/script_ocr.py), so the card costs one eng pass plus a
+    Hindi read of its Devanagari lines only.
+    """
+    text = ""
+    for i, p in enumerate(pages):
+        data = ocr_data(p, lang="eng")
+        text += text_with_devanagari(p, data)
+        if i == 0 and artifacts is not None:
+            artifacts["image"] = p
+            artifacts["word_data"] = data
+    return text
 
 
 # -------- Aadhaar Parser --------
+@timed("parse_aadhaar")
 def parse_aadhaar_text(text: str):
     """
     Parse Aadhaar fields from raw OCR text.
-    Returns a dict with keys: name, dob (DD/MM/YYYY or None), address, aadhaar_number
+    Returns a dict with keys: name, dob (DD/MM/YYYY or None), address, aadhaar_number,
+    name_hi (Devanagari name line or None) and name_translit (name_hi in Latin letters)
     """
     lines = text.split("\n")
 
@@ -83,6 +126,7 @@ def parse_aadhaar_text(text: str):
 
     # Strict name extraction: one line above DOB
     name = extract_name_strict(lines, dob_index)
+    name_hi = extract_name_devanagari(lines, dob_index)
 
     # Address: case-insensitive search for word "Address"
     address = ""
@@ -97,29 +141,39 @@ def parse_aadhaar_text(text: str):
         "name": name,
         "dob": dob,
         "address": address,
-        "aadhaar_number": aadhaar
+        "aadhaar_number": aadhaar,
+        "name_hi": name_hi,
+        "name_translit": transliterate(name_hi) if name_hi else None,
     }
 
 
 # -------- Comparison --------
+@timed("fuzzy_match")
 def compare_with_intake(intake, ocr):
     """
     Compare intake record (Application) with OCR result dict.
     intake.dob is a datetime.date. OCR dob is expected DD/MM/YYYY.
+    The name matches on the English line or, failing that, on the
+    transliterated Hindi line (name_translit).
     """
     failed = []
     result = {}
 
     # NAME
-    if ocr.get("name") and intake.name:
-        try:
-            name_ok = fuzz.ratio(intake.name.lower(), ocr["name"].lower()) >= 70
-        except Exception:
-            name_ok = False
-    else:
-        name_ok = False
+    name_ok = False
+    name_source = None
+    for key in ("name", "name_translit"):
+        if ocr.get(key) and intake.name:
+            try:
+                name_ok = fuzz.ratio(intake.name.lower(), ocr[key].lower()) >= 70
+            except Exception:
+                name_ok = False
+        if name_ok:
+            name_source = key
+            break
 
     result["name_match"] = bool(name_ok)
+    result["name_source"] = name_source
     if not name_ok:
         failed.append("name")
 
@@ -171,30 +225,41 @@ def compare_with_intake(intake, ocr):
 
 
 # -------- Main Aadhaar OCR Agent --------
-def run_aadhaar_ocr_agent(app_id: int, file_path: str):
+@timed("aadhaar_agent", doc_type="AADHAAR")
+def run_aadhaar_ocr_agent(app_id: int, file_path: str = None, pages=None, artifacts: dict = None, intake=None,
+                          document_hash: str = None):
     """
     Entry point for the Aadhaar OCR agent.
     Returns parsed data and match results.
+    pages: already decoded document pages (skips re-reading file_path).
+    artifacts: optional dict filled with the OCR image and word boxes.
+    intake: Application already loaded by the caller (skips the lookup).
+    document_hash: the upload in the document store, recorded on the KYCData row.
     """
     db = SessionLocal()
     try:
-        intake = db.query(Application).filter(Application.app_id == app_id).first()
+        if intake is None:
+            intake = db.query(Application).filter(Application.app_id == app_id).first()
 
         if not intake:
             return {"error": "Invalid application ID"}
 
-        raw = extract_text(file_path)
+        raw = extract_text_from_pages(pages, artifacts) if pages else extract_text(file_path)
         parsed = parse_aadhaar_text(raw)
         match = compare_with_intake(intake, parsed)
 
         # Save OCR snapshot (store original OCR strings)
         kyc = KYCData(
             app_id=app_id,
-            extracted_name=parsed.get("name"),
+            # transliterated Hindi name when the English line was unreadable, so
+            # re-evaluation of this snapshot matches the way it was matched here
+            extracted_name=parsed.get("name") or parsed.get("name_translit"),
             extracted_dob=parsed.get("dob"),
             extracted_aadhaar=parsed.get("aadhaar_number"),
             extracted_address=parsed.get("address"),
             ocr_confidence=0.9,
+            document_hash=document_hash,
+            doc_type="AADHAAR",
             updated_at=datetime.now()
         )
 
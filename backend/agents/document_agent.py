@@ -0,0 +1,94 @@
+# backend/agents/document_agent.py
+"""
+One uploaded identity document, end to end, on already decoded pages:
+blur gate -> OCR agent -> pixel + field forensics -> FraudCheck row.
+
+Used by the job worker and the incremental re-evaluation engine; the
+/agent/ocr/both router runs the same steps with OCR and forensics in parallel.
+reprocess_document re-runs a document kept in the document store without a
+new upload.
+"""
+from typing import Optional
+
+from backend.database import SessionLocal
+from backend.models.db_models import KYCData
+from backend.agents.aadhar_agent import run_aadhaar_ocr_agent
+from backend.agents.pan_agent import run_pan_ocr_agent
+from backend.agents.fraud_agent import (
+    check_blur, run_image_forensics, run_field_forensics, summarise_forensics, save_fraud_check
+)
+from backend.utils.metrics import span
+from backend.utils.document_store import get_document_store
+
+OCR_AGENTS = {"AADHAAR": run_aadhaar_ocr_agent, "PAN": run_pan_ocr_agent}
+
+
+def process_document(app_id: int, doc_type: str, pages, intake=None, document_hash: str = None,
+                     ocr_pages=None) -> dict:
+    """
+    doc_type: AADHAAR / PAN. Returns the OCR agent result plus a 'forensics'
+    block; a blurry document skips OCR and comes back REJECTED.
+    document_hash: the upload in the document store (recorded on KYCData).
+    ocr_pages: pages to OCR if not `pages`, e.g. the stored grayscale
+    derivative; blur and pixel forensics always look at pages[0].
+    """
+    with span("document", doc_type=doc_type):
+        return _process_document(app_id, doc_type, pages, intake, document_hash, ocr_pages)
+
+
+def _process_document(app_id: int, doc_type: str, pages, intake=None, document_hash: str = None,
+                      ocr_pages=None) -> dict:
+    blur = check_blur(pages[0])
+
+    if blur["too_blurry"]:
+        summary = summarise_forensics(blur, None, None)
+        save_fraud_check(app_id, doc_type, summary)
+        return {
+            "kyc_status": "REJECTED",
+            "message": "Document too blurry to OCR, please re-upload",
+            "match_results": {"failed_fields": ["blur"]},
+            "forensics": summary,
+        }
+
+    artifacts = {}
+    result = OCR_AGENTS[doc_type](app_id, pages=ocr_pages or pages, artifacts=artifacts, intake=intake,
+                                  document_hash=document_hash)
+    if "error" in result:
+        return result
+    field_checks = run_field_forensics(artifacts.get("image"), artifacts.get("word_data"))
+    summary = summarise_forensics(blur, run_image_forensics(pages[0]), field_checks)
+    save_fraud_check(app_id, doc_type, summary)
+    result["forensics"] = summary
+    return result
+
+
+def latest_document_hash(app_id: int, doc_type: str) -> Optional[str]:
+    """document_hash of the newest OCR snapshot of this document type."""
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(KYCData.document_hash)
+            .filter(KYCData.app_id == app_id, KYCData.doc_type == doc_type, KYCData.document_hash.isnot(None))
+            .order_by(KYCData.id.desc())
+            .first()
+        )
+        return row[0] if row else None
+    finally:
+        db.close()
+
+
+def reprocess_document(app_id: int, doc_type: str, document_hash: str = None, intake=None) -> dict:
+    """
+    Run a stored document through process_document again (e.g. after an OCR
+    or forensics change). OCR reads the memory-mapped grayscale derivative;
+    only the first page is decoded, for blur and pixel forensics.
+    """
+    h = document_hash or latest_document_hash(app_id, doc_type)
+    if h is None:
+        return {"error": f"No stored {doc_type} document for application {app_id}"}
+    store = get_document_store()
+    if not store.exists(h):
+        return {"error": f"Document {h} is not in the document store"}
+    with span("document_reprocess", doc_type=doc_type):
+        return process_document(app_id, doc_type, [store.page(h, 0)], intake=intake,
+                                document_hash=h, ocr_pages=store.gray_pages(h))
@@ -0,0 +1,86 @@
+# backend/agents/explanation_agent.py
+"""
+Explanation agent: turns the KYC, fraud and scoring outputs of a run into
+a final decision and a short human-readable explanation (decisions table).
+
+Final status:
+  REJECTED - KYC rejected, fraud FAIL, or scoring found nothing approvable
+  MANUAL   - fraud MANUAL or only a counter-offer is approvable
+  APPROVED - otherwise
+"""
+from datetime import datetime
+
+from backend.database import SessionLocal
+from backend.models.db_models import Decision
+
+
+def decide(kyc: dict, fraud: dict, score: dict) -> str:
+    if (kyc or {}).get("kyc_status") != "APPROVED":
+        return "REJECTED"
+    if (fraud or {}).get("fraud_status") == "FAIL":
+        return "REJECTED"
+    approval = (score or {}).get("approval_status")
+    if approval == "REJECTED" or approval is None:
+        return "REJECTED"
+    if (fraud or {}).get("fraud_status") == "MANUAL" or approval == "MANUAL":
+        return "MANUAL"
+    return "APPROVED"
+
+
+def build_explanation(kyc: dict, fraud: dict, score: dict, final_status: str) -> str:
+    kyc = kyc or {}
+    fraud = fraud or {}
+    score = score or {}
+    parts = []
+
+    failed = [k[:-len("_match")] for k, v in kyc.items() if k.endswith("_match") and v is False]
+    if kyc.get("kyc_status") == "APPROVED":
+        parts.append("KYC passed: submitted details match the documents.")
+    else:
+        parts.append("KYC failed" + (": mismatch in " + ", ".join(failed) + "." if failed else "."))
+
+    if fraud.get("reasons"):
+        parts.append(f"Fraud checks {fraud.get('fraud_status')}: " + ", ".join(fraud["reasons"]) + ".")
+    elif fraud.get("fraud_status"):
+        parts.append("No fraud signals found.")
+
+    sanctioned = score.get("sanctioned") or {}
+    approval = score.get("approval_status")
+    if approval == "APPROVED":
+        parts.append(
+            f"Requested loan of {sanctioned.get('amount')} over {sanctioned.get('tenure')} months "
+            f"is approvable at {sanctioned.get('interest_rate')}% p.a."
+        )
+    elif approval == "MANUAL":
+        parts.append(
+            f"Requested terms are not approvable; best counter-offer is {sanctioned.get('amount')} "
+            f"over {sanctioned.get('tenure')} months at {sanctioned.get('interest_rate')}% p.a."
+        )
+    elif approval == "REJECTED":
+        parts.append("No loan amount / tenure combination meets the credit policy.")
+
+    parts.append(f"Final decision: {final_status}.")
+    return " ".join(parts)
+
+
+def run_explanation_agent(app_id: int, kyc: dict, fraud: dict, score: dict, persist: bool = True):
+    final_status = decide(kyc, fraud, score)
+    explanation = build_explanation(kyc, fraud, score, final_status)
+
+    if persist:
+        db = SessionLocal()
+        try:
+            db.add(Decision(
+                app_id=app_id,
+                final_status=final_status,
+                explanation=explanation,
+                updated_at=datetime.now()
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return {"app_id": app_id, "final_status": final_status, "explanation": explanation}
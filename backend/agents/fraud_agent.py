@@ -0,0 +1,551 @@
+# backend/agents/fraud_agent.py
+"""
+Fraud agent.
+
+Document forensics run on the page image the OCR agents already decoded:
+  - check_blur()           : cheap gate, run BEFORE OCR; a blurry card skips OCR entirely
+  - run_image_forensics()  : ELA + copy-move, safe to run in parallel with OCR
+  - run_field_forensics()  : font inconsistency around PAN / Aadhaar fields,
+                             uses the word boxes produced by the OCR pass
+  - save_fraud_check()     : persist a FraudCheck row (fraud_checks table)
+
+Identity reuse (duplicate Aadhaar / PAN / phone / email, near-duplicate name+address):
+  - index_application()    : incremental update, called from /apply
+  - run_identity_checks()  : exact + near-duplicate matches for one application
+  - rebuild_identity_index(): bulk build from the applications table
+      python -m backend.agents.fraud_agent rebuild-identity-index
+
+Velocity (sliding-window counters fed by /apply and OCR uploads):
+  - record_application_velocity() / record_upload_velocity()
+  - velocity_signals()     : O(1) per-signal counts + which limits are exceeded
+
+run_fraud_agent() combines forensics, identity reuse and velocity into a
+PASS / MANUAL / FAIL verdict.
+"""
+import os
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from PIL import Image
+from sqlalchemy import and_, func, or_
+
+from backend.config import settings
+from backend.database import SessionLocal, engine
+from backend.models.db_models import FraudCheck, Application
+from backend.utils.identity_utils import (
+    IdentityIndex, NORMALIZERS, identity_text, jaccard, normalize_phone, normalize_email, normalize_aadhaar,
+    normalize_pan
+)
+from backend.utils.velocity_utils import VelocityEngine
+from backend.utils.redis_utils import get_redis
+from backend.utils.ocr_utils import to_gray_array
+from backend.utils.metrics import timed
+from backend.utils.fraud_utils import (
+    laplacian_variance, error_level_analysis, copy_move_score, font_inconsistency
+)
+
+# analysis resolution: checks are scale-sensitive, so measure at a fixed width
+FORENSICS_WIDTH = 1000
+
+
+# -------- Document forensics --------
+@timed("forensics_blur")
+def check_blur(img: Image.Image) -> dict:
+    """
+    Sharpness gate. Returns blur_level (Laplacian variance) and too_blurry flag.
+    """
+    gray = to_gray_array(img, max_width=FORENSICS_WIDTH)
+    blur_level = laplacian_variance(gray)
+    return {
+        "blur_level": round(blur_level, 4),
+        "too_blurry": blur_level < settings.BLUR_THRESHOLD,
+    }
+
+
+@timed("forensics_image")
+def run_image_forensics(img: Image.Image) -> dict:
+    """
+    Pixel-level tamper checks that do not need OCR output.
+    """
+    gray = to_gray_array(img, max_width=FORENSICS_WIDTH)
+    ela = error_level_analysis(img, quality=settings.ELA_QUALITY)
+    return {
+        "ela_mean": ela["ela_mean"],
+        "ela_ratio": ela["ela_ratio"],
+        "copy_move_score": copy_move_score(gray),
+    }
+
+
+@timed("forensics_field")
+def run_field_forensics(ocr_img: Image.Image, word_data: Optional[dict]) -> dict:
+    """
+    Font / glyph consistency of the OCRed PAN and Aadhaar tokens.
+    ocr_img must be the image word_data boxes refer to.
+    """
+    if ocr_img is None or not word_data:
+        return {"font_inconsistency": None}
+    gray = to_gray_array(ocr_img)
+    return {"font_inconsistency": font_inconsistency(gray, word_data)}
+
+
+def summarise_forensics(blur: dict, image_checks: Optional[dict], field_checks: Optional[dict]) -> dict:
+    """
+    Merge check outputs into a single verdict: fraud_score in [0, 1],
+    tamper_detected and PASS / FAIL / MANUAL fraud_status.
+    """
+    signals = dict(blur)
+    signals.update(image_checks or {})
+    signals.update(field_checks or {})
+
+    flags = []
+    if signals.get("too_blurry"):
+        flags.append("blur")
+    if (signals.get("ela_ratio") or 0.0) >= settings.ELA_TAMPER_RATIO:
+        flags.append("ela")
+    if (signals.get("copy_move_score") or 0.0) >= settings.COPY_MOVE_TAMPER_SCORE:
+        flags.append("copy_move")
+    if (signals.get("font_inconsistency") or 0.0) >= settings.FONT_TAMPER_ZSCORE:
+        flags.append("font")
+
+    tamper = any(f in flags for f in ("ela", "copy_move", "font"))
+    fraud_score = min(1.0, 0.35 * len([f for f in flags if f != "blur"]))
+
+    if tamper:
+        status = "FAIL" if len(flags) > 1 else "MANUAL"
+    elif "blur" in flags:
+        status = "MANUAL"
+    else:
+        status = "PASS"
+
+    return {
+        "fraud_score": round(fraud_score, 4),
+        "blur_level": signals.get("blur_level"),
+        "tamper_detected": tamper,
+        "fraud_status": status,
+        "flags": flags,
+        "signals": signals,
+    }
+
+
+def save_fraud_check(app_id: int, doc_type: str, summary: dict):
+    db = SessionLocal()
+    try:
+        row = FraudCheck(
+            app_id=app_id,
+            doc_type=doc_type,
+            fraud_score=summary["fraud_score"],
+            blur_level=summary["blur_level"],
+            tamper_detected=summary["tamper_detected"],
+            signals=json.dumps(summary["signals"]),
+            fraud_status=summary["fraud_status"],
+            updated_at=datetime.now()
+        )
+        db.add(row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# -------- Identity reuse --------
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+REBUILD_BATCH = 10000
+CATCH_UP_OVERLAP = timedelta(seconds=2)    # a late commit can carry an older updated_at
+
+
+def application_record(app: Application) -> dict:
+    return {
+        "app_id": app.app_id,
+        "aadhaar": app.aadhaar,
+        "pan": app.pan,
+        "phone": app.phone,
+        "email": app.email,
+        "name": app.name,
+        "address": app.address,
+        "updated_at": app.updated_at,
+    }
+
+
+def _iter_application_batches(db, after_app_id: int = 0, batch: int = REBUILD_BATCH):
+    """
+    Keyset-paginate applications by primary key (no OFFSET scans).
+    """
+    last = after_app_id
+    while True:
+        rows = (
+            db.query(Application)
+            .filter(Application.app_id > last)
+            .order_by(Application.app_id)
+            .limit(batch)
+            .all()
+        )
+        if not rows:
+            return
+        yield [application_record(r) for r in rows]
+        last = rows[-1].app_id
+
+
+def _iter_updated_batches(db, since: datetime, max_app_id: int, batch: int = REBUILD_BATCH):
+    """
+    Applications up to max_app_id with updated_at >= since, keyset-paginated
+    on (updated_at, app_id) over ix_applications_updated_at.
+    """
+    last_ts, last_id = since, 0
+    while True:
+        rows = (
+            db.query(Application)
+            .filter(Application.app_id <= max_app_id)
+            .filter(or_(Application.updated_at > last_ts,
+                        and_(Application.updated_at == last_ts, Application.app_id > last_id)))
+            .order_by(Application.updated_at, Application.app_id)
+            .limit(batch)
+            .all()
+        )
+        if not rows:
+            return
+        yield [application_record(r) for r in rows]
+        last_ts, last_id = rows[-1].updated_at, rows[-1].app_id
+
+
+def _catch_up(index: IdentityIndex, db=None):
+    """
+    Index applications created by other workers since index.max_app_id, then
+    corrections (PATCH /apply) any worker made since index.max_updated_at.
+    Callers holding a session pass it: a second pooled connection per request
+    deadlocks once a burst has checked out the whole pool.
+    """
+    own = db is None
+    if own:
+        db = SessionLocal()
+    try:
+        indexed = index.max_app_id
+        for records in _iter_application_batches(db, after_app_id=indexed):
+            index.add_many(records, new_only=True)
+        if index.max_updated_at is None:
+            # index file saved before the corrections watermark existed
+            index.max_updated_at = db.query(func.max(Application.updated_at)).scalar() or datetime.now()
+        else:
+            for records in _iter_updated_batches(db, index.max_updated_at - CATCH_UP_OVERLAP, indexed):
+                index.add_many(records, update=True)
+                index.max_updated_at = max(index.max_updated_at, records[-1]["updated_at"])
+    finally:
+        if own:
+            db.close()
+
+
+def get_identity_index(db=None, load: bool = True) -> Optional[IdentityIndex]:
+    """
+    Process-wide index: loaded from IDENTITY_INDEX_PATH if present, else built
+    from the table, then caught up with rows newer than its watermark.
+    The first caller loads it with its own session (db) while the others wait.
+    load=False returns None while it is not in memory (warmup loads it).
+    """
+    global _INDEX
+    if _INDEX is None and not load:
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            if os.path.exists(settings.IDENTITY_INDEX_PATH):
+                _INDEX = IdentityIndex.load(settings.IDENTITY_INDEX_PATH)
+                _catch_up(_INDEX, db)
+            else:
+                _INDEX = rebuild_identity_index(save=False, db=db)
+        return _INDEX
+
+
+def rebuild_identity_index(save: bool = True, db=None) -> IdentityIndex:
+    """
+    Bulk build from the applications table in keyset-paginated batches.
+    Standalone (no db) it also makes sure the DB-side indexes on aadhaar /
+    pan / phone / email exist on databases not yet migrated with Alembic.
+    """
+    own = db is None
+    if own:
+        for idx in Application.__table__.indexes:
+            idx.create(bind=engine, checkfirst=True)
+        db = SessionLocal()
+
+    index = IdentityIndex()
+    started = datetime.now()
+    try:
+        for records in _iter_application_batches(db):
+            index.add_many(records, bulk=True)
+        index.max_updated_at = started         # later corrections are picked up by _catch_up
+    finally:
+        if own:
+            db.close()
+
+    if save:
+        index.save(settings.IDENTITY_INDEX_PATH)
+    return index
+
+
+def index_application(app: Application, db=None):
+    """
+    Incremental update for a freshly created application.
+    If other workers inserted rows in between, catch up from the table instead
+    so the watermark never skips an application. Until warmup has loaded the
+    index there is nothing to update: the load reads the table anyway.
+    """
+    index = get_identity_index(db, load=False)
+    if index is None:
+        return
+    if app.app_id > index.max_app_id + 1:
+        _catch_up(index, db)
+    else:
+        index.add_many([application_record(app)], new_only=True)
+
+
+def reindex_application(app: Application, db=None):
+    """
+    Index the corrected identifiers of an existing application. Keys of the
+    old values stay in the index and are filtered out at query time. Other
+    workers pick the correction up in _catch_up (applications.updated_at).
+    """
+    index = get_identity_index(db, load=False)
+    if index is None:
+        return
+    if app.app_id > index.max_app_id:
+        _catch_up(index, db)
+    else:
+        index.add_many([application_record(app)], update=True)
+
+
+def _verify_exact(db, record: dict, exact: dict) -> dict:
+    """
+    Drop exact-index hits whose application no longer holds that value.
+    """
+    ids = sorted({i for hits in exact.values() for i in hits})
+    if not ids:
+        return exact
+    rows = {
+        a.app_id: application_record(a)
+        for a in db.query(Application).filter(Application.app_id.in_(ids)).all()
+    }
+    out = {}
+    for field, hits in exact.items():
+        norm = NORMALIZERS[field]
+        mine = norm(record.get(field))
+        keep = [i for i in hits if i in rows and norm(rows[i].get(field)) == mine]
+        if keep:
+            out[field] = keep
+    return out
+
+
+def identity_checks(db, app: Application) -> dict:
+    """
+    Find other applications reusing this applicant's identifiers.
+    Near-duplicate LSH candidates are verified with exact trigram Jaccard.
+    """
+    index = get_identity_index(db)
+    _catch_up(index, db)
+
+    record = application_record(app)
+    exact = _verify_exact(db, record, index.exact_matches(record))
+
+    candidates = index.near_candidates(record)
+    top = sorted(candidates, key=candidates.get, reverse=True)[:settings.NEAR_DUP_MAX_CANDIDATES]
+    near = []
+    if top:
+        me = identity_text(app.name, app.address)
+        rows = db.query(Application).filter(Application.app_id.in_(top)).all()
+        for r in rows:
+            sim = jaccard(me, identity_text(r.name, r.address))
+            if sim >= settings.NEAR_DUP_JACCARD:
+                near.append({"app_id": r.app_id, "similarity": round(sim, 4)})
+        near.sort(key=lambda x: x["similarity"], reverse=True)
+
+    reused = sorted(exact.keys())
+    return {
+        "exact_matches": exact,
+        "near_duplicates": near,
+        "identity_reuse": bool(reused or near),
+        "reused_fields": reused,
+    }
+
+
+def run_identity_checks(app_id: int):
+    db = SessionLocal()
+    try:
+        app = db.query(Application).filter(Application.app_id == app_id).first()
+        if not app:
+            return {"error": "Invalid application ID"}
+        return {"app_id": app_id, **identity_checks(db, app)}
+
+    except Exception as e:
+        return {"error": "Internal error in fraud agent", "details": str(e)}
+    finally:
+        db.close()
+
+
+# -------- Velocity --------
+_VELOCITY = None
+_VELOCITY_LOCK = threading.Lock()
+
+
+def get_velocity_engine() -> VelocityEngine:
+    """
+    Process-wide velocity engine. With VELOCITY_PERSIST counts come from
+    Redis (shared by all workers); without it they are per process, so
+    more than one API / job worker needs VELOCITY_PERSIST.
+    """
+    global _VELOCITY
+    with _VELOCITY_LOCK:
+        if _VELOCITY is None:
+            redis = get_redis() if settings.VELOCITY_PERSIST else None
+            _VELOCITY = VelocityEngine(settings.VELOCITY_SIGNALS, redis=redis)
+            _VELOCITY.restore()
+        return _VELOCITY
+
+
+def _application_keys(app: Application, client: Optional[str] = None) -> dict:
+    return {
+        "apply_phone_1h": normalize_phone(app.phone),
+        "apply_email_1h": normalize_email(app.email),
+        "apply_client_1h": client,
+        "apply_aadhaar_24h": normalize_aadhaar(app.aadhaar),
+        "apply_pan_24h": normalize_pan(app.pan),
+    }
+
+
+def record_application_velocity(app: Application, client: Optional[str] = None):
+    engine_ = get_velocity_engine()
+    for name, key in _application_keys(app, client).items():
+        engine_.record(name, key)
+
+
+def record_upload_velocity(app_id: int, uploads: int = 1):
+    get_velocity_engine().record("ocr_upload_app_10m", str(app_id), amount=uploads)
+
+
+def velocity_signals(app: Application, client: Optional[str] = None) -> dict:
+    """
+    Current window counts for every signal of this application (O(1) each,
+    one Redis round trip with VELOCITY_PERSIST).
+    """
+    engine_ = get_velocity_engine()
+    keys = _application_keys(app, client)
+    keys["ocr_upload_app_10m"] = str(app.app_id)
+
+    counts = engine_.count_many(keys)
+    exceeded = [
+        name for name, n in counts.items()
+        if name in settings.VELOCITY_LIMITS and n > settings.VELOCITY_LIMITS[name]
+    ]
+    return {"counts": counts, "exceeded": exceeded}
+
+
+def run_velocity_checks(app_id: int, client: Optional[str] = None):
+    db = SessionLocal()
+    try:
+        app = db.query(Application).filter(Application.app_id == app_id).first()
+        if not app:
+            return {"error": "Invalid application ID"}
+        return {"app_id": app_id, **velocity_signals(app, client=client)}
+    finally:
+        db.close()
+
+
+# -------- Fraud decision --------
+def latest_forensics(db, app_id: int) -> dict:
+    """
+    Most recent FraudCheck per document type, as forensics summaries.
+    """
+    out = {}
+    rows = (
+        db.query(FraudCheck)
+        .filter(FraudCheck.app_id == app_id)
+        .order_by(FraudCheck.updated_at.desc())
+        .all()
+    )
+    for r in rows:
+        if r.doc_type not in out:
+            out[r.doc_type] = {
+                "fraud_score": r.fraud_score,
+                "blur_level": r.blur_level,
+                "tamper_detected": r.tamper_detected,
+                "fraud_status": r.fraud_status,
+            }
+    return out
+
+
+def run_fraud_agent(app_id: int, intake: Application = None, forensics: dict = None,
+                    face_reuse: list = None, client: Optional[str] = None):
+    """
+    Overall fraud verdict for an application:
+      FAIL   - tampered document (FAIL), Aadhaar / PAN reused, face reused
+      MANUAL - near-duplicate applicant, phone / email reuse, velocity limit
+               exceeded, or a document needing manual review
+      PASS   - otherwise
+    forensics: {doc_type: summary} from the same pipeline run; read from
+    fraud_checks when not given. intake: Application already loaded.
+    """
+    db = SessionLocal()
+    try:
+        if intake is None:
+            intake = db.query(Application).filter(Application.app_id == app_id).first()
+        if not intake:
+            return {"error": "Invalid application ID"}
+
+        if forensics is None:
+            forensics = latest_forensics(db, app_id)
+        identity = identity_checks(db, intake)
+        velocity = velocity_signals(intake, client=client)
+
+        reasons_fail = []
+        reasons_manual = []
+        for doc, summary in forensics.items():
+            if summary.get("fraud_status") == "FAIL":
+                reasons_fail.append(f"{doc.lower()}_tampered")
+            elif summary.get("fraud_status") == "MANUAL":
+                reasons_manual.append(f"{doc.lower()}_review")
+        for field in identity["reused_fields"]:
+            (reasons_fail if field in ("aadhaar", "pan") else reasons_manual).append(f"{field}_reused")
+        if identity["near_duplicates"]:
+            reasons_manual.append("near_duplicate_applicant")
+        if face_reuse:
+            reasons_fail.append("face_reused")
+        reasons_manual.extend(velocity["exceeded"])
+
+        if reasons_fail:
+            status = "FAIL"
+        elif reasons_manual:
+            status = "MANUAL"
+        else:
+            status = "PASS"
+
+        doc_scores = [s.get("fraud_score") or 0.0 for s in forensics.values()]
+        fraud_score = min(1.0, max(doc_scores + [0.0]) + 0.3 * len(reasons_fail) + 0.1 * len(reasons_manual))
+
+        return {
+            "app_id": app_id,
+            "fraud_status": status,
+            "fraud_score": round(fraud_score, 4),
+            "reasons": reasons_fail + reasons_manual,
+            "identity": identity,
+            "velocity": velocity,
+            "forensics": forensics,
+        }
+
+    except Exception as e:
+        return {"error": "Internal error in fraud agent", "details": str(e)}
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fraud agent maintenance commands")
+    parser.add_argument("command", choices=["rebuild-identity-index"])
+    args = parser.parse_args()
+
+    if args.command == "rebuild-identity-index":
+        started = datetime.now()
+        built = rebuild_identity_index(save=True)
+        print(f"Indexed {len(built)} applications into {settings.IDENTITY_INDEX_PATH} "
+              f"in {(datetime.now() - started).total_seconds():.1f}s")
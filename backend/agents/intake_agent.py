@@ -6,6 +6,14 @@ import datetime
 
 # Utility to create application programmatically (if other code calls it)
 def create_application_from_request(req):
+    return create_application(req).app_id
+
+
+def create_application(req):
+    """
+    Insert the application and return the (detached, fully loaded) row so
+    callers such as the pipeline can pass it on without re-querying.
+    """
     db = SessionLocal()
     try:
         dob = req.dob if isinstance(req.dob, datetime.date) else None
@@ -27,7 +35,8 @@ def create_application_from_request(req):
         db.add(app)
         db.commit()
         db.refresh(app)
-        return app.app_id
+        db.expunge(app)
+        return app
 
     except Exception as e:
         db.rollback()
@@ -1,46 +1,310 @@
+import threading
 from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from backend.config import settings
 from backend.database import SessionLocal
-from backend.models.db_models import KYCData, KYCResult, Application
+from backend.models.db_models import KYCData, KYCResult, KYCCheck, Application, FaceEmbedding
+from backend.agents.aadhar_agent import compare_with_intake as compare_aadhaar
+from backend.agents.pan_agent import compare_with_intake as compare_pan
+from backend.utils.document_store import get_document_store
+from backend.utils.face_utils import (
+    EmbeddingCache, FaceIndex, image_hash, decode_image, detect_and_embed, match_score
+)
+from backend.utils.identity_utils import normalize_aadhaar, normalize_pan
+from backend.utils.metrics import span, timed
+
+_FACE_CACHE = EmbeddingCache(settings.FACE_CACHE_SIZE)
+_FACE_INDEX = None
+_FACE_INDEX_WATERMARK = 0          # last face_embeddings.id loaded into the index
+_FACE_INDEX_LOCK = threading.Lock()
+
+
+# -------- Face embeddings --------
+def embed_document(db, app_id: int, data: bytes, kind: str):
+    """
+    Embedding for an uploaded image, looked up by content hash:
+    memory LRU -> face_embeddings table -> insightface (then stored).
+    Returns (image_hash, embedding or None).
+    """
+    h = image_hash(data)
+    hit, emb = _FACE_CACHE.get(h)
+    if hit:
+        return h, emb
+
+    row = db.query(FaceEmbedding).filter(FaceEmbedding.image_hash == h).first()
+    if row is not None:
+        emb = np.frombuffer(row.embedding, dtype=np.float32) if row.embedding else None
+    else:
+        with span("face_embed"):
+            emb = detect_and_embed(decode_image(data))
+        db.add(FaceEmbedding(
+            app_id=app_id,
+            image_hash=h,
+            kind=kind,
+            embedding=emb.tobytes() if emb is not None else None,
+            created_at=datetime.now()
+        ))
+        db.commit()
+
+    _FACE_CACHE.put(h, emb)
+    return h, emb
+
+
+def get_face_index() -> FaceIndex:
+    """
+    Process-wide face index over every stored embedding, caught up from the
+    face_embeddings table by id watermark (rows written by other workers too).
+    """
+    global _FACE_INDEX, _FACE_INDEX_WATERMARK
+    with _FACE_INDEX_LOCK:
+        if _FACE_INDEX is None:
+            _FACE_INDEX = FaceIndex(
+                brute_force_max=settings.FACE_BRUTE_FORCE_MAX, nprobe=settings.FACE_NPROBE
+            )
+        db = SessionLocal()
+        try:
+            while True:
+                rows = (
+                    db.query(FaceEmbedding.id, FaceEmbedding.app_id, FaceEmbedding.embedding)
+                    .filter(FaceEmbedding.id > _FACE_INDEX_WATERMARK)
+                    .order_by(FaceEmbedding.id)
+                    .limit(10000)
+                    .all()
+                )
+                if not rows:
+                    break
+                usable = [r for r in rows if r.embedding]
+                if usable:
+                    _FACE_INDEX.add(
+                        [r.app_id for r in usable],
+                        np.stack([np.frombuffer(r.embedding, dtype=np.float32) for r in usable]),
+                    )
+                _FACE_INDEX_WATERMARK = rows[-1].id
+        finally:
+            db.close()
+        return _FACE_INDEX
+
+
+@timed("face_search")
+def find_face_reuse(db, intake: Application, emb: np.ndarray, k: int = 10):
+    """
+    Other applications whose stored face matches emb but whose Aadhaar / PAN differ.
+    """
+    neighbours = [
+        (app_id, score) for app_id, score in get_face_index().search(emb, k=k, exclude_id=intake.app_id)
+        if score >= settings.FACE_REUSE_THRESHOLD
+    ]
+    if not neighbours:
+        return []
+
+    others = {
+        a.app_id: a for a in
+        db.query(Application).filter(Application.app_id.in_([n[0] for n in neighbours])).all()
+    }
+    reuse = {}
+    for app_id, score in neighbours:
+        other = others.get(app_id)
+        if other is None:
+            continue
+        same_aadhaar = normalize_aadhaar(other.aadhaar) == normalize_aadhaar(intake.aadhaar)
+        same_pan = normalize_pan(other.pan) == normalize_pan(intake.pan)
+        if not (same_aadhaar or same_pan):
+            reuse[app_id] = max(score, reuse.get(app_id, 0.0))
+    return [{"app_id": a, "score": round(s, 4)} for a, s in sorted(reuse.items(), key=lambda x: -x[1])]
+
+
+def stored_embeddings(db, app_id: int) -> dict:
+    """
+    Latest stored (image_hash, embedding) per kind for an application, so face
+    checks can be recomputed without the original uploads.
+    """
+    out = {}
+    rows = (
+        db.query(FaceEmbedding)
+        .filter(FaceEmbedding.app_id == app_id)
+        .order_by(FaceEmbedding.id.desc())
+        .all()
+    )
+    for r in rows:
+        if r.kind not in out:
+            emb = np.frombuffer(r.embedding, dtype=np.float32) if r.embedding else None
+            out[r.kind] = (r.image_hash, emb)
+    return out
+
+
+def face_checks(db, intake: Application, embeddings: dict) -> dict:
+    """
+    Selfie vs ID photo score and face reuse from {kind: embedding or None}.
+    """
+    result = {"face_match_score": None, "face_match": None, "face_reuse": []}
+    for kind, emb in embeddings.items():
+        result[f"{kind.lower()}_face_found"] = emb is not None
+
+    if embeddings.get("SELFIE") is not None and embeddings.get("ID_PHOTO") is not None:
+        score = match_score(embeddings["SELFIE"], embeddings["ID_PHOTO"])
+        result["face_match_score"] = round(score, 4)
+        result["face_match"] = score >= settings.FACE_MATCH_THRESHOLD
 
-def normalize(s):
-    return s.lower().replace(" ", "").replace(",", "")
+    probe = embeddings.get("SELFIE")
+    if probe is None:
+        probe = embeddings.get("ID_PHOTO")
+    if probe is not None:
+        result["face_reuse"] = find_face_reuse(db, intake, probe)
+    return result
 
-def run_kyc_agent(app_id: int):
+
+def card_photo(db, app_id: int) -> Optional[bytes]:
+    """
+    Page 1 of the latest Aadhaar upload from the document store (the upload
+    itself for an image, the stored page PNG for a PDF), or None.
+    """
+    row = latest_snapshot(db, app_id, "aadhaar")
+    if row is None or not row.document_hash:
+        return None
+    try:
+        return get_document_store().page_bytes(row.document_hash)
+    except KeyError:
+        return None
+
+
+def run_face_match(db, intake: Application, selfie: bytes = None, id_photo: bytes = None):
+    """
+    Selfie vs ID-card photo score, plus face reuse across identities.
+    Without a separate ID photo the selfie is matched against the photo on
+    the Aadhaar card page. The score is None unless both images have a face.
+    """
+    if selfie and not id_photo:
+        id_photo = card_photo(db, intake.app_id)
+    embeddings = {}
+    for kind, data in (("SELFIE", selfie), ("ID_PHOTO", id_photo)):
+        if data:
+            _, embeddings[kind] = embed_document(db, intake.app_id, data, kind)
+    return face_checks(db, intake, embeddings)
+
+
+def latest_snapshot(db, app_id: int, doc: str) -> Optional[KYCData]:
+    """Newest KYCData row written by the "aadhaar" / "pan" OCR agent."""
+    return (
+        db.query(KYCData)
+        .filter(KYCData.app_id == app_id, KYCData.doc_type == doc.upper())
+        .order_by(KYCData.id.desc())
+        .first()
+    )
+
+
+def parsed_from_snapshot(row: KYCData, doc: str) -> dict:
+    """A KYCData row as the parsed dict of its OCR agent."""
+    if doc == "aadhaar":
+        return {"name": row.extracted_name, "dob": row.extracted_dob,
+                "aadhaar_number": row.extracted_aadhaar, "address": row.extracted_address}
+    return {"pan": row.extracted_pan, "name": row.extracted_name, "dob": row.extracted_dob}
+
+
+def ocr_results_from_snapshots(db, intake: Application) -> dict:
+    """match_results of the latest Aadhaar and PAN snapshots ({} if there are none)."""
+    out = {}
+    for doc, compare in (("aadhaar", compare_aadhaar), ("pan", compare_pan)):
+        row = latest_snapshot(db, intake.app_id, doc)
+        if row is not None:
+            out[doc] = {"match_results": compare(intake, parsed_from_snapshot(row, doc))}
+    return out
+
+
+def matches_from_ocr_results(ocr_results: dict) -> dict:
+    """
+    Combine the match_results of OCR agent outputs from the same run
+    ({"aadhaar": ..., "pan": ...}). A field matches only if every document
+    that checked it agrees; a missing / failed document fails its fields.
+    """
+    checks = {}
+    expected = {
+        "aadhaar": ("name_match", "dob_match", "aadhaar_match", "address_match"),
+        "pan": ("name_match", "dob_match", "pan_match"),
+    }
+    for doc, keys in expected.items():
+        res = ocr_results.get(doc)
+        if res is None:
+            continue
+        match = res.get("match_results") or {}
+        for key in keys:
+            checks[key] = checks.get(key, True) and bool(match.get(key, False))
+    for key in ("name_match", "dob_match", "aadhaar_match", "address_match"):
+        checks.setdefault(key, False)
+    return checks
+
+
+@timed("kyc_agent")
+def run_kyc_agent(app_id: int, selfie: bytes = None, id_photo: bytes = None,
+                  intake: Application = None, ocr_results: dict = None, face: dict = None):
+    """
+    ocr_results: outputs of the OCR agents from the same pipeline run; when
+    given, their match results are used instead of re-reading the latest
+    KYCData snapshot of each document type.
+    intake: Application already loaded by the caller (skips the lookup).
+    face: face_checks() output computed by the caller (skips face matching).
+    """
     db = SessionLocal()
 
-    intake = db.query(Application).filter(Application.app_id == app_id).first()
-    ocr = db.query(KYCData).filter(KYCData.app_id == app_id).first()
+    if intake is None:
+        intake = db.query(Application).filter(Application.app_id == app_id).first()
 
-    if not intake or not ocr:
+    if not ocr_results and intake is not None:
+        ocr_results = ocr_results_from_snapshots(db, intake)
+        if not ocr_results:
+            db.close()
+            return {"status": "ERROR", "message": "Missing data"}
+    checks = matches_from_ocr_results(ocr_results or {})
+
+    if not intake:
         db.close()
         return {"status": "ERROR", "message": "Missing data"}
 
-    name_match = normalize(ocr.extracted_name or "") == normalize(intake.name)
-    dob_match = normalize(ocr.extracted_dob or "") == normalize(intake.dob.strftime("%d/%m/%Y"))
-    aadhaar_match = normalize(ocr.extracted_pan or "") == normalize(intake.pan)
-    address_match = normalize(intake.address) in normalize(ocr.extracted_address or "")
+    name_match = checks["name_match"]
+    dob_match = checks["dob_match"]
+
+    if face is None:
+        try:
+            face = run_face_match(db, intake, selfie=selfie, id_photo=id_photo)
+        except Exception as e:
+            db.rollback()
+            face = {"face_match_score": None, "face_match": None, "face_reuse": [], "face_error": str(e)}
+
+    failed = [key[:-len("_match")] for key, ok in checks.items() if not ok]
+    if face["face_match"] is False:
+        failed.append("face")
+    if face["face_reuse"]:
+        failed.append("face_reuse")     # a hard failure, as in the fraud verdict
 
-    if name_match and dob_match and aadhaar_match and address_match:
+    if not failed:
         status = "APPROVED"
     else:
         status = "REJECTED"
 
     result = KYCResult(
         app_id=app_id,
-        pan_verified=aadhaar_match,
-        face_match_score=0.90,
         kyc_status=status,
-        updated_at=datetime.utcnow(),
+        failed_fields=", ".join(failed),
+        updated_at=datetime.now(),
+    )
+    check = KYCCheck(
+        app_id=app_id,
+        face_match_score=face["face_match_score"],
+        name_match=name_match,
+        dob_match=dob_match,
+        kyc_status="PASS" if status == "APPROVED" else "FAIL",
+        updated_at=datetime.now(),
     )
     db.add(result)
+    db.add(check)
     db.commit()
     db.close()
 
     return {
         "app_id": app_id,
-        "name_match": name_match,
-        "dob_match": dob_match,
-        "aadhaar_match": aadhaar_match,
-        "address_match": address_match,
+        **checks,
+        **face,
         "kyc_status": status
     }
@@ -4,20 +4,24 @@ from pdf2image import convert_from_path
 from backend.database import SessionLocal
 from backend.models.db_models import KYCData
 from datetime import datetime
+from backend.utils.metrics import span
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
 
 
 def extract_text_from_file(path):
     if path.lower().endswith(".pdf"):
-        pages = convert_from_path(path)
+        with span("pdf_rasterise"):
+            pages = convert_from_path(path)
         text = ""
         for page in pages:
-            text += pytesseract.image_to_string(page)
+            with span("tesseract"):
+                text += pytesseract.image_to_string(page)
         return text
 
     else:
-        return pytesseract.image_to_string(path)
+        with span("tesseract"):
+            return pytesseract.image_to_string(path)
 
 
 def extract_name(text):
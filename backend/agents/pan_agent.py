@@ -26,6 +26,8 @@ from fuzzywuzzy import fuzz
 
 from backend.database import SessionLocal
 from backend.models.db_models import KYCData, Application
+from backend.utils.ocr_utils import ocr_data
+from backend.utils.metrics import span, timed
 
 # Configure tesseract path if needed (Windows default)
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -42,13 +44,15 @@ DOB_RE = re.compile(r"(\d{1,2}[\/\-\.\s]\d{1,2}[\/\-\.\s]\d{4})")
 def load_first_image(path: str) -> Image.Image:
     ext = os.path.splitext(path)[1].lower()
     if ext == ".pdf":
-        pages = convert_from_path(path, dpi=300)
+        with span("pdf_rasterise"):
+            pages = convert_from_path(path, dpi=300)
         if not pages:
             raise RuntimeError("PDF conversion returned no pages")
         return pages[0]
     return Image.open(path)
 
 
+@timed("image_preprocess")
 def preprocess_image(img: Image.Image) -> Image.Image:
     """
     Convert to grayscale, autocontrast, sharpen and upscale small images.
@@ -65,24 +69,28 @@ def preprocess_image(img: Image.Image) -> Image.Image:
 # -----------------------
 # OCR helpers
 # -----------------------
-def ocr_tesseract(path: str) -> Tuple[str, Image.Image]:
+def ocr_tesseract(path: Optional[str], img: Optional[Image.Image] = None) -> Tuple[str, Image.Image]:
     """
     Return tuple (full_ocr_text, pil_image).
     Use psm 6 then psm 3 as fallback; prefer text containing PAN token.
+    If img (already decoded first page) is given, path is not read.
     """
-    img = load_first_image(path)
+    if img is None:
+        img = load_first_image(path)
     img = preprocess_image(img)
 
     text6 = ""
     text3 = ""
     try:
-        text6 = pytesseract.image_to_string(img, lang="eng", config="--psm 6")
+        with span("tesseract", psm=6):
+            text6 = pytesseract.image_to_string(img, lang="eng", config="--psm 6")
     except Exception:
         text6 = ""
     if PAN_REGEX.search(text6):
         return text6, img
     try:
-        text3 = pytesseract.image_to_string(img, lang="eng", config="--psm 3")
+        with span("tesseract", psm=3):
+            text3 = pytesseract.image_to_string(img, lang="eng", config="--psm 3")
     except Exception:
         text3 = text6
     if PAN_REGEX.search(text3) and not PAN_REGEX.search(text6):
@@ -144,7 +152,8 @@ def crop_and_ocr_name_region(img: Image.Image, header_left: int, header_top: int
         crop = crop.filter(ImageFilter.MedianFilter(size=3))
 
         # single-line OCR
-        name_candidate = pytesseract.image_to_string(crop, lang="eng", config="--psm 7 --oem 3")
+        with span("tesseract", psm=7):
+            name_candidate = pytesseract.image_to_string(crop, lang="eng", config="--psm 7 --oem 3")
         name_candidate = re.sub(r"[^A-Za-z\s\.\&\-\']", " ", name_candidate).strip()
         name_candidate = re.sub(r"\s+", " ", name_candidate).strip()
         if name_candidate:
@@ -162,11 +171,13 @@ def crop_and_ocr_name_region(img: Image.Image, header_left: int, header_top: int
     return None
 
 
-def extract_name_and_dob_from_pan_text(ocr_text: str, img: Image.Image = None):
+@timed("parse_pan")
+def extract_name_and_dob_from_pan_text(ocr_text: str, img: Image.Image = None, data: dict = None):
     """
     1) Extract DOB from full OCR text (first dd/mm/yyyy).
     2) Use image_to_data to find header words, compute header bbox, crop beneath,
        OCR that crop for NAME using crop_and_ocr_name_region.
+       Pass data (image_to_data output for img) to reuse an existing word-box pass.
     3) If image-based detection fails, fallback to strict next-line-in-text (line following header).
     """
     # DOB extraction and normalization
@@ -186,7 +197,8 @@ def extract_name_and_dob_from_pan_text(ocr_text: str, img: Image.Image = None):
     # Image-based header detection + crop OCR
     if img is not None:
         try:
-            data = pytesseract.image_to_data(img, lang="eng", output_type=pytesseract.Output.DICT)
+            if data is None:
+                data = ocr_data(img, lang="eng")
             n_boxes = len(data.get('text', []))
             header_indices = []
             # Identify words that belong to header by presence of 'INCOME' or 'TAX' tokens in same nearby line
@@ -243,6 +255,7 @@ def extract_name_and_dob_from_pan_text(ocr_text: str, img: Image.Image = None):
 # -----------------------
 # Compare with intake
 # -----------------------
+@timed("fuzzy_match")
 def compare_with_intake(intake: Application, ocr: dict):
     failed = []
     result = {}
@@ -293,17 +306,37 @@ def compare_with_intake(intake: Application, ocr: dict):
 # -----------------------
 # Main PAN OCR Agent entry
 # -----------------------
-def run_pan_ocr_agent(app_id: int, file_path: str):
+@timed("pan_agent", doc_type="PAN")
+def run_pan_ocr_agent(app_id: int, file_path: str = None, pages=None, artifacts: dict = None, intake=None,
+                      document_hash: str = None):
+    """
+    Entry point for the PAN OCR agent.
+    pages: already decoded document pages (skips re-reading file_path).
+    artifacts: optional dict filled with the OCR image and word boxes
+               so document forensics can reuse them.
+    intake: Application already loaded by the caller (skips the lookup).
+    document_hash: the upload in the document store, recorded on the KYCData row.
+    """
     db = SessionLocal()
     try:
-        intake = db.query(Application).filter(Application.app_id == app_id).first()
+        if intake is None:
+            intake = db.query(Application).filter(Application.app_id == app_id).first()
         if not intake:
             return {"error": "Invalid application ID"}
 
-        raw_text, pil_img = ocr_tesseract(file_path)
+        raw_text, pil_img = ocr_tesseract(file_path, img=pages[0] if pages else None)
+
+        # one word-box pass shared by name extraction and field forensics
+        try:
+            data = ocr_data(pil_img, lang="eng")
+        except Exception:
+            data = None
+        if artifacts is not None:
+            artifacts["image"] = pil_img
+            artifacts["word_data"] = data
 
         pan = extract_pan_from_text(raw_text)
-        info = extract_name_and_dob_from_pan_text(raw_text, img=pil_img)
+        info = extract_name_and_dob_from_pan_text(raw_text, img=pil_img, data=data)
 
         parsed = {
             "pan": pan,
@@ -322,6 +355,8 @@ def run_pan_ocr_agent(app_id: int, file_path: str):
             extracted_pan=(parsed.get("pan") or "").upper().strip() if parsed.get("pan") else None,
             extracted_address=None,
             ocr_confidence=0.90,
+            document_hash=document_hash,
+            doc_type="PAN",
             updated_at=datetime.now()
         )
 
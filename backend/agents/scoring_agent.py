@@ -0,0 +1,340 @@
+# backend/agents/scoring_agent.py
+"""
+Credit scoring agent + what-if offer optimiser.
+
+For an application we build a grid of (amount x tenure) counter-offers,
+score the WHOLE grid with one batched model call, price every cell
+(risk-based rate + EMI) and return the approvable frontier:
+the largest approvable amount for each tenure, plus the best offer.
+
+Model:
+  - backend/models/credit_model.pkl (anything exposing predict_proba / predict
+    over the FEATURES columns below, e.g. a LightGBM / sklearn classifier).
+  - If the pickle is missing or empty we fall back to a small logistic
+    scorecard so the pipeline still produces offers.
+"""
+import os
+import json
+import time
+import pickle
+from datetime import datetime, date
+from typing import Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import Application, CreditScore
+
+# Feature order expected by the model (one row per offer)
+FEATURES = ["income", "loan_amount", "loan_tenure", "age", "emi_to_income"]
+
+_UNLOADED = object()
+_MODEL = _UNLOADED
+
+
+# -----------------------
+# Model loading
+# -----------------------
+def _resolve_model_path(path: str) -> str:
+    """
+    MODEL_PATH is relative to the backend package (backend/models/...),
+    but also accept a path relative to the working directory.
+    """
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(backend_dir, path)
+
+
+def load_model():
+    """
+    Load (once) and return the pickled credit model, or None to use the scorecard.
+    """
+    global _MODEL
+    if _MODEL is _UNLOADED:
+        path = _resolve_model_path(settings.MODEL_PATH)
+        try:
+            if os.path.getsize(path) > 0:
+                with open(path, "rb") as f:
+                    _MODEL = pickle.load(f)
+            else:
+                _MODEL = None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            _MODEL = None
+    return _MODEL
+
+
+def _scorecard_proba(X: np.ndarray) -> np.ndarray:
+    """
+    Fallback logistic scorecard over the FEATURES matrix (vectorised).
+    """
+    income = np.maximum(X[:, 0], 1.0)
+    amount = X[:, 1]
+    tenure = X[:, 2]
+    age = X[:, 3]
+    dti = X[:, 4]
+
+    z = (
+        2.6
+        - 5.5 * dti
+        - 0.35 * np.log1p(amount / income)
+        - 0.008 * tenure
+        + 0.02 * np.clip(age - 21.0, 0.0, 25.0)
+    )
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def predict_approval(X: np.ndarray, model=None) -> np.ndarray:
+    """
+    Approval probability for every row of X in ONE model call.
+    """
+    model = load_model() if model is None else model
+    if model is None:
+        return _scorecard_proba(X)
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(X))[:, 1]
+    return np.clip(np.asarray(model.predict(X), dtype=float), 0.0, 1.0)
+
+
+# -----------------------
+# Pricing helpers (vectorised)
+# -----------------------
+def compute_emi(principal, annual_rate, tenure_months):
+    """
+    Standard reducing-balance EMI. Works on scalars or NumPy arrays.
+    """
+    principal = np.asarray(principal, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 1200.0
+    n = np.asarray(tenure_months, dtype=float)
+    growth = np.power(1.0 + r, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = np.where(r > 0, principal * r * growth / (growth - 1.0), principal / n)
+    return emi
+
+
+def price_offers(proba: np.ndarray) -> np.ndarray:
+    """
+    Risk-based annual rate: BASE at p=1, BASE + MAX_RISK_SPREAD at the approval threshold.
+    """
+    thr = settings.APPROVAL_THRESHOLD
+    risk = np.clip((1.0 - proba) / max(1.0 - thr, 1e-6), 0.0, 1.0)
+    return np.round(settings.BASE_INTEREST_RATE + settings.MAX_RISK_SPREAD * risk, 2)
+
+
+def _age_years(dob, today: Optional[date] = None) -> float:
+    if not dob:
+        return 30.0
+    today = today or date.today()
+    return (today - dob).days / 365.25
+
+
+# -----------------------
+# Offer grid
+# -----------------------
+def build_offer_grid(requested_amount: int, requested_tenure: int):
+    """
+    Return (amounts, tenures) 1-D arrays describing the counter-offer grid.
+    Amounts are ascending and rounded; the requested terms are always included.
+    """
+    rounding = settings.OFFER_ROUNDING
+    top = max(int(requested_amount or 0), settings.OFFER_MIN_AMOUNT)
+    amounts = np.linspace(settings.OFFER_MIN_AMOUNT, top, settings.OFFER_AMOUNT_STEPS)
+    amounts = np.round(amounts / rounding) * rounding
+    amounts = np.unique(np.append(amounts, top)).astype(float)
+
+    tenures = list(settings.OFFER_TENURES)
+    if requested_tenure:
+        tenures.append(int(requested_tenure))
+    tenures = np.unique(np.asarray(tenures, dtype=float))
+    return amounts, tenures
+
+
+def optimise_offer(intake: Application, model=None) -> dict:
+    """
+    Score the full amount x tenure grid for one application and return:
+      - requested: decision for the requested amount/tenure
+      - frontier: per tenure, the largest approvable amount with EMI and rate
+      - best_offer: largest approvable amount (ties -> lowest total interest)
+    """
+    start = time.perf_counter()
+
+    annual_income = float(intake.income or 0)
+    monthly_income = annual_income / 12.0
+    amounts, tenures = build_offer_grid(intake.loan_amount, intake.loan_tenure)
+
+    # grid shape: (n_tenures, n_amounts), flattened row-major for the model
+    A, T = np.meshgrid(amounts, tenures)
+    flat_a = A.ravel()
+    flat_t = T.ravel()
+
+    # affordability feature uses EMI at the base rate (before risk pricing)
+    base_emi = compute_emi(flat_a, settings.BASE_INTEREST_RATE, flat_t)
+    emi_to_income = base_emi / max(monthly_income, 1.0)
+
+    X = np.column_stack([
+        np.full(flat_a.shape, annual_income),
+        flat_a,
+        flat_t,
+        np.full(flat_a.shape, _age_years(intake.dob)),
+        emi_to_income,
+    ])
+
+    proba = predict_approval(X, model=model)          # single batched call
+    rate = price_offers(proba)
+    emi = compute_emi(flat_a, rate, flat_t)
+    approvable = (proba >= settings.APPROVAL_THRESHOLD) & (emi <= settings.MAX_FOIR * monthly_income)
+
+    proba_g = proba.reshape(A.shape)
+    rate_g = rate.reshape(A.shape)
+    emi_g = emi.reshape(A.shape)
+    ok_g = approvable.reshape(A.shape)
+
+    # largest approvable amount per tenure: last True along the (ascending) amount axis
+    n_amounts = A.shape[1]
+    has_offer = ok_g.any(axis=1)
+    best_col = n_amounts - 1 - np.argmax(ok_g[:, ::-1], axis=1)
+
+    frontier = []
+    for row in np.nonzero(has_offer)[0]:
+        col = best_col[row]
+        tenure = int(tenures[row])
+        amount = int(amounts[col])
+        row_emi = float(emi_g[row, col])
+        frontier.append({
+            "tenure": tenure,
+            "max_amount": amount,
+            "emi": round(row_emi, 2),
+            "interest_rate": float(rate_g[row, col]),
+            "approval_probability": round(float(proba_g[row, col]), 4),
+            "total_interest": round(row_emi * tenure - amount, 2),
+        })
+
+    best_offer = None
+    if frontier:
+        best_offer = max(frontier, key=lambda o: (o["max_amount"], -o["total_interest"]))
+
+    # requested terms are always a grid cell
+    req_row = int(np.searchsorted(tenures, float(intake.loan_tenure or tenures[0])))
+    req_col = int(np.searchsorted(amounts, float(max(intake.loan_amount or 0, settings.OFFER_MIN_AMOUNT))))
+    req_row = min(req_row, len(tenures) - 1)
+    req_col = min(req_col, n_amounts - 1)
+    requested = {
+        "amount": intake.loan_amount,
+        "tenure": intake.loan_tenure,
+        "approvable": bool(ok_g[req_row, req_col]),
+        "approval_probability": round(float(proba_g[req_row, req_col]), 4),
+        "interest_rate": float(rate_g[req_row, req_col]),
+        "emi": round(float(emi_g[req_row, req_col]), 2),
+    }
+
+    return {
+        "requested": requested,
+        "frontier": frontier,
+        "best_offer": best_offer,
+        "grid_size": int(flat_a.size),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000.0, 3),
+    }
+
+
+def scoring_inputs(intake: Application) -> dict:
+    """
+    Everything the scoring result depends on (incremental re-evaluation
+    fingerprints this): applicant fields, credit policy and the model file.
+    """
+    path = _resolve_model_path(settings.MODEL_PATH)
+    try:
+        st = os.stat(path)
+        model = [path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        model = None
+    return {
+        "income": intake.income,
+        "loan_amount": intake.loan_amount,
+        "loan_tenure": intake.loan_tenure,
+        "dob": intake.dob,
+        "model": model,
+        "policy": [
+            settings.APPROVAL_THRESHOLD, settings.MAX_FOIR, settings.BASE_INTEREST_RATE,
+            settings.MAX_RISK_SPREAD, list(settings.OFFER_TENURES), settings.OFFER_AMOUNT_STEPS,
+            settings.OFFER_MIN_AMOUNT, settings.OFFER_ROUNDING,
+        ],
+    }
+
+
+# -----------------------
+# Main Scoring Agent entry
+# -----------------------
+def run_scoring_agent(app_id: int, persist: bool = True, intake: Application = None):
+    """
+    Score the application, choose sanctioned amount/tenure/rate and
+    (optionally) save a CreditScore row.
+
+    approval_status:
+      APPROVED - requested terms are approvable
+      MANUAL   - only counter-offers are approvable (loan officer decides)
+      REJECTED - nothing on the grid is approvable
+    intake: Application already loaded by the caller (skips the lookup).
+    """
+    db = SessionLocal()
+    try:
+        if intake is None:
+            intake = db.query(Application).filter(Application.app_id == app_id).first()
+        if not intake:
+            return {"error": "Invalid application ID"}
+
+        result = optimise_offer(intake)
+        requested = result["requested"]
+        best = result["best_offer"]
+
+        if requested["approvable"]:
+            status = "APPROVED"
+            sanctioned = {
+                "amount": intake.loan_amount,
+                "tenure": intake.loan_tenure,
+                "interest_rate": requested["interest_rate"],
+                "model_score": requested["approval_probability"],
+            }
+        elif best:
+            status = "MANUAL"
+            sanctioned = {
+                "amount": best["max_amount"],
+                "tenure": best["tenure"],
+                "interest_rate": best["interest_rate"],
+                "model_score": best["approval_probability"],
+            }
+        else:
+            status = "REJECTED"
+            sanctioned = {
+                "amount": None,
+                "tenure": None,
+                "interest_rate": None,
+                "model_score": requested["approval_probability"],
+            }
+
+        if persist:
+            score = CreditScore(
+                app_id=app_id,
+                model_score=sanctioned["model_score"],
+                approval_status=status,
+                sanctioned_amount=sanctioned["amount"],
+                sanctioned_tenure=sanctioned["tenure"],
+                interest_rate=sanctioned["interest_rate"],
+                shap_top_features=json.dumps([]),
+                updated_at=datetime.now()
+            )
+            db.add(score)
+            db.commit()
+
+        return {
+            "app_id": app_id,
+            "approval_status": status,
+            "sanctioned": sanctioned,
+            **result
+        }
+
+    except Exception as e:
+        db.rollback()
+        return {"error": "Internal error in scoring agent", "details": str(e)}
+    finally:
+        db.close()
@@ -2,4 +2,157 @@ class Settings:
     MODEL_PATH = "models/credit_model.pkl"
     REDIS_URL = "redis://localhost:6379/0"
 
+    # Scoring / offer optimiser
+    APPROVAL_THRESHOLD = 0.60          # min model probability to approve an offer
+    MAX_FOIR = 0.50                    # max EMI as a fraction of monthly income
+    BASE_INTEREST_RATE = 10.5          # annual %, best risk band
+    MAX_RISK_SPREAD = 8.0              # annual %, added as risk goes to the threshold
+    OFFER_TENURES = [12, 18, 24, 36, 48, 60, 72, 84]   # months
+    OFFER_AMOUNT_STEPS = 40            # grid points between min amount and requested amount
+    OFFER_MIN_AMOUNT = 10000
+    OFFER_ROUNDING = 1000
+
+    # OCR worker pool (tesseract runs as a subprocess, so threads scale fine)
+    OCR_WORKERS = 4
+    PDF_DPI = 300
+
+    # Script-aware OCR: Devanagari regions of the eng pass are re-read with the Hindi model
+    OCR_SCRIPT_DETECT = True
+    OCR_HINDI_LANG = "hin"
+    OCR_SCRIPT_CONF_MAX = 85           # only eng words below this confidence are checked
+    OCR_HEADLINE_MIN = 0.75            # ink coverage of a headline (shirorekha) row across a word
+
+    # Document forensics
+    BLUR_THRESHOLD = 60.0              # Laplacian variance below this -> too blurry to OCR
+    ELA_QUALITY = 90                   # JPEG quality used for error-level analysis
+    ELA_TAMPER_RATIO = 4.0             # hottest ELA block vs median block
+    COPY_MOVE_TAMPER_SCORE = 0.02      # fraction of textured blocks with a distant clone
+    FONT_TAMPER_ZSCORE = 3.5           # robust z-score of field glyphs vs the card
+
+    # Identity-reuse index (duplicate Aadhaar / PAN / phone / email, near-duplicate name+address)
+    IDENTITY_INDEX_PATH = "identity_index.npz"
+    NEAR_DUP_JACCARD = 0.6             # verified trigram similarity to report a near-duplicate
+    NEAR_DUP_MAX_CANDIDATES = 50
+
+    # Velocity signals: window seconds, ring buckets, exact per-key ring or count-min "sketch"
+    VELOCITY_SIGNALS = {
+        "apply_phone_1h": {"window": 3600, "buckets": 60, "mode": "exact"},
+        "apply_email_1h": {"window": 3600, "buckets": 60, "mode": "exact"},
+        "apply_client_1h": {"window": 3600, "buckets": 60, "mode": "sketch", "width": 2 ** 15},
+        "apply_aadhaar_24h": {"window": 86400, "buckets": 24, "mode": "sketch", "width": 2 ** 15},
+        "apply_pan_24h": {"window": 86400, "buckets": 24, "mode": "sketch", "width": 2 ** 15},
+        "ocr_upload_app_10m": {"window": 600, "buckets": 60, "mode": "exact"},
+    }
+    VELOCITY_LIMITS = {            # counts above these are flagged by the fraud agent
+        "apply_phone_1h": 3,
+        "apply_email_1h": 3,
+        "apply_client_1h": 20,
+        "apply_aadhaar_24h": 2,
+        "apply_pan_24h": 2,
+        "ocr_upload_app_10m": 6,
+    }
+    VELOCITY_PERSIST = False       # counts shared in REDIS_URL; required with more than one worker ("memory://" = local stand-in)
+
+    # Face match (insightface on CPU)
+    FACE_MODEL_NAME = "buffalo_l"
+    FACE_DET_SIZE = 640
+    FACE_MAX_SIDE = 1280               # downscale larger photos before detection
+    FACE_MATCH_THRESHOLD = 0.40        # cosine; selfie vs ID photo
+    FACE_REUSE_THRESHOLD = 0.60        # cosine; same face on another application
+    FACE_CACHE_SIZE = 4096             # embeddings kept in memory, keyed by image hash
+    FACE_BRUTE_FORCE_MAX = 20000       # above this the index switches to IVF + int8
+    FACE_NPROBE = 16
+
+    # Pipeline orchestrator (orchestrator/workflow.py): per-stage timeout seconds / retries
+    PIPELINE_STAGE_TIMEOUTS = {
+        "intake": 10, "decode": 30, "ocr": 60, "forensics": 30,
+        "kyc": 60, "fraud": 30, "scoring": 10, "explanation": 10,
+    }
+    PIPELINE_STAGE_RETRIES = {"ocr": 1, "kyc": 1, "fraud": 1, "scoring": 1}
+
+    # Job queue (backend/jobs): "sqlite:///./jobs.db" locally, "redis://..." in production
+    JOB_BROKER_URL = "sqlite:///./jobs.db"
+    JOB_LANES = {                  # reserved in this order; concurrency is across ALL workers
+        "interactive": {"concurrency": 8, "max_depth": 1000},
+        "batch": {"concurrency": 1, "max_depth": 100000},   # keep below JOB_WORKER_PROCESSES
+    }
+    JOB_WORKER_PROCESSES = 4
+    JOB_VISIBILITY_TIMEOUT = 300   # seconds before an unacknowledged job is redelivered
+    JOB_MAX_ATTEMPTS = 3
+    JOB_RETRY_BACKOFF = 5.0        # seconds, doubled per attempt
+    JOB_POLL_INTERVAL = 0.5
+    JOB_RESULT_TTL = 86400         # finished jobs are purged after this many seconds
+    JOB_UPLOAD_DIR = "job_uploads"
+
+    # Idempotency (Idempotency-Key header or payload hash on /apply, /agent/ocr/both)
+    IDEMPOTENCY_TTL = 86400        # seconds a stored response is replayed
+    IDEMPOTENCY_LEASE = 300        # an IN_PROGRESS claim older than this is abandoned
+    IDEMPOTENCY_WAIT_TIMEOUT = 120 # max seconds a duplicate waits for the first execution
+    IDEMPOTENCY_POLL_INTERVAL = 0.2
+
+    # Metrics (GET /metrics, backend/utils/metrics.py)
+    METRICS_ENABLED = True
+    METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    # Request profiling (X-Profile header / ?profile=, backend/utils/profiling.py)
+    PROFILE_DIR = "profiles"
+    PROFILE_SAMPLE_RATE = 0.0      # fraction of requests profiled unasked; PUT /admin/profiles/sampling overrides
+    PROFILE_INTERVAL = 0.005       # seconds between stack samples
+    PROFILE_MAX_CONCURRENT = 4     # further profile requests run unprofiled
+    PROFILE_MAX_SAMPLES = 200000   # per profile (thread stacks), then truncated
+    PROFILE_KEEP = 200             # newest profiles kept in PROFILE_DIR
+    ADMIN_TOKEN = None             # if set: required by /admin endpoints and as the X-Profile value (/admin/audit: always)
+
+    # Startup (backend/startup.py, GET /ready)
+    WARMUP_MODE = "background"     # background: serve now, ready once warm / blocking / off: load on first use
+    WARMUP_FACE_MODEL = True       # load insightface during warmup
+    AUTO_CREATE_SCHEMA = False     # dev only: create_all at startup instead of `alembic upgrade head`
+    WARMUP_RETRY_INTERVAL = 10.0   # seconds between warmup retries triggered by /ready after a failure
+
+    # Document store (backend/utils/document_store.py): content-addressed uploads + derivatives
+    DOCUMENT_STORE_URL = "file://./document_store"     # or "memory://" (in-process object-store stand-in)
+    DOCUMENT_THUMB_SIZE = 256                          # px, longest side
+    DOCUMENT_PNG_COMPRESS_LEVEL = 3                    # rasterised PDF pages (0-9, higher = smaller / slower)
+
+    # Analytics snapshot (backend/utils/analytics.py): columnar copy for dashboards, GET /analytics/*
+    ANALYTICS_DIR = "analytics_snapshot"
+    ANALYTICS_SYNC_BATCH = 5000        # rows per keyset query (short reads on the live tables)
+    ANALYTICS_SYNC_LAG = 5             # seconds; newer rows wait for the next sync (late commits)
+    ANALYTICS_PART_ROWS = 200000       # rows buffered per part file during a sync
+    ANALYTICS_COMPACT_PARTS = 16       # a month with more part files is merged after a sync
+
+    # Retention (backend/utils/retention.py): kyc_data / kyc_results rows beyond the newest
+    # RETENTION_KEEP per application move to monthly gzip partitions in ARCHIVE_DIR
+    RETENTION_KEEP = 3                 # newest rows kept live per application (per document type for kyc_data)
+    RETENTION_MIN_AGE_DAYS = 30        # younger rows are never archived
+    RETENTION_BATCH = 500              # rows archived + deleted per transaction
+    RETENTION_PAUSE = 0.2              # seconds between batches, so intake writes get the database
+    RETENTION_MAX_SECONDS = 240        # per run (below JOB_VISIBILITY_TIMEOUT); the next run resumes at the cursor
+    ARCHIVE_DIR = "kyc_archive"
+    ARCHIVE_COMPRESS_LEVEL = 6         # gzip level of archive files
+
+    # Admission control (backend/utils/admission.py): first matching path prefix wins.
+    # rate / burst: per-client token bucket (None = unlimited); concurrency: requests
+    # in the app at once; beyond that up to max_queue wait, shed once the estimated
+    # wait (queue / concurrency * EWMA service time, seeded by service_time) > max_wait
+    ADMISSION_ENABLED = True
+    ADMISSION_CLASSES = {
+        "ocr": {
+            "prefixes": ("/agent/ocr", "/agent/kyc", "/pipeline"),
+            "concurrency": 4, "max_queue": 32, "max_wait": 15.0, "service_time": 2.0,
+            "rate": 0.5, "burst": 10,
+        },
+        "default": {
+            "prefixes": ("/",),
+            "concurrency": 64, "max_queue": 512, "max_wait": 5.0, "service_time": 0.05,
+            "rate": 20.0, "burst": 100,
+        },
+    }
+    ADMISSION_EXEMPT = (                           # path prefixes never shed (probes, operator tools);
+        "/ready", "/metrics",                      # /admin/audit reads personal data and is not exempt
+        "/admin/profiles", "/admin/admission", "/admin/retention",
+    )
+    ADMISSION_MAX_CLIENTS = 100000                 # token buckets kept (least recently seen dropped)
+    ADMISSION_TRUST_FORWARDED = False              # key clients by X-Forwarded-For (behind a proxy)
+
 settings = Settings()
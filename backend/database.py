@@ -1,5 +1,7 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+
+from backend.utils.metrics import span, instrument_engine
 
 # SQLite database in a local file "lending.db" in project root
 DATABASE_URL = "sqlite:///./lending.db"
@@ -9,8 +11,20 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # needed for SQLite + FastAPI
 )
 
+instrument_engine(engine)
+
+
+class TimedSession(Session):
+    """Session whose commits (flush + COMMIT) show up as the db_commit stage."""
+
+    def commit(self):
+        with span("db_commit"):
+            super().commit()
+
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine
+    bind=engine,
+    class_=TimedSession
 )
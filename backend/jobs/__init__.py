@@ -0,0 +1,17 @@
+# backend/jobs/__init__.py
+"""
+Durable job queue for long-running agent work (OCR, KYC, scoring).
+
+    from backend.jobs import enqueue
+    job = enqueue("scoring", {"app_id": 42}, lane="batch")
+
+Workers: python -m backend.jobs.worker (see worker.py).
+"""
+from backend.jobs.brokers import Job, QueueFull, get_broker
+
+
+def enqueue(task: str, payload: dict, lane: str = "interactive", **kwargs) -> Job:
+    return get_broker().enqueue(task, payload, lane, **kwargs)
+
+
+__all__ = ["Job", "QueueFull", "get_broker", "enqueue"]
@@ -0,0 +1,431 @@
+# backend/jobs/brokers.py
+"""
+Job brokers.
+
+Both brokers implement the same small contract used by the worker:
+
+  enqueue(task, payload, lane)  -> Job      (QueueFull when the lane is at max_depth)
+  reserve(lanes)                -> Job|None (first lane, in order, with a free slot and a ready job)
+  ack(job, result) / fail(job, error) / extend(job, seconds)
+  get(job_id) -> dict|None, stats() -> {lane: {state: count}}
+
+Semantics:
+  - lanes are reserved in the order given (interactive before batch)
+  - a lane never has more than `concurrency` jobs running across ALL workers,
+    so a flood of batch jobs cannot occupy every worker
+  - a reserved job is invisible for `visibility_timeout` seconds; if the
+    worker dies it is redelivered (counts as an attempt)
+  - failures are retried with exponential backoff, then dead-lettered
+  - every reservation gets a token, so a stale worker cannot ack a job
+    that was already redelivered to someone else
+
+SQLiteBroker : single file, no network (local runs / tests)
+RedisBroker  : sorted sets per lane + Lua scripts for atomic reserve
+"""
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+from backend.config import settings
+
+QUEUED, RUNNING, DONE, DEAD = "queued", "running", "done", "dead"
+
+
+class QueueFull(Exception):
+    """Raised by enqueue when a lane is at its max_depth (backpressure)."""
+
+
+class Job:
+    def __init__(self, id: str, task: str, payload: dict, lane: str, attempts: int = 0,
+                 max_attempts: int = 1, token: Optional[str] = None):
+        self.id = id
+        self.task = task
+        self.payload = payload
+        self.lane = lane
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.token = token
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.task}, lane={self.lane}, attempt={self.attempts}/{self.max_attempts})"
+
+
+def _retry_delay(attempts: int) -> float:
+    return settings.JOB_RETRY_BACKOFF * (2 ** max(attempts - 1, 0))
+
+
+# -----------------------
+# SQLite broker
+# -----------------------
+class SQLiteBroker:
+    def __init__(self, path: str, lanes: Dict[str, dict]):
+        self.path = path
+        self.lanes = lanes
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                lane TEXT NOT NULL,
+                task TEXT NOT NULL,
+                payload TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                reserved_until REAL,
+                token TEXT,
+                result TEXT,
+                last_error TEXT,
+                created_at REAL,
+                updated_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_lane_state ON jobs (lane, state, available_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_state_reserved ON jobs (state, reserved_until)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; write paths take BEGIN IMMEDIATE explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def enqueue(self, task: str, payload: dict, lane: str, max_attempts: int = None,
+                delay: float = 0.0) -> Job:
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane {lane}")
+        now = time.time()
+        job = Job(uuid.uuid4().hex, task, payload, lane, 0, max_attempts or settings.JOB_MAX_ATTEMPTS)
+        conn = self._write()
+        try:
+            depth = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE lane = ? AND state IN (?, ?)", (lane, QUEUED, RUNNING)
+            ).fetchone()[0]
+            if depth >= self.lanes[lane]["max_depth"]:
+                raise QueueFull(f"Lane {lane} is full ({depth} jobs)")
+            conn.execute(
+                "INSERT INTO jobs (id, lane, task, payload, state, attempts, max_attempts, available_at,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (job.id, lane, task, json.dumps(payload), QUEUED, job.max_attempts, now + delay, now, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job
+
+    def _redeliver_expired(self, conn, now: float):
+        conn.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,"
+            " token = NULL, last_error = 'visibility timeout', available_at = ?, updated_at = ?"
+            " WHERE state = ? AND reserved_until < ?",
+            (DEAD, QUEUED, now, now, RUNNING, now),
+        )
+
+    def reserve(self, lanes: Iterable[str] = None) -> Optional[Job]:
+        now = time.time()
+        conn = self._write()
+        try:
+            self._redeliver_expired(conn, now)
+            for lane in (lanes or self.lanes):
+                running = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE lane = ? AND state = ?", (lane, RUNNING)
+                ).fetchone()[0]
+                if running >= self.lanes[lane]["concurrency"]:
+                    continue
+                row = conn.execute(
+                    "SELECT id, task, payload, attempts, max_attempts FROM jobs"
+                    " WHERE lane = ? AND state = ? AND available_at <= ?"
+                    " ORDER BY available_at LIMIT 1",
+                    (lane, QUEUED, now),
+                ).fetchone()
+                if row is None:
+                    continue
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET state = ?, attempts = attempts + 1, reserved_until = ?, token = ?,"
+                    " updated_at = ? WHERE id = ?",
+                    (RUNNING, now + settings.JOB_VISIBILITY_TIMEOUT, token, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return Job(row["id"], row["task"], json.loads(row["payload"]), lane,
+                           row["attempts"] + 1, row["max_attempts"], token)
+            conn.execute("COMMIT")
+            return None
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _settle(self, job: Job, sql: str, params: tuple) -> bool:
+        conn = self._write()
+        try:
+            cur = conn.execute(sql + " WHERE id = ? AND token = ? AND state = ?", params + (job.id, job.token, RUNNING))
+            conn.execute("COMMIT")
+            return cur.rowcount == 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def ack(self, job: Job, result=None) -> bool:
+        now = time.time()
+        return self._settle(
+            job, "UPDATE jobs SET state = ?, result = ?, token = NULL, updated_at = ?",
+            (DONE, json.dumps(result, default=str), now),
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        now = time.time()
+        if job.attempts >= job.max_attempts:
+            return self._settle(
+                job, "UPDATE jobs SET state = ?, last_error = ?, token = NULL, updated_at = ?",
+                (DEAD, error, now),
+            )
+        return self._settle(
+            job, "UPDATE jobs SET state = ?, last_error = ?, token = NULL, available_at = ?, updated_at = ?",
+            (QUEUED, error, now + _retry_delay(job.attempts), now),
+        )
+
+    def extend(self, job: Job, seconds: float) -> bool:
+        now = time.time()
+        return self._settle(job, "UPDATE jobs SET reserved_until = ?, updated_at = ?", (now + seconds, now))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        out = {k: row[k] for k in ("id", "lane", "task", "state", "attempts", "max_attempts", "last_error")}
+        out["payload"] = json.loads(row["payload"]) if row["payload"] else None
+        out["result"] = json.loads(row["result"]) if row["result"] else None
+        return out
+
+    def stats(self) -> dict:
+        out = {lane: {QUEUED: 0, RUNNING: 0, DONE: 0, DEAD: 0} for lane in self.lanes}
+        for row in self._conn().execute("SELECT lane, state, COUNT(*) AS n FROM jobs GROUP BY lane, state"):
+            out.setdefault(row["lane"], {})[row["state"]] = row["n"]
+        out["dead_letter"] = sum(lane.get(DEAD, 0) for lane in out.values())
+        return out
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished (done) jobs last updated before `older_than` (epoch seconds)."""
+        conn = self._write()
+        try:
+            cur = conn.execute("DELETE FROM jobs WHERE state = ? AND updated_at < ?", (DONE, older_than))
+            conn.execute("COMMIT")
+            return cur.rowcount
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# -----------------------
+# Redis broker
+# -----------------------
+# KEYS: ready, running     ARGV: now, visibility_timeout, concurrency, prefix, token
+_RESERVE_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local jk = ARGV[4] .. ':job:' .. id
+    local attempts = tonumber(redis.call('HGET', jk, 'attempts') or '0')
+    local max_attempts = tonumber(redis.call('HGET', jk, 'max_attempts') or '1')
+    redis.call('HSET', jk, 'token', '', 'last_error', 'visibility timeout', 'updated_at', ARGV[1])
+    if attempts >= max_attempts then
+        redis.call('HSET', jk, 'state', 'dead')
+        redis.call('RPUSH', ARGV[4] .. ':dead', id)
+    else
+        redis.call('HSET', jk, 'state', 'queued')
+        redis.call('ZADD', KEYS[1], ARGV[1], id)
+    end
+end
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[3]) then
+    return false
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then
+    return false
+end
+local id = ids[1]
+local jk = ARGV[4] .. ':job:' .. id
+redis.call('ZREM', KEYS[1], id)
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), id)
+redis.call('HINCRBY', jk, 'attempts', 1)
+redis.call('HSET', jk, 'state', 'running', 'token', ARGV[5], 'updated_at', ARGV[1])
+return id
+"""
+
+# KEYS: ready, running, job     ARGV: max_depth, id, now, field/value pairs...
+_ENQUEUE_LUA = """
+if redis.call('ZCARD', KEYS[1]) + redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[3], unpack(ARGV, 4))
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+return 1
+"""
+
+# KEYS: job, running, ready, dead     ARGV: id, token, state, available_at, now, ttl, field/value pairs...
+_SETTLE_LUA = """
+if redis.call('HGET', KEYS[1], 'token') ~= ARGV[2] or redis.call('HGET', KEYS[1], 'state') ~= 'running' then
+    return 0
+end
+if ARGV[3] == 'running' then
+    redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+    return 1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HSET', KEYS[1], 'state', ARGV[3], 'token', '', 'updated_at', ARGV[5])
+if #ARGV > 6 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 7))
+end
+if ARGV[3] == 'queued' then
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+elseif ARGV[3] == 'dead' then
+    redis.call('RPUSH', KEYS[4], ARGV[1])
+elseif tonumber(ARGV[6]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[6])
+end
+return 1
+"""
+
+
+class RedisBroker:
+    def __init__(self, redis, lanes: Dict[str, dict], prefix: str = "jobs"):
+        self.redis = redis
+        self.lanes = lanes
+        self.prefix = prefix
+        self._reserve = redis.register_script(_RESERVE_LUA)
+        self._enqueue = redis.register_script(_ENQUEUE_LUA)
+        self._settle_script = redis.register_script(_SETTLE_LUA)
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def enqueue(self, task: str, payload: dict, lane: str, max_attempts: int = None,
+                delay: float = 0.0) -> Job:
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown lane {lane}")
+        now = time.time()
+        job = Job(uuid.uuid4().hex, task, payload, lane, 0, max_attempts or settings.JOB_MAX_ATTEMPTS)
+        fields = {
+            "lane": lane, "task": task, "payload": json.dumps(payload), "state": QUEUED,
+            "attempts": 0, "max_attempts": job.max_attempts, "created_at": now, "updated_at": now,
+        }
+        ok = self._enqueue(
+            keys=[self._key("ready", lane), self._key("running", lane), self._key("job", job.id)],
+            args=[self.lanes[lane]["max_depth"], job.id, now + delay] + [x for kv in fields.items() for x in kv],
+        )
+        if not ok:
+            raise QueueFull(f"Lane {lane} is full")
+        return job
+
+    def reserve(self, lanes: Iterable[str] = None) -> Optional[Job]:
+        now = time.time()
+        for lane in (lanes or self.lanes):
+            token = uuid.uuid4().hex
+            job_id = self._reserve(
+                keys=[self._key("ready", lane), self._key("running", lane)],
+                args=[now, settings.JOB_VISIBILITY_TIMEOUT, self.lanes[lane]["concurrency"], self.prefix, token],
+            )
+            if not job_id:
+                continue
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            h = self._hash(job_id)
+            return Job(job_id, h["task"], json.loads(h["payload"]), lane,
+                       int(h["attempts"]), int(h["max_attempts"]), token)
+        return None
+
+    def _hash(self, job_id: str) -> dict:
+        raw = self.redis.hgetall(self._key("job", job_id))
+        return {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in raw.items()
+        }
+
+    def _settle(self, job: Job, state: str, available_at: float = 0.0, ttl: int = 0, **fields) -> bool:
+        now = time.time()
+        return bool(self._settle_script(
+            keys=[self._key("job", job.id), self._key("running", job.lane),
+                  self._key("ready", job.lane), self._key("dead")],
+            args=[job.id, job.token, state, available_at, now, ttl] + [x for kv in fields.items() for x in kv],
+        ))
+
+    def ack(self, job: Job, result=None) -> bool:
+        return self._settle(job, DONE, ttl=settings.JOB_RESULT_TTL, result=json.dumps(result, default=str))
+
+    def fail(self, job: Job, error: str) -> bool:
+        if job.attempts >= job.max_attempts:
+            return self._settle(job, DEAD, last_error=error)
+        return self._settle(job, QUEUED, available_at=time.time() + _retry_delay(job.attempts), last_error=error)
+
+    def extend(self, job: Job, seconds: float) -> bool:
+        return self._settle(job, RUNNING, available_at=time.time() + seconds)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        h = self._hash(job_id)
+        if not h:
+            return None
+        return {
+            "id": job_id,
+            "lane": h.get("lane"),
+            "task": h.get("task"),
+            "state": h.get("state"),
+            "attempts": int(h.get("attempts", 0)),
+            "max_attempts": int(h.get("max_attempts", 0)),
+            "last_error": h.get("last_error"),
+            "payload": json.loads(h["payload"]) if h.get("payload") else None,
+            "result": json.loads(h["result"]) if h.get("result") else None,
+        }
+
+    def stats(self) -> dict:
+        out = {}
+        for lane in self.lanes:
+            out[lane] = {
+                QUEUED: self.redis.zcard(self._key("ready", lane)),
+                RUNNING: self.redis.zcard(self._key("running", lane)),
+            }
+        out["dead_letter"] = self.redis.llen(self._key("dead"))
+        return out
+
+    def purge(self, older_than: float) -> int:
+        # done jobs expire via JOB_RESULT_TTL
+        return 0
+
+
+# -----------------------
+# Factory
+# -----------------------
+_BROKERS = {}
+_BROKERS_LOCK = threading.Lock()
+
+
+def get_broker(url: str = None):
+    """
+    Shared broker per URL:
+      sqlite:///path/to/jobs.db -> SQLiteBroker
+      redis://...               -> RedisBroker (via get_redis)
+    """
+    url = url or settings.JOB_BROKER_URL
+    with _BROKERS_LOCK:
+        broker = _BROKERS.get(url)
+        if broker is None:
+            if url.startswith("sqlite:///"):
+                broker = SQLiteBroker(url[len("sqlite:///"):], settings.JOB_LANES)
+            elif url.startswith(("redis://", "rediss://", "unix://")):
+                from backend.utils.redis_utils import get_redis
+                broker = RedisBroker(get_redis(url), settings.JOB_LANES)
+            else:
+                raise ValueError(f"Unsupported JOB_BROKER_URL: {url}")
+            _BROKERS[url] = broker
+        return broker
@@ -0,0 +1,96 @@
+# backend/jobs/tasks.py
+"""
+Job tasks run by the worker. Each takes the JSON payload given to enqueue()
+and returns a JSON-able result; raising marks the attempt failed (retried,
+then dead-lettered).
+
+  ocr       : {app_id, doc_type: AADHAAR|PAN, document_hash}   (or a legacy "path")
+  reprocess : {app_id, doc_type, document_hash?}   stored document, latest if no hash
+  kyc       : {app_id, selfie_path?, id_photo_path?}
+  scoring   : {app_id}
+  analytics_sync : {}   append new rows to the analytics snapshot (backend/utils/analytics.py)
+  retention : {max_seconds?}   archive old kyc_data / kyc_results rows (backend/utils/retention.py)
+
+OCR uploads are put in the document store (shared with the worker through
+DOCUMENT_STORE_URL) and stay there. Other uploaded files live in
+JOB_UPLOAD_DIR and are removed once the job succeeds; files of
+dead-lettered jobs are kept for inspection.
+"""
+import os
+
+from backend.agents.document_agent import process_document, reprocess_document
+from backend.agents.kyc_agent import run_kyc_agent
+from backend.agents.scoring_agent import run_scoring_agent
+from backend.utils.ocr_utils import load_document_pages
+from backend.utils.document_store import get_document_store
+from backend.utils.analytics import get_snapshot
+from backend.utils.retention import run_retention
+
+
+def _raise_on_error(result: dict) -> dict:
+    if "error" in result:
+        raise RuntimeError(result.get("details") or result["error"])
+    if result.get("status") == "ERROR":
+        raise RuntimeError(result.get("message") or "agent error")
+    return result
+
+
+def _remove(*paths):
+    for p in paths:
+        if p:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def ocr_task(payload: dict) -> dict:
+    if "document_hash" not in payload:
+        pages = load_document_pages(payload["path"])
+        result = _raise_on_error(process_document(payload["app_id"], payload["doc_type"], pages))
+        _remove(payload["path"])
+        return result
+    store = get_document_store()
+    h = payload["document_hash"]
+    _, pages, _ = store.decode(store.original(h))
+    store.ensure_derivatives(h, pages)
+    return _raise_on_error(process_document(payload["app_id"], payload["doc_type"], pages, document_hash=h))
+
+
+def reprocess_task(payload: dict) -> dict:
+    return _raise_on_error(reprocess_document(payload["app_id"], payload["doc_type"], payload.get("document_hash")))
+
+
+def kyc_task(payload: dict) -> dict:
+    selfie = id_photo = None
+    if payload.get("selfie_path"):
+        with open(payload["selfie_path"], "rb") as f:
+            selfie = f.read()
+    if payload.get("id_photo_path"):
+        with open(payload["id_photo_path"], "rb") as f:
+            id_photo = f.read()
+    result = _raise_on_error(run_kyc_agent(payload["app_id"], selfie=selfie, id_photo=id_photo))
+    _remove(payload.get("selfie_path"), payload.get("id_photo_path"))
+    return result
+
+
+def scoring_task(payload: dict) -> dict:
+    return _raise_on_error(run_scoring_agent(payload["app_id"]))
+
+
+def analytics_sync_task(payload: dict) -> dict:
+    return get_snapshot().sync()
+
+
+def retention_task(payload: dict) -> dict:
+    return run_retention(max_seconds=payload.get("max_seconds"))
+
+
+TASKS = {
+    "ocr": ocr_task,
+    "reprocess": reprocess_task,
+    "kyc": kyc_task,
+    "scoring": scoring_task,
+    "analytics_sync": analytics_sync_task,
+    "retention": retention_task,
+}
@@ -0,0 +1,129 @@
+# backend/jobs/worker.py
+"""
+Job worker.
+
+    python -m backend.jobs.worker                      # JOB_WORKER_PROCESSES processes, all lanes
+    python -m backend.jobs.worker --processes 4 --lanes interactive
+    python -m backend.jobs.worker --burst              # exit once the queues are drained
+
+Each process runs one job at a time (the agents are CPU / tesseract bound).
+Lanes are polled in priority order; per-lane concurrency is enforced by the
+broker across all processes. While a job runs, a heartbeat thread extends its
+visibility timeout so long OCR jobs are not redelivered. SIGTERM / SIGINT
+stop after the current job.
+"""
+import time
+import signal
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Iterable, Optional
+
+from backend.config import settings
+from backend.jobs.brokers import get_broker
+
+logger = logging.getLogger("backend.jobs.worker")
+
+
+def _heartbeat(broker, job, stop: threading.Event):
+    interval = max(settings.JOB_VISIBILITY_TIMEOUT / 3.0, 1.0)
+    while not stop.wait(interval):
+        if not broker.extend(job, settings.JOB_VISIBILITY_TIMEOUT):
+            return          # lost the reservation (redelivered / settled)
+
+
+def run_job(broker, job, tasks: dict) -> bool:
+    """Execute one reserved job and ack / fail it. Returns True on success."""
+    task = tasks.get(job.task)
+    stop = threading.Event()
+    hb = threading.Thread(target=_heartbeat, args=(broker, job, stop), daemon=True)
+    hb.start()
+    try:
+        if task is None:
+            raise KeyError(f"Unknown task {job.task}")
+        result = task(job.payload)
+    except Exception as e:
+        stop.set()
+        logger.warning("job %s failed (attempt %d/%d): %s", job.id, job.attempts, job.max_attempts, e)
+        broker.fail(job, f"{e.__class__.__name__}: {e}")
+        return False
+    stop.set()
+    broker.ack(job, result)
+    return True
+
+
+def run_worker(lanes: Optional[Iterable[str]] = None, burst: bool = False,
+               stop: Optional[threading.Event] = None, broker=None):
+    """
+    Reserve / run jobs until stopped. burst=True returns once nothing is ready.
+    Returns the number of jobs processed.
+    """
+    from backend.jobs.tasks import TASKS
+
+    broker = broker or get_broker()
+    lanes = list(lanes or settings.JOB_LANES)
+    stop = stop or threading.Event()
+    processed = 0
+    last_purge = 0.0
+    while not stop.is_set():
+        now = time.time()
+        if now - last_purge > 600:
+            broker.purge(now - settings.JOB_RESULT_TTL)
+            last_purge = now
+
+        job = broker.reserve(lanes)
+        if job is None:
+            if burst:
+                break
+            stop.wait(settings.JOB_POLL_INTERVAL)
+            continue
+        run_job(broker, job, TASKS)
+        processed += 1
+    return processed
+
+
+def _process_main(lanes, burst):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    n = run_worker(lanes, burst=burst, stop=stop)
+    logger.info("worker exiting after %d jobs", n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run job workers")
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--lanes", default=",".join(settings.JOB_LANES),
+                        help="comma-separated lanes in priority order")
+    parser.add_argument("--burst", action="store_true", help="exit when no job is ready")
+    args = parser.parse_args(argv)
+
+    lanes = [l.strip() for l in args.lanes.split(",") if l.strip()]
+    unknown = [l for l in lanes if l not in settings.JOB_LANES]
+    if unknown:
+        parser.error(f"unknown lanes {unknown}")
+
+    if args.processes <= 1:
+        _process_main(lanes, args.burst)
+        return
+
+    procs = [
+        multiprocessing.Process(target=_process_main, args=(lanes, args.burst), name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    # children get SIGINT from the terminal themselves; forward SIGTERM
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in procs if p.is_alive()])
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,52 @@
-from fastapi import FastAPI
+import time
+_IMPORT_T0 = time.perf_counter()
 
-from backend.routers import intake, ocr, kyc
-from backend.models.db_models import Base
-from backend.database import engine
-app = FastAPI(title="Agentic Lending System")
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 
-# create tables
-Base.metadata.create_all(bind=engine)
+from backend.routers import intake, ocr, kyc, scoring, fraud, pipeline, jobs, admin, analytics
+from backend.utils.metrics import MetricsMiddleware, render_metrics, CONTENT_TYPE
+from backend.utils.admission import AdmissionMiddleware
+from backend.utils.profiling import ProfilingMiddleware
+from backend import startup
+
+# schema: `alembic upgrade head` (checked by the warmup, see backend/startup.py);
+# agents load lazily and are preloaded by the warmup before /ready reports ready
+app = FastAPI(title="Agentic Lending System", lifespan=startup.lifespan)
+
+# load shedding: per-client rate limits, per-class concurrency (innermost, so
+# rejections still show up in the latency histograms and profiles)
+app.add_middleware(AdmissionMiddleware)
+# per-route latency histograms (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+# on-demand request profiles (X-Profile header, GET /admin/profiles)
+app.add_middleware(ProfilingMiddleware)
 
 # routers
 app.include_router(intake.router)
 app.include_router(ocr.router)
 app.include_router(kyc.router)
+app.include_router(scoring.router)
+app.include_router(fraud.router)
+app.include_router(pipeline.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 def root():
     return {"message": "Agentic Lending API is running"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    body = startup.readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+startup.record_import("backend.main", _IMPORT_T0)
@@ -1,6 +1,6 @@
 # backend/models/db_models.py
 from sqlalchemy import (
-    Column, Integer, String, Float, Date, DateTime, Text
+    Column, Integer, String, Float, Date, DateTime, Text, Boolean, LargeBinary, UniqueConstraint
 )
 from sqlalchemy.orm import declarative_base
 import datetime
@@ -13,16 +13,18 @@ class Application(Base):
     app_id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     dob = Column(Date)
-    phone = Column(String)
-    email = Column(String)
-    aadhaar = Column(String)
-    pan = Column(String)
+    phone = Column(String, index=True)
+    email = Column(String, index=True)
+    aadhaar = Column(String, index=True)
+    pan = Column(String, index=True)
     address = Column(Text)
     income = Column(Integer)
     loan_amount = Column(Integer)
     loan_tenure = Column(Integer)
-    created_at = Column(DateTime, default=datetime.datetime.now)
+    created_at = Column(DateTime, default=datetime.datetime.now, index=True)
     status = Column(String, default="PENDING")
+    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now,
+                        index=True)   # analytics watermark (corrections, status changes)
 
 
 # 2) OCR output
@@ -39,6 +41,8 @@ class KYCData(Base):
     extracted_address = Column(Text)
 
     ocr_confidence = Column(Float)
+    document_hash = Column(String, index=True)   # sha256 of the upload in the document store
+    doc_type = Column(String)             # AADHAAR / PAN (the agent that wrote the snapshot)
     updated_at = Column(DateTime, default=datetime.datetime.now)
 
 
@@ -49,4 +53,98 @@ class KYCResult(Base):
     app_id = Column(Integer, index=True)
     kyc_status = Column(String)
     failed_fields = Column(Text)
+    updated_at = Column(DateTime, default=datetime.datetime.now, index=True)   # analytics watermark
+
+
+# 4) Credit scoring output (sanctioned amount / rate chosen by the optimiser)
+class CreditScore(Base):
+    __tablename__ = "credit_scores"
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    model_score = Column(Float)
+    approval_status = Column(String)        # APPROVED / REJECTED / MANUAL
+    sanctioned_amount = Column(Integer)
+    sanctioned_tenure = Column(Integer)
+    interest_rate = Column(Float)
+    shap_top_features = Column(Text)        # JSON string (JSONB in Postgres schema)
+    updated_at = Column(DateTime, default=datetime.datetime.now, index=True)   # analytics watermark
+
+
+# 5) Document forensics / fraud signals
+class FraudCheck(Base):
+    __tablename__ = "fraud_checks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    doc_type = Column(String)               # AADHAAR / PAN
+    fraud_score = Column(Float)
+    blur_level = Column(Float)              # Laplacian variance (higher = sharper)
+    tamper_detected = Column(Boolean)
+    signals = Column(Text)                  # JSON string with per-check scores
+    fraud_status = Column(String)           # PASS / FAIL / MANUAL
+    updated_at = Column(DateTime, default=datetime.datetime.now)
+
+
+# 6) Face match + ID match checks
+class KYCCheck(Base):
+    __tablename__ = "kyc_checks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    face_match_score = Column(Float)
+    liveness_score = Column(Float)
+    name_match = Column(Boolean)
+    dob_match = Column(Boolean)
+    kyc_status = Column(String)             # PASS / FAIL / MANUAL
+    updated_at = Column(DateTime, default=datetime.datetime.now)
+
+
+# 7) Face embeddings (cache by image hash + source for the face-reuse index)
+class FaceEmbedding(Base):
+    __tablename__ = "face_embeddings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    image_hash = Column(String, index=True)
+    kind = Column(String)                   # SELFIE / ID_PHOTO
+    embedding = Column(LargeBinary)         # float32 bytes, NULL if no face found
+    created_at = Column(DateTime, default=datetime.datetime.now)
+
+
+# 8) Final decision + explanation agent output
+class Decision(Base):
+    __tablename__ = "decisions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    final_status = Column(String)           # APPROVED / REJECTED / MANUAL
+    explanation = Column(Text)
+    updated_at = Column(DateTime, default=datetime.datetime.now)
+
+
+# 9) Idempotency keys: stored responses for retried POSTs (/apply, /agent/ocr/both)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # sha256(endpoint + client key or payload)
+    endpoint = Column(String)
+    request_hash = Column(String)           # payload fingerprint, detects key reuse
+    state = Column(String)                  # IN_PROGRESS / COMPLETED
+    status_code = Column(Integer)
+    response = Column(Text)                 # JSON body
+    created_at = Column(DateTime, default=datetime.datetime.now)
+    expires_at = Column(DateTime, index=True)
+
+
+# 10) Stage results keyed by an input fingerprint (incremental re-evaluation)
+class StageResult(Base):
+    __tablename__ = "stage_results"
+    __table_args__ = (UniqueConstraint("app_id", "stage", name="uq_stage_results_app_stage"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    app_id = Column(Integer, index=True)
+    stage = Column(String)                  # ocr_aadhaar / ocr_pan / face / kyc / fraud / scoring / explanation
+    fingerprint = Column(String)            # sha256 of the stage inputs
+    result = Column(Text)                   # JSON
     updated_at = Column(DateTime, default=datetime.datetime.now)
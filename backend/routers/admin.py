@@ -0,0 +1,93 @@
+# backend/routers/admin.py
+import os
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from backend.config import settings
+from backend.utils.profiling import PROFILE_ID, list_profiles, sample_rate, set_sample_rate
+from backend.utils.admission import admission_stats
+from backend.utils.lazy import lazy_module
+
+retention = lazy_module("backend.utils.retention")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if settings.ADMIN_TOKEN and x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Personal data: refused unless ADMIN_TOKEN is configured and sent."""
+    if not settings.ADMIN_TOKEN or x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+class SamplingUpdate(BaseModel):
+    rate: Optional[float] = None       # None restores settings.PROFILE_SAMPLE_RATE
+
+
+@router.get("/profiles")
+def recent_profiles(limit: int = 50):
+    """
+    Most recent request profiles (newest first) with duration and time per
+    category (ocr_subprocess / pil / db / loop_wait / python).
+    Profile a request by sending `X-Profile: 1` (or ADMIN_TOKEN) or `?profile=1`.
+    """
+    return {"sample_rate": sample_rate(), "profiles": list_profiles(limit)}
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, format: str = "speedscope"):
+    """format: speedscope (open in speedscope.app), collapsed (flamegraph.pl) or summary."""
+    ext = {"speedscope": ".speedscope.json", "collapsed": ".collapsed", "summary": ".json"}.get(format)
+    if ext is None:
+        raise HTTPException(status_code=422, detail="format must be speedscope, collapsed or summary")
+    if not PROFILE_ID.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = os.path.join(settings.PROFILE_DIR, profile_id + ext)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media = "text/plain" if format == "collapsed" else "application/json"
+    return FileResponse(path, media_type=media, filename=os.path.basename(path))
+
+
+@router.put("/profiles/sampling")
+def update_sampling(update: SamplingUpdate):
+    """Change the random profiling rate for all workers without a restart."""
+    if update.rate is not None and not 0.0 <= update.rate <= 1.0:
+        raise HTTPException(status_code=422, detail="rate must be between 0 and 1")
+    set_sample_rate(update.rate)
+    return {"sample_rate": sample_rate()}
+
+
+@router.get("/admission")
+def admission():
+    """Live admission-control state of this worker: in flight, queued, estimated wait per class."""
+    return admission_stats()
+
+
+@router.get("/retention")
+def retention_status():
+    """Retention cursor, rows archived and archive size per table."""
+    return retention.retention_status()
+
+
+@router.get("/audit/{app_id}/{table}", dependencies=[Depends(require_admin_token)])
+def audit_history(app_id: int, table: str, since: Optional[date] = None, until: Optional[date] = None,
+                  include_archive: bool = True):
+    """
+    Full kyc_data / kyc_results history of an application, live rows and
+    archived ones ("archived": true) merged in id order. until is exclusive.
+    Needs ADMIN_TOKEN (403 while it is unset) and goes through admission control.
+    """
+    try:
+        rows = retention.kyc_history(app_id, table, since=since, until=until, include_archive=include_archive)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"app_id": app_id, "table": table, "count": len(rows), "rows": rows}
@@ -0,0 +1,93 @@
+# backend/routers/analytics.py
+"""
+Portfolio analytics for the risk dashboards, served from the columnar
+snapshot (backend/utils/analytics.py), never from the live tables.
+Refresh the snapshot with POST /jobs/analytics-sync.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from backend.utils.lazy import lazy_module
+
+analytics = lazy_module("backend.utils.analytics")
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+class AnalyticsQuery(BaseModel):
+    table: str
+    by: List[str] = []                          # columns and / or "day" / "month" / "year"
+    aggs: Dict[str, List[Any]] = {"count": ["count"]}   # name -> [op, column, arg]
+    since: Optional[date] = None
+    until: Optional[date] = None
+    latest_by: Optional[str] = None             # e.g. "app_id": newest row per application
+    where: Dict[str, Any] = {}
+
+
+def _period(period: Optional[str]) -> Optional[str]:
+    if period is not None and period not in analytics.PERIODS:
+        raise HTTPException(status_code=422, detail=f"period must be one of {sorted(analytics.PERIODS)}")
+    return period
+
+
+async def _run(fn, *args, **kwargs):
+    try:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/status")
+def status():
+    """Rows, watermark and size of each snapshot table."""
+    return analytics.get_snapshot().status()
+
+
+@router.get("/approval-rates")
+async def approval_rates(period: Optional[str] = "month", since: Optional[date] = None,
+                         until: Optional[date] = None):
+    """Approved / manual / rejected share of the latest credit score per application."""
+    snap = analytics.get_snapshot()
+    return {"rows": await _run(snap.approval_rates, _period(period), since, until)}
+
+
+@router.get("/kyc-failures")
+async def kyc_failures(period: Optional[str] = None, since: Optional[date] = None,
+                       until: Optional[date] = None):
+    """How often each field fails KYC (latest KYC run per application)."""
+    snap = analytics.get_snapshot()
+    return {"rows": await _run(snap.kyc_failures, _period(period), since, until)}
+
+
+@router.get("/distribution")
+async def distribution(column: str = "income", table: str = "applications", bins: int = 20,
+                       period: Optional[str] = None, since: Optional[date] = None,
+                       until: Optional[date] = None):
+    """Histogram and quantiles of a numeric column (income, loan_amount, sanctioned_amount, ...)."""
+    if not 1 <= bins <= 200:
+        raise HTTPException(status_code=422, detail="bins must be between 1 and 200")
+    snap = analytics.get_snapshot()
+    by = (_period(period),) if period else ()
+    latest = "app_id" if table in ("credit_scores", "kyc_results") else None
+    hist = await _run(snap.histogram, table, column, bins, None, by, since, until, latest)
+    quantiles = await _run(snap.query, table, by, {
+        "n": ("count",),
+        "mean": ("mean", column),
+        "p10": ("quantile", column, 0.1),
+        "p50": ("quantile", column, 0.5),
+        "p90": ("quantile", column, 0.9),
+    }, since, until, latest)
+    return {"table": table, "column": column, "histogram": hist, "summary": quantiles}
+
+
+@router.post("/query")
+async def query(q: AnalyticsQuery):
+    """Group-by aggregate over one snapshot table (ops: count, sum, mean, min, max, quantile, share)."""
+    snap = analytics.get_snapshot()
+    rows = await _run(snap.query, q.table, tuple(q.by), {k: tuple(v) for k, v in q.aggs.items()},
+                      q.since, q.until, q.latest_by, q.where)
+    return {"rows": rows}
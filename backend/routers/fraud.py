@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request
+from backend.utils.lazy import lazy_module
+
+fraud_agent = lazy_module("backend.agents.fraud_agent")
+
+router = APIRouter(prefix="/agent/fraud", tags=["Fraud"])
+
+
+def _client(request: Request):
+    return request.client.host if request.client else None
+
+@router.post("/")
+def fraud_process(app_id: int, request: Request):
+    return fraud_agent.run_fraud_agent(app_id, client=_client(request))
+
+@router.get("/identity")
+def identity_reuse(app_id: int):
+    return fraud_agent.run_identity_checks(app_id)
+
+@router.get("/velocity")
+def velocity(app_id: int, request: Request):
+    return fraud_agent.run_velocity_checks(app_id, client=_client(request))
@@ -1,14 +1,20 @@
 # backend/routers/intake.py
-from fastapi import APIRouter, HTTPException
-from backend.schemas.request_schemas import ApplicationRequest
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from backend.schemas.request_schemas import ApplicationRequest, ApplicationUpdate
 from backend.database import SessionLocal
 from backend.models.db_models import Application
+from backend.utils.idempotency import run_idempotent, fingerprint
+from backend.utils.lazy import lazy_module
+
+fraud_agent = lazy_module("backend.agents.fraud_agent")
+incremental = lazy_module("orchestrator.incremental")
 
 router = APIRouter(prefix="/apply", tags=["Application"])
 
 
-@router.post("/", status_code=201)
-def apply(req: ApplicationRequest):
+def _create_application(req: ApplicationRequest, client: Optional[str]):
     db = SessionLocal()
     try:
         # req.dob is already datetime.date (validator handled parsing)
@@ -29,6 +35,17 @@ def apply(req: ApplicationRequest):
         db.commit()
         db.refresh(app)
 
+        # keep the identity-reuse index and velocity counters current
+        # (never fail intake on them)
+        try:
+            fraud_agent.index_application(app, db)
+        except Exception:
+            pass
+        try:
+            fraud_agent.record_application_velocity(app, client=client)
+        except Exception:
+            pass
+
         return {"application_id": app.app_id, "status": "Application Received"}
 
     except Exception as e:
@@ -37,3 +54,56 @@ def apply(req: ApplicationRequest):
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
     finally:
         db.close()
+
+
+@router.post("/", status_code=201)
+async def apply(req: ApplicationRequest, request: Request, idempotency_key: Optional[str] = Header(None)):
+    """
+    Create an application. Retries with the same Idempotency-Key (or the same
+    body when no key is sent) return the original response instead of a new row.
+    """
+    client = request.client.host if request.client else None
+    return await run_idempotent(
+        "apply", idempotency_key, fingerprint(req),
+        lambda: run_in_threadpool(_create_application, req, client),
+        status_code=201,
+    )
+
+
+def _apply_correction(app_id: int, changes: dict) -> list:
+    db = SessionLocal()
+    try:
+        app = db.query(Application).filter(Application.app_id == app_id).first()
+        if app is None:
+            raise HTTPException(status_code=404, detail="Invalid application ID")
+        if "aadhaar_number" in changes:
+            changes["aadhaar"] = changes.pop("aadhaar_number")
+
+        changed = [field for field, value in changes.items() if getattr(app, field) != value]
+        for field in changed:
+            setattr(app, field, changes[field])
+        if changed:
+            db.commit()
+            db.refresh(app)
+            if {"name", "address", "phone", "email", "aadhaar", "pan"} & set(changed):
+                try:
+                    fraud_agent.reindex_application(app, db)
+                except Exception:
+                    pass
+        return changed
+    finally:
+        db.close()
+
+
+@router.patch("/{app_id}")
+async def correct_application(app_id: int, update: ApplicationUpdate):
+    """
+    Correct application fields, then re-evaluate only the stages whose
+    inputs changed (see orchestrator/incremental.py).
+    """
+    changed = await run_in_threadpool(_apply_correction, app_id, update.dict(exclude_unset=True))
+    return {
+        "application_id": app_id,
+        "changed_fields": changed,
+        "reevaluation": await incremental.reevaluate(app_id),
+    }
@@ -0,0 +1,146 @@
+# backend/routers/jobs.py
+import os
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.jobs import enqueue, get_broker, QueueFull
+from backend.utils.lazy import lazy_module
+
+ocr_utils = lazy_module("backend.utils.ocr_utils")
+document_store = lazy_module("backend.utils.document_store")
+fraud_agent = lazy_module("backend.agents.fraud_agent")
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _save(upload: UploadFile) -> str:
+    return os.path.abspath(ocr_utils.save_temp_upload(upload, dir=settings.JOB_UPLOAD_DIR))
+
+
+def _enqueue_all(jobs, lane: str, paths=()):
+    """
+    Enqueue (task, payload) pairs; on a full lane answer 503 so callers back off.
+    Uploads of jobs that were not accepted are removed.
+    """
+    if lane not in settings.JOB_LANES:
+        raise HTTPException(status_code=422, detail=f"Unknown lane {lane}")
+    accepted = []
+    try:
+        for task, payload in jobs:
+            accepted.append(enqueue(task, payload, lane=lane))
+    except QueueFull as e:
+        kept = {v for job in accepted for v in job.payload.values()}
+        for p in paths:
+            if p not in kept:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {
+        "lane": lane,
+        "jobs": [{"job_id": job.id, "task": job.task, "doc_type": job.payload.get("doc_type")}
+                 for job in accepted],
+    }
+
+
+@router.post("/ocr", status_code=202)
+async def enqueue_ocr(
+    app_id: int = Form(...),
+    lane: str = Form("interactive"),
+    aadhaar_document: Optional[UploadFile] = File(None),
+    pan_document: Optional[UploadFile] = File(None),
+):
+    """
+    Queue Aadhaar / PAN OCR (plus forensics) for a worker. Poll GET /jobs/{job_id}.
+    The upload goes to the document store; the worker writes its derivatives.
+    """
+    if not (aadhaar_document or pan_document):
+        raise HTTPException(status_code=422, detail="Provide at least aadhaar_document or pan_document")
+    store = document_store.get_document_store()
+    jobs = []
+    for doc_type, upload in (("AADHAAR", aadhaar_document), ("PAN", pan_document)):
+        if upload:
+            meta = await run_in_threadpool(store.put, await upload.read(), None, False, upload.filename)
+            jobs.append(("ocr", {"app_id": app_id, "doc_type": doc_type, "document_hash": meta["hash"]}))
+    queued = _enqueue_all(jobs, lane)
+    # same upload counter as /agent/ocr/both; never fail the enqueue on it
+    try:
+        fraud_agent.record_upload_velocity(app_id, uploads=len(queued["jobs"]))
+    except Exception:
+        logger.exception("recording upload velocity failed")
+    return queued
+
+
+@router.post("/reprocess", status_code=202)
+def enqueue_reprocess(
+    app_id: int = Form(...),
+    doc_type: Optional[str] = Form(None),
+    document_hash: Optional[str] = Form(None),
+    lane: str = Form("batch"),
+):
+    """
+    Re-run OCR + forensics on documents already in the document store (no
+    re-upload): the given document_hash, else the latest of each type.
+    """
+    if doc_type is not None and doc_type not in ("AADHAAR", "PAN"):
+        raise HTTPException(status_code=422, detail="doc_type must be AADHAAR or PAN")
+    if document_hash is not None and doc_type is None:
+        raise HTTPException(status_code=422, detail="doc_type is required with document_hash")
+    doc_types = [doc_type] if doc_type else ["AADHAAR", "PAN"]
+    jobs = [("reprocess", {"app_id": app_id, "doc_type": d, "document_hash": document_hash}) for d in doc_types]
+    return _enqueue_all(jobs, lane)
+
+
+@router.post("/kyc", status_code=202)
+async def enqueue_kyc(
+    app_id: int = Form(...),
+    lane: str = Form("interactive"),
+    selfie: Optional[UploadFile] = File(None),
+    id_document: Optional[UploadFile] = File(None),
+):
+    payload, paths = {"app_id": app_id}, []
+    if selfie:
+        payload["selfie_path"] = _save(selfie)
+        paths.append(payload["selfie_path"])
+    if id_document:
+        payload["id_photo_path"] = _save(id_document)
+        paths.append(payload["id_photo_path"])
+    return _enqueue_all([("kyc", payload)], lane, paths)
+
+
+@router.post("/scoring", status_code=202)
+def enqueue_scoring(app_id: int = Form(...), lane: str = Form("interactive")):
+    return _enqueue_all([("scoring", {"app_id": app_id})], lane)
+
+
+@router.post("/analytics-sync", status_code=202)
+def enqueue_analytics_sync(lane: str = Form("batch")):
+    """Append new applications / KYC results / credit scores to the analytics snapshot."""
+    return _enqueue_all([("analytics_sync", {})], lane)
+
+
+@router.post("/retention", status_code=202)
+def enqueue_retention(max_seconds: Optional[float] = Form(None), lane: str = Form("batch")):
+    """Archive kyc_data / kyc_results rows beyond the newest RETENTION_KEEP per application."""
+    if max_seconds is not None and not 0 < max_seconds < settings.JOB_VISIBILITY_TIMEOUT:
+        raise HTTPException(status_code=422, detail="max_seconds must be between 0 and JOB_VISIBILITY_TIMEOUT")
+    return _enqueue_all([("retention", {"max_seconds": max_seconds})], lane)
+
+
+@router.get("/stats")
+def job_stats():
+    return get_broker().stats()
+
+
+@router.get("/{job_id}")
+def job_status(job_id: str):
+    job = get_broker().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,8 +1,24 @@
-from fastapi import APIRouter
-from backend.agents.kyc_agent import run_kyc_agent
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from backend.utils.lazy import lazy_module
+
+kyc_agent = lazy_module("backend.agents.kyc_agent")
 
 router = APIRouter(prefix="/agent/kyc", tags=["KYC"])
 
 @router.post("/")
-def kyc_process(app_id: int):
-    return run_kyc_agent(app_id)
+async def kyc_process(
+    app_id: int,
+    selfie: Optional[UploadFile] = File(None),
+    id_document: Optional[UploadFile] = File(None),
+):
+    """
+    KYC decision. Optional selfie + ID-card image enable face match and
+    face-reuse checks. Without an ID image the selfie is matched against the
+    Aadhaar card page of the latest OCR upload (face_match_score is null
+    when either image has no face).
+    """
+    selfie_bytes = await selfie.read() if selfie else None
+    id_bytes = await id_document.read() if id_document else None
+    return await run_in_threadpool(kyc_agent.run_kyc_agent, app_id, selfie_bytes, id_bytes)
@@ -1,30 +1,109 @@
 # backend/routers/ocr.py
-import os
-import shutil
-import tempfile
-from fastapi import APIRouter, UploadFile, File, Form
+import asyncio
+import logging
+import contextvars
+from functools import partial
+from fastapi import APIRouter, UploadFile, File, Form, Header
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 
-from backend.agents.aadhar_agent import run_aadhaar_ocr_agent
-from backend.agents.pan_agent import run_pan_ocr_agent
+from backend.database import SessionLocal
+from backend.models.db_models import Application
+from backend.utils.idempotency import run_idempotent, fingerprint
+from backend.utils.metrics import with_doc_type
+from backend.utils.lazy import lazy_module
+
+aadhar_agent = lazy_module("backend.agents.aadhar_agent")
+pan_agent = lazy_module("backend.agents.pan_agent")
+fraud_agent = lazy_module("backend.agents.fraud_agent")
+ocr_utils = lazy_module("backend.utils.ocr_utils")
+document_store = lazy_module("backend.utils.document_store")
 
 router = APIRouter(prefix="/agent/ocr", tags=["OCR Agents"])
+logger = logging.getLogger(__name__)
+
+# intake fields the agents match OCR output against (compare_with_intake)
+MATCHED_FIELDS = ("name", "dob", "aadhaar", "pan", "address")
+
+
+def _matched_intake(app_id: int) -> Optional[list]:
+    db = SessionLocal()
+    try:
+        app = db.query(Application).filter(Application.app_id == app_id).first()
+        return [getattr(app, f) for f in MATCHED_FIELDS] if app else None
+    finally:
+        db.close()
+
+
+def _in_pool(pool, fn, *args):
+    """run_in_executor that carries the request's contextvars (profiling) into the worker."""
+    run = contextvars.copy_context().run
+    return asyncio.get_running_loop().run_in_executor(pool, partial(run, fn, *args))
+
+
+async def _process_document(app_id: int, doc_type: str, data: bytes, agent):
+    """
+    Decode once (a document already in the store is read back, not
+    rasterised again), gate on blur, then run OCR and pixel forensics in
+    parallel on the same in-memory page. Field forensics reuse the OCR word
+    boxes. The upload and its derivatives are stored alongside.
+    """
+    pool = ocr_utils.OCR_POOL
+    store = document_store.get_document_store()
+    digest, pages, _ = await _in_pool(pool, with_doc_type, doc_type, store.decode, data)
+    stored = _in_pool(pool, with_doc_type, doc_type, store.put, data, pages)
+    try:
+        result = await _analyse_document(app_id, doc_type, pages, agent, digest)
+    finally:
+        await _stored(stored)
+    result["document_hash"] = digest
+    return result
+
+
+async def _analyse_document(app_id: int, doc_type: str, pages, agent, digest: str):
+    pool = ocr_utils.OCR_POOL
+    blur = await _in_pool(pool, with_doc_type, doc_type, fraud_agent.check_blur, pages[0])
+
+    if blur["too_blurry"]:
+        # short-circuit: no point running tesseract on an unreadable card
+        summary = fraud_agent.summarise_forensics(blur, None, None)
+        await _save_fraud_check(app_id, doc_type, summary)
+        return {
+            "kyc_status": "REJECTED",
+            "message": "Document too blurry to OCR, please re-upload",
+            "match_results": {"failed_fields": ["blur"]},
+            "forensics": summary,
+        }
 
+    artifacts = {}
+    result, image_checks = await asyncio.gather(
+        _in_pool(pool, partial(agent, app_id, pages=pages, artifacts=artifacts, document_hash=digest)),
+        _in_pool(pool, with_doc_type, doc_type, fraud_agent.run_image_forensics, pages[0]),
+    )
+    field_checks = await _in_pool(
+        pool, with_doc_type, doc_type, fraud_agent.run_field_forensics, artifacts.get("image"), artifacts.get("word_data")
+    )
+    summary = fraud_agent.summarise_forensics(blur, image_checks, field_checks)
+    await _save_fraud_check(app_id, doc_type, summary)
 
-def _save_temp_upload(upload: UploadFile) -> str:
-    """Save UploadFile to a temporary file and return its path."""
-    suffix = os.path.splitext(upload.filename)[1] or ".png"
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    result["forensics"] = summary
+    return result
+
+
+async def _save_fraud_check(app_id: int, doc_type: str, summary: dict):
+    """The KYCData snapshot is already saved: a failed fraud row is logged, not returned as an error."""
     try:
-        with tmp as f:
-            shutil.copyfileobj(upload.file, f)
-        return tmp.name
+        await _in_pool(None, fraud_agent.save_fraud_check, app_id, doc_type, summary)
     except Exception:
-        try:
-            os.unlink(tmp.name)
-        except Exception:
-            pass
-        raise
+        logger.exception("saving fraud check failed")
+
+
+async def _stored(put):
+    """A document store failure never fails the OCR result."""
+    try:
+        await put
+    except Exception:
+        logger.exception("document store put failed")
 
 
 @router.post("/both")
@@ -32,6 +111,7 @@ async def ocr_both(
     app_id: int = Form(...),
     aadhaar_document: Optional[UploadFile] = File(None),
     pan_document: Optional[UploadFile] = File(None),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
     Run Aadhaar agent and PAN agent (if corresponding file provided).
@@ -41,55 +121,69 @@ async def ocr_both(
       - pan_document (file) optional
 
     Returns combined JSON with keys 'aadhaar' and 'pan' (only present if ran).
+    Both documents are processed concurrently; each result carries a
+    'forensics' block (blur / tamper checks).
+
+    Retries with the same Idempotency-Key (or the same app_id + file bytes)
+    wait for / replay the first run instead of OCR-ing again. The intake
+    values matched against are part of the fingerprint, so after a PATCH
+    /apply correction the same upload is matched again.
     """
+    if not (aadhaar_document or pan_document):
+        return {"error": "No documents provided. Provide at least aadhaar_document or pan_document."}
+
+    aadhaar_data = await aadhaar_document.read() if aadhaar_document else None
+    pan_data = await pan_document.read() if pan_document else None
+    intake = await run_in_threadpool(_matched_intake, app_id)
+    if intake is None:
+        return {"error": "Invalid application ID"}
+    request_hash = fingerprint(app_id, aadhaar_data and fingerprint(aadhaar_data), pan_data and fingerprint(pan_data),
+                               intake)
+    return await run_idempotent(
+        "ocr_both", idempotency_key, request_hash,
+        lambda: _ocr_both(app_id, aadhaar_data, pan_data),
+        store_if=lambda body: not any("error" in r for r in body["results"].values()),
+    )
 
-    results = {}
-    temp_paths = []
 
+async def _ocr_both(app_id: int, aadhaar_data: Optional[bytes], pan_data: Optional[bytes]):
+    results = {}
+    # never fail the OCR request on the velocity counters
     try:
-        # Aadhaar
-        if aadhaar_document:
-            aadhaar_path = _save_temp_upload(aadhaar_document)
-            temp_paths.append(aadhaar_path)
-            aadhaar_res = run_aadhaar_ocr_agent(app_id, aadhaar_path)
-            results["aadhaar"] = aadhaar_res
-
-        # PAN
-        if pan_document:
-            pan_path = _save_temp_upload(pan_document)
-            temp_paths.append(pan_path)
-            pan_res = run_pan_ocr_agent(app_id, pan_path)
-            results["pan"] = pan_res
-
-        if not (aadhaar_document or pan_document):
-            return {"error": "No documents provided. Provide at least aadhaar_document or pan_document."}
-
-        # Decide combined KYC status optionally (simple aggregator)
-        # If both present, both must be APPROVED -> overall APPROVED, else REJECTED.
-        # If only one agent present, use that agent's status.
-        overall = {}
-        statuses = []
-        if "aadhaar" in results and isinstance(results["aadhaar"], dict) and "kyc_status" in results["aadhaar"]:
-            statuses.append(results["aadhaar"]["kyc_status"])
-        if "pan" in results and isinstance(results["pan"], dict) and "kyc_status" in results["pan"]:
-            statuses.append(results["pan"]["kyc_status"])
-
-        if statuses:
-            if all(s == "APPROVED" for s in statuses):
-                overall_status = "APPROVED"
-            else:
-                overall_status = "REJECTED"
-            overall["combined_kyc_status"] = overall_status
-            overall["individual_statuses"] = statuses
-        else:
-            overall["combined_kyc_status"] = "UNKNOWN"
+        fraud_agent.record_upload_velocity(app_id, uploads=int(aadhaar_data is not None) + int(pan_data is not None))
+    except Exception:
+        logger.exception("recording upload velocity failed")
 
-        return {"results": results, "overall": overall}
+    jobs = {}
+    if aadhaar_data is not None:
+        jobs["aadhaar"] = _process_document(app_id, "AADHAAR", aadhaar_data, aadhar_agent.run_aadhaar_ocr_agent)
+    if pan_data is not None:
+        jobs["pan"] = _process_document(app_id, "PAN", pan_data, pan_agent.run_pan_ocr_agent)
 
-    finally:
-        # cleanup temp files
-        for p in temp_paths:
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+    outputs = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    for key, out in zip(jobs.keys(), outputs):
+        if isinstance(out, Exception):
+            out = {"error": f"Internal error processing {key} document", "details": str(out)}
+        results[key] = out
+
+    # Decide combined KYC status optionally (simple aggregator)
+    # If both present, both must be APPROVED -> overall APPROVED, else REJECTED.
+    # If only one agent present, use that agent's status.
+    overall = {}
+    statuses = []
+    if "aadhaar" in results and isinstance(results["aadhaar"], dict) and "kyc_status" in results["aadhaar"]:
+        statuses.append(results["aadhaar"]["kyc_status"])
+    if "pan" in results and isinstance(results["pan"], dict) and "kyc_status" in results["pan"]:
+        statuses.append(results["pan"]["kyc_status"])
+
+    if statuses:
+        if all(s == "APPROVED" for s in statuses):
+            overall_status = "APPROVED"
+        else:
+            overall_status = "REJECTED"
+        overall["combined_kyc_status"] = overall_status
+        overall["individual_statuses"] = statuses
+    else:
+        overall["combined_kyc_status"] = "UNKNOWN"
+
+    return {"results": results, "overall": overall}
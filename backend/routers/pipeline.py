@@ -0,0 +1,103 @@
+# backend/routers/pipeline.py
+import os
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+
+from backend.schemas.request_schemas import ApplicationRequest
+from backend.utils.lazy import lazy_module
+
+ocr_utils = lazy_module("backend.utils.ocr_utils")
+workflow = lazy_module("orchestrator.workflow")
+incremental = lazy_module("orchestrator.incremental")
+
+router = APIRouter(prefix="/pipeline", tags=["Pipeline"])
+
+
+@router.post("/run")
+async def run_pipeline(
+    request: Request,
+    application: Optional[str] = Form(None),
+    app_id: Optional[int] = Form(None),
+    aadhaar_document: Optional[UploadFile] = File(None),
+    pan_document: Optional[UploadFile] = File(None),
+    selfie: Optional[UploadFile] = File(None),
+    id_document: Optional[UploadFile] = File(None),
+):
+    """
+    End-to-end run: intake -> OCR / forensics -> KYC -> fraud / scoring -> explanation.
+    Form fields:
+      - application (JSON ApplicationRequest) for a new applicant, or
+      - app_id (int) to re-run an existing application
+      - aadhaar_document / pan_document / selfie / id_document (files) optional
+
+    Returns the final decision, per-stage status and timings, and the critical path.
+    """
+    if application is None and app_id is None:
+        raise HTTPException(status_code=422, detail="Provide either application or app_id")
+
+    req = None
+    if application is not None:
+        try:
+            req = ApplicationRequest(**json.loads(application))
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Invalid application: {e}")
+
+    temp_paths = {}
+    try:
+        for doc, upload in (("aadhaar", aadhaar_document), ("pan", pan_document)):
+            if upload:
+                temp_paths[doc] = ocr_utils.save_temp_upload(upload)
+
+        result = await workflow.run_lending_pipeline(
+            application=req,
+            app_id=app_id if req is None else None,
+            documents=temp_paths,
+            selfie=await selfie.read() if selfie else None,
+            id_photo=await id_document.read() if id_document else None,
+            client=request.client.host if request.client else None,
+        )
+        return jsonable_encoder(result)
+
+    finally:
+        # cleanup temp files
+        for p in temp_paths.values():
+            try:
+                os.remove(p)
+            except Exception:
+                pass
+
+
+@router.post("/reevaluate")
+async def reevaluate_application(
+    app_id: int = Form(...),
+    aadhaar_document: Optional[UploadFile] = File(None),
+    pan_document: Optional[UploadFile] = File(None),
+    selfie: Optional[UploadFile] = File(None),
+    id_document: Optional[UploadFile] = File(None),
+):
+    """
+    Bring an existing application up to date after a re-upload: only stages
+    whose inputs changed are recomputed, the rest come from stage_results.
+    """
+    temp_paths = {}
+    try:
+        for doc, upload in (("aadhaar", aadhaar_document), ("pan", pan_document)):
+            if upload:
+                temp_paths[doc] = ocr_utils.save_temp_upload(upload)
+
+        result = await incremental.reevaluate(
+            app_id,
+            documents=temp_paths,
+            selfie=await selfie.read() if selfie else None,
+            id_photo=await id_document.read() if id_document else None,
+        )
+        return jsonable_encoder(result)
+
+    finally:
+        for p in temp_paths.values():
+            try:
+                os.remove(p)
+            except Exception:
+                pass
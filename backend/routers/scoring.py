@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from backend.utils.lazy import lazy_module
+
+scoring_agent = lazy_module("backend.agents.scoring_agent")
+
+router = APIRouter(prefix="/agent/scoring", tags=["Scoring"])
+
+@router.post("/")
+def score(app_id: int):
+    return scoring_agent.run_scoring_agent(app_id)
+
+@router.get("/offers")
+def offers(app_id: int):
+    """
+    What-if preview: approvable amount x tenure frontier without saving a score.
+    """
+    return scoring_agent.run_scoring_agent(app_id, persist=False)
@@ -46,3 +46,23 @@ class ApplicationRequest(BaseModel):
 
         # explicit, clear error so client sees what's wrong
         raise ValueError("DOB must be in one of: YYYY-MM-DD, DD-MM-YYYY, or DD/MM/YYYY")
+
+
+class ApplicationUpdate(BaseModel):
+    """Partial correction of an application (PATCH /apply/{app_id})."""
+    name: Optional[str] = None
+    dob: Optional[datetime.date] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    aadhaar_number: Optional[str] = None
+    pan: Optional[str] = None
+    address: Optional[str] = None
+    income: Optional[int] = None
+    loan_amount: Optional[int] = None
+    loan_tenure: Optional[int] = None
+
+    @validator("dob", pre=True)
+    def convert_dob(cls, v):
+        if v is None:
+            return v
+        return ApplicationRequest.convert_dob(v)
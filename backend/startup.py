@@ -0,0 +1,203 @@
+# backend/startup.py
+"""
+Startup: warmup and readiness (GET /ready).
+
+Importing backend.main does no database I/O and no heavy imports: agents and
+the orchestrator are lazy modules (backend/utils/lazy.py) and the schema is
+managed by Alembic (`alembic upgrade head`), not create_all in every worker.
+Warmup then runs, in order:
+
+  schema          DB reachable and every model table present (required)
+  agents          import the agent modules and the orchestrator (required)
+  ocr_pool        start every OCR_POOL thread
+  tesseract       run the tesseract binary once, check for the Hindi model
+  scoring_model   unpickle the credit model
+  face_model      insightface detector + recogniser (WARMUP_FACE_MODEL)
+  identity_index  load / catch up the identity-reuse index
+  face_index      load stored face embeddings
+
+Optional steps that fail (e.g. no tesseract on this host) are reported but do
+not hold readiness; the same load is retried on first use. After a required
+step failed, /ready retries the steps that have not succeeded, at most once
+per WARMUP_RETRY_INTERVAL.
+
+WARMUP_MODE: "background" serves immediately and /ready answers 503 until
+warm; "blocking" finishes warmup before uvicorn accepts connections; "off"
+only checks the schema and loads everything on first use.
+"""
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from sqlalchemy import inspect, text
+
+from backend.config import settings
+from backend.database import engine
+from backend.models.db_models import Base
+from backend.utils.lazy import IMPORT_TIMES, lazy_module
+
+AGENT_MODULES = (
+    "backend.utils.ocr_utils",
+    "backend.agents.aadhar_agent",
+    "backend.agents.pan_agent",
+    "backend.agents.fraud_agent",
+    "backend.agents.kyc_agent",
+    "backend.agents.scoring_agent",
+    "backend.agents.explanation_agent",
+    "backend.agents.document_agent",
+    "orchestrator.workflow",
+    "orchestrator.incremental",
+)
+
+STATE = {
+    "phase": "starting",            # starting -> warming -> ready / failed
+    "import_ms": {},
+    "warmup": {},
+    "warmup_ms": None,
+    "error": None,
+}
+_LOCK = threading.Lock()
+_TASKS = set()
+_RETRY = {"steps": None, "at": 0.0}     # steps of the last warmup, when it failed
+
+
+def record_import(name: str, t0: float):
+    """Record an import measured by the caller (backend.main times itself)."""
+    STATE["import_ms"][name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+# -----------------------
+# Steps
+# -----------------------
+def check_schema() -> dict:
+    if settings.AUTO_CREATE_SCHEMA:
+        Base.metadata.create_all(bind=engine)
+    existing = set(inspect(engine).get_table_names())
+    missing = sorted(set(Base.metadata.tables) - existing)
+    if missing:
+        raise RuntimeError(f"missing tables {missing}; run `alembic upgrade head`")
+    revision = None
+    if "alembic_version" in existing:
+        with engine.connect() as conn:
+            revision = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    return {"tables": len(Base.metadata.tables), "alembic_revision": revision}
+
+
+def load_agents() -> dict:
+    for name in AGENT_MODULES:
+        lazy_module(name).load()
+    return {name: IMPORT_TIMES.get(name) for name in AGENT_MODULES}
+
+
+def start_ocr_pool() -> dict:
+    """ThreadPoolExecutor starts threads on demand; park one task per worker until all exist."""
+    n = settings.OCR_WORKERS
+    barrier = threading.Barrier(n)
+    futures = [lazy_module("backend.utils.ocr_utils").OCR_POOL.submit(barrier.wait, 10) for _ in range(n)]
+    for f in futures:
+        f.result()
+    return {"threads": n}
+
+
+def check_tesseract() -> dict:
+    lazy_module("backend.agents.aadhar_agent").load()          # sets tesseract_cmd
+    import pytesseract
+    return {
+        "version": str(pytesseract.get_tesseract_version()),
+        "hindi": lazy_module("backend.utils.script_ocr").hindi_available(),
+    }
+
+
+def load_scoring_model() -> dict:
+    return {"loaded": lazy_module("backend.agents.scoring_agent").load_model() is not None}
+
+
+def load_face_model() -> dict:
+    if not settings.WARMUP_FACE_MODEL:
+        return {"skipped": True}
+    lazy_module("backend.utils.face_utils").load_face_app()
+    return {"loaded": True}
+
+
+def load_identity_index() -> dict:
+    index = lazy_module("backend.agents.fraud_agent").get_identity_index()
+    return {"max_app_id": index.max_app_id}
+
+
+def load_face_index() -> dict:
+    index = lazy_module("backend.agents.kyc_agent").get_face_index()
+    return {"embeddings": len(index)}
+
+
+WARMUP_STEPS = (
+    # name, fn, required for readiness
+    ("schema", check_schema, True),
+    ("agents", load_agents, True),
+    ("ocr_pool", start_ocr_pool, False),
+    ("tesseract", check_tesseract, False),
+    ("scoring_model", load_scoring_model, False),
+    ("face_model", load_face_model, False),
+    ("identity_index", load_identity_index, False),
+    ("face_index", load_face_index, False),
+)
+
+
+def warmup(steps=None) -> dict:
+    """Run the warmup steps (all, or the given names) until it succeeds once; returns STATE."""
+    with _LOCK:
+        if STATE["phase"] == "ready":
+            return STATE
+        STATE["phase"] = "warming"
+        STATE["error"] = None
+        t0 = time.perf_counter()
+        ok = True
+        for name, fn, required in WARMUP_STEPS:
+            if steps is not None and name not in steps:
+                continue
+            if STATE["warmup"].get(name, {}).get("status") == "ok":
+                continue                # done by an earlier, failed warmup
+            s0 = time.perf_counter()
+            try:
+                entry = {"status": "ok", "detail": fn()}
+            except Exception as e:
+                entry = {"status": "failed", "error": f"{type(e).__name__}: {e}"[:500], "required": required}
+                if required:
+                    ok = False
+                    STATE["error"] = f"{name}: {entry['error']}"
+            entry["ms"] = round((time.perf_counter() - s0) * 1000, 1)
+            STATE["warmup"][name] = entry
+            if not ok:
+                break
+        STATE["warmup_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        STATE["phase"] = "ready" if ok else "failed"
+        _RETRY["steps"], _RETRY["at"] = steps, time.monotonic()
+        return STATE
+
+
+def readiness() -> dict:
+    if STATE["phase"] == "failed" and time.monotonic() - _RETRY["at"] >= settings.WARMUP_RETRY_INTERVAL:
+        _RETRY["at"] = time.monotonic()
+        warmup(_RETRY["steps"])     # retry, e.g. once `alembic upgrade head` has run
+    body = dict(STATE)
+    body["ready"] = STATE["phase"] == "ready"
+    body["lazy_import_ms"] = dict(IMPORT_TIMES)
+    return body
+
+
+# -----------------------
+# FastAPI lifespan
+# -----------------------
+@asynccontextmanager
+async def lifespan(app):
+    loop = asyncio.get_running_loop()
+    mode = settings.WARMUP_MODE
+    if mode == "blocking":
+        await loop.run_in_executor(None, warmup)
+    elif mode == "off":
+        await loop.run_in_executor(None, warmup, ("schema",))
+    else:
+        task = loop.run_in_executor(None, warmup)
+        _TASKS.add(task)
+        task.add_done_callback(_TASKS.discard)
+    yield
@@ -0,0 +1,248 @@
+# backend/utils/admission.py
+"""
+Admission control / load shedding in front of the routers.
+
+Every request is put in a class by path prefix (settings.ADMISSION_CLASSES,
+first match wins) and passes two gates before it reaches the app:
+
+  1. per-client token bucket (rate / burst per class)       -> 429 + Retry-After
+  2. per-class concurrency limit with a bounded wait queue  -> 503 + Retry-After
+       - estimated wait = queued requests / concurrency * EWMA service time;
+         above max_wait the request is shed on arrival instead of queueing
+       - more than max_queue waiting, or no slot within max_wait: shed too
+
+Classes do not share slots: a flood of OCR uploads fills the "ocr" queue
+and is shed there, while GET / and /apply keep the "default" class capacity
+to themselves. Shedding early keeps goodput flat under overload: work that
+would finish after the client gave up is never started.
+
+State is per worker process and lives on its event loop (no locks).
+Rejections are exported as lending_admission_rejected_total{class, reason};
+GET /admin/admission shows the live queues.
+"""
+import math
+import time
+import asyncio
+import collections
+from typing import Optional
+
+from backend.config import settings
+from backend.utils.metrics import Counter, Histogram, register
+
+ADMISSION_REJECTED = register(Counter(
+    "lending_admission_rejected_total", "Requests shed by admission control", ("class", "reason")
+))
+ADMISSION_WAIT = register(Histogram(
+    "lending_admission_wait_seconds", "Time admitted requests waited for a slot", ("class",)
+))
+
+_EWMA_ALPHA = 0.2
+
+
+# -----------------------
+# Per-client token buckets
+# -----------------------
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def take(self, now: float) -> float:
+        """Take one token. Returns 0 if admitted, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class _Buckets:
+    """(class, client) -> TokenBucket, least recently seen clients evicted past max_clients."""
+
+    def __init__(self, max_clients: int):
+        self.max_clients = max_clients
+        self._buckets = collections.OrderedDict()
+
+    def take(self, key, rate: float, burst: float, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+# -----------------------
+# Concurrency limit + wait queue
+# -----------------------
+class Limiter:
+    def __init__(self, name: str, cfg: dict):
+        self.name = name
+        self.prefixes = tuple(cfg.get("prefixes", ()))
+        self.concurrency = max(1, int(cfg["concurrency"]))
+        self.max_queue = int(cfg.get("max_queue", 0))
+        self.max_wait = float(cfg.get("max_wait", 0.0))
+        self.rate = cfg.get("rate")
+        self.burst = float(cfg.get("burst") or 1.0)
+        self.service_time = float(cfg.get("service_time", 1.0))     # seeds the EWMA
+        self.in_flight = 0
+        self._waiters = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """Seconds a request arriving now would wait for a slot."""
+        if self.in_flight < self.concurrency and not self._waiters:
+            return 0.0
+        return (self.queued + 1) / self.concurrency * self.service_time
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            return True
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait((fut,), timeout=timeout)
+        except BaseException:
+            if not self._withdraw(fut):
+                self._pass_slot()               # granted, but the waiter is gone: nobody would release it
+            raise
+        return not self._withdraw(fut)
+
+    def _withdraw(self, fut) -> bool:
+        """Leave the queue; False if release() already handed its slot to fut."""
+        if fut.done() and not fut.cancelled():
+            return False
+        fut.cancel()
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+        return True
+
+    def release(self, service_seconds: float):
+        self.service_time += _EWMA_ALPHA * (service_seconds - self.service_time)
+        self._pass_slot()
+
+    def _pass_slot(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)            # slot passes to the waiter, in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "concurrency": self.concurrency,
+            "service_time_ms": round(self.service_time * 1000, 1),
+            "estimated_wait_s": round(self.estimated_wait(), 3),
+        }
+
+
+_LIMITERS = None
+_BUCKETS = None
+
+
+def limiters() -> dict:
+    """name -> Limiter, built from settings on first use."""
+    global _LIMITERS, _BUCKETS
+    if _LIMITERS is None:
+        _LIMITERS = {name: Limiter(name, cfg) for name, cfg in settings.ADMISSION_CLASSES.items()}
+        _BUCKETS = _Buckets(settings.ADMISSION_MAX_CLIENTS)
+    return _LIMITERS
+
+
+def classify(path: str) -> Optional[Limiter]:
+    """Limiter for `path`, None if it is exempt."""
+    if path.startswith(tuple(settings.ADMISSION_EXEMPT)):
+        return None
+    for limiter in limiters().values():
+        if path.startswith(limiter.prefixes):
+            return limiter
+    return None
+
+
+def admission_stats() -> dict:
+    return {
+        "enabled": settings.ADMISSION_ENABLED,
+        "classes": {name: lim.stats() for name, lim in limiters().items()},
+    }
+
+
+def _client(scope) -> str:
+    if settings.ADMISSION_TRUST_FORWARDED:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+# -----------------------
+# ASGI middleware
+# -----------------------
+class AdmissionMiddleware:
+    """Pure ASGI middleware: shed requests before any body is read or route runs."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        limiter = classify(scope["path"])
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        now = time.monotonic()
+        if limiter.rate:
+            retry = _BUCKETS.take((limiter.name, _client(scope)), limiter.rate, limiter.burst, now)
+            if retry:
+                return await _reject(send, limiter, "rate_limited", 429, retry)
+
+        wait = limiter.estimated_wait()
+        if wait > limiter.max_wait:
+            return await _reject(send, limiter, "overloaded", 503, wait)
+        if limiter.in_flight >= limiter.concurrency and limiter.queued >= limiter.max_queue:
+            return await _reject(send, limiter, "queue_full", 503, wait)
+
+        if not await limiter.acquire(limiter.max_wait):
+            return await _reject(send, limiter, "timeout", 503, limiter.estimated_wait())
+        started = time.monotonic()
+        ADMISSION_WAIT.observe(started - now, limiter.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+
+async def _reject(send, limiter: Limiter, reason: str, status: int, retry_after: float):
+    ADMISSION_REJECTED.inc(limiter.name, reason)
+    retry = str(max(1, math.ceil(retry_after)))
+    body = (
+        '{"detail":"%s","reason":"%s","retry_after":%s}'
+        % ("Too many requests" if status == 429 else "Server busy, retry later", reason, retry)
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry.encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,534 @@
+# backend/utils/analytics.py
+"""
+Columnar analytics snapshot of the application portfolio.
+
+Risk dashboards (approval rates, KYC failure fields, income / loan-size
+distributions) read this snapshot instead of the transactional database:
+
+    snap = get_snapshot()
+    snap.sync()                                  # worker task "analytics_sync" (POST /jobs/analytics-sync)
+    snap.approval_rates(period="month")
+    snap.query("applications", by=("status",), aggs={"n": ("count",), "p50_income": ("quantile", "income", 0.5)})
+    snap.histogram("applications", "loan_amount", bins=20)
+
+Layout (ANALYTICS_DIR), one directory per table and month:
+
+    state.json                                watermark per table, written after its parts
+    applications/2025-01/part-000007-000.npz  one array per column
+    kyc_results/...  kyc_failures/...  credit_scores/...
+
+sync() reads each table in keyset order of (watermark column, primary key)
+from the stored watermark, ANALYTICS_SYNC_BATCH rows per query, each query
+in its own short session, and appends one part per month it touched. Rows
+newer than ANALYTICS_SYNC_LAG seconds wait for the next sync, so a
+transaction that commits a little late is not skipped. Parts are never
+rewritten in place: a row read twice (changed since, or re-read after a
+sync died before state.json) is a newer version of its key and reads keep
+the newest. Months with more than ANALYTICS_COMPACT_PARTS parts are merged.
+
+Watermarks: updated_at on every table. kyc_results and credit_scores are
+insert-only history; an application is re-read after a PATCH /apply
+correction or a status change, and the new version lands in the month of
+its created_at, next to the old one. Months, periods and since / until
+follow each table's "time" column (created_at for applications).
+kyc_failures is kyc_results.failed_fields exploded, one row per field.
+Rows archived or deleted from the live tables stay in the snapshot. No
+PII is copied (no names, numbers or addresses).
+
+Part files are np.savez_compressed archives: a scan decompresses only the
+columns it asks for; loaded columns are cached per (path, mtime, size), as
+a sync that failed part-way can leave a part name to be written again.
+Every watermark column is local time (datetime.now()), like the cutoff.
+"""
+import os
+import json
+import functools
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, or_
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import Application, KYCResult, CreditScore
+from backend.utils.file_utils import run_lock, write_atomic
+from backend.utils.metrics import Counter, register, span
+
+ROWS_SYNCED = register(Counter(
+    "lending_analytics_rows_synced_total", "Rows appended to the analytics snapshot", ("table",)
+))
+
+# column kinds: key -> int64 (-1 = NULL), num -> float64 (NaN = NULL), str -> unicode ("" = NULL), time -> datetime64[s]
+TABLES = {
+    "applications": {
+        "model": Application, "key": ("app_id",), "watermark": "updated_at", "time": "created_at",
+        "columns": {"app_id": "key", "created_at": "time", "updated_at": "time", "status": "str",
+                    "income": "num", "loan_amount": "num", "loan_tenure": "num"},
+    },
+    "kyc_results": {
+        "model": KYCResult, "key": ("id",), "watermark": "updated_at",
+        "columns": {"id": "key", "app_id": "key", "updated_at": "time",
+                    "kyc_status": "str", "failed_fields": "str"},
+    },
+    "kyc_failures": {           # derived from kyc_results, written in the same sync
+        "model": None, "key": ("id", "field"), "watermark": "updated_at",
+        "columns": {"id": "key", "app_id": "key", "updated_at": "time", "field": "str"},
+    },
+    "credit_scores": {
+        "model": CreditScore, "key": ("id",), "watermark": "updated_at",
+        "columns": {"id": "key", "app_id": "key", "updated_at": "time", "model_score": "num",
+                    "approval_status": "str", "sanctioned_amount": "num",
+                    "sanctioned_tenure": "num", "interest_rate": "num"},
+    },
+}
+PERIODS = {"day": "D", "month": "M", "year": "Y"}
+AGGS = ("count", "sum", "mean", "min", "max", "quantile", "share")
+_EMPTY = {"key": np.int64, "num": np.float64, "str": np.str_, "time": "datetime64[s]"}
+
+
+def _column(values: list, kind: str) -> np.ndarray:
+    if kind == "key":
+        return np.asarray([-1 if v is None else v for v in values], dtype=np.int64)
+    if kind == "num":
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    if kind == "str":
+        return np.asarray(["" if v is None else str(v) for v in values], dtype=np.str_)
+    return np.asarray(values, dtype="datetime64[s]")
+
+
+def _time(spec: dict) -> str:
+    """Column that partitions a table by month and that periods / since / until refer to."""
+    return spec.get("time", spec["watermark"])
+
+
+def _failures(rows: List[dict]) -> List[dict]:
+    """kyc_results rows -> one kyc_failures row per failed field."""
+    return [
+        {"id": r["id"], "app_id": r["app_id"], "updated_at": r["updated_at"], "field": f.strip()}
+        for r in rows for f in (r["failed_fields"] or "").split(",") if f.strip()
+    ]
+
+
+def _load_column(path: str, column: str) -> np.ndarray:
+    """One column of a part (cached per file version)."""
+    st = os.stat(path)
+    return _load_column_at(path, st.st_mtime_ns, st.st_size, column)
+
+
+@functools.lru_cache(maxsize=1024)
+def _load_column_at(path: str, mtime_ns: int, size: int, column: str) -> np.ndarray:
+    with np.load(path, allow_pickle=False) as part:
+        return part[column]
+
+
+def _json_value(v):
+    v = v.item() if isinstance(v, np.generic) else v
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    return v
+
+
+# -----------------------
+# Group-by kernels
+# -----------------------
+def _groups(keys: List[np.ndarray], n: int):
+    """(group id per row, [key tuple per group]) for the given key columns."""
+    if not keys:
+        return np.zeros(n, dtype=np.int64), [()]
+    codes, uniques = [], []
+    for k in keys:
+        u, inv = np.unique(k, return_inverse=True)
+        codes.append(inv.reshape(-1))
+        uniques.append(u)
+    shape = [len(u) for u in uniques]
+    flat = np.ravel_multi_index(codes, shape) if len(keys) > 1 else codes[0]
+    groups, gid = np.unique(flat, return_inverse=True)
+    idx = np.unravel_index(groups, shape)
+    labels = [tuple(uniques[j][idx[j][g]] for j in range(len(keys))) for g in range(len(groups))]
+    return gid.reshape(-1), labels
+
+
+def _aggregate(op: str, gid: np.ndarray, n_groups: int, x: np.ndarray = None, arg=None) -> np.ndarray:
+    if op == "count":
+        return np.bincount(gid, minlength=n_groups)
+    if op == "share":
+        hits = np.bincount(gid, weights=(x == arg).astype(np.float64), minlength=n_groups)
+        return hits / np.maximum(np.bincount(gid, minlength=n_groups), 1)
+
+    x = x.astype(np.float64)
+    valid = ~np.isnan(x)
+    g, x = gid[valid], x[valid]
+    counts = np.bincount(g, minlength=n_groups)
+    out = np.full(n_groups, np.nan)
+    if op in ("sum", "mean"):
+        sums = np.bincount(g, weights=x, minlength=n_groups)
+        if op == "sum":
+            return sums
+        np.divide(sums, counts, out=out, where=counts > 0)
+        return out
+
+    # min / max / quantile over values sorted within each group
+    order = np.lexsort((x, g))
+    xs = x[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    if op == "min":
+        out[has] = xs[starts[has]]
+    elif op == "max":
+        out[has] = xs[starts[has] + counts[has] - 1]
+    else:
+        pos = starts[has] + float(arg) * (counts[has] - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts[has] + counts[has] - 1)
+        out[has] = xs[lo] + (pos - lo) * (xs[hi] - xs[lo])
+    return out
+
+
+def _newest(cols: Dict[str, np.ndarray], key: Sequence[str], order: Sequence[str] = ()) -> Dict[str, np.ndarray]:
+    """
+    Keep one row per key: the last by `order` columns, then by position
+    (rows are concatenated oldest part first, so position is the version).
+    """
+    n = len(next(iter(cols.values())))
+    if n == 0:
+        return cols
+    pos = np.arange(n)
+    sort = np.lexsort((pos,) + tuple(cols[c] for c in reversed(order)) + tuple(cols[k] for k in reversed(key)))
+    last = np.ones(n, dtype=bool)
+    changed = np.zeros(n - 1, dtype=bool)
+    for k in key:
+        ks = cols[k][sort]
+        changed |= ks[1:] != ks[:-1]
+    last[:-1] = changed
+    keep = np.sort(sort[last])
+    return {c: v[keep] for c, v in cols.items()}
+
+
+# -----------------------
+# Snapshot
+# -----------------------
+class AnalyticsSnapshot:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    # ---- state ----
+    def _state_path(self) -> str:
+        return os.path.join(self.root, "state.json")
+
+    def state(self) -> dict:
+        try:
+            with open(self._state_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"seq": 0, "tables": {}}
+
+    def _save_state(self, state: dict):
+        os.makedirs(self.root, exist_ok=True)
+        write_atomic(self._state_path(), lambda f: f.write(json.dumps(state, indent=1).encode()))
+
+    # ---- writing ----
+    def _write_part(self, table: str, month: str, name: str, rows: List[dict]) -> str:
+        columns = TABLES[table]["columns"]
+        arrays = {c: _column([r[c] for r in rows], kind) for c, kind in columns.items()}
+        d = os.path.join(self.root, table, month)
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, name)
+        write_atomic(path, lambda f: np.savez_compressed(f, **arrays))
+        return path
+
+    def _read_batch(self, spec: dict, watermark: Optional[list], cutoff: datetime) -> List[dict]:
+        model = spec["model"]
+        ts, pk = getattr(model, spec["watermark"]), getattr(model, spec["key"][0])
+        names = list(spec["columns"])
+        db = SessionLocal()
+        try:
+            q = db.query(*[getattr(model, c) for c in names]).filter(ts.isnot(None), ts <= cutoff)
+            if watermark:
+                wm_ts, wm_pk = datetime.fromisoformat(watermark[0]), watermark[1]
+                q = q.filter(or_(ts > wm_ts, and_(ts == wm_ts, pk > wm_pk)))
+            rows = q.order_by(ts, pk).limit(settings.ANALYTICS_SYNC_BATCH).all()
+        finally:
+            db.close()
+        return [dict(zip(names, r)) for r in rows]
+
+    def sync(self) -> dict:
+        """Append rows past each table's watermark; returns rows appended per table."""
+        with self._lock, span("analytics_sync"):
+            with run_lock(os.path.join(self.root, "sync.lock"), "Another analytics sync is running"):
+                return self._sync()
+
+    def _sync(self) -> dict:
+        state = self.state()
+        seq = state["seq"] = state["seq"] + 1
+        cutoff = datetime.now() - timedelta(seconds=settings.ANALYTICS_SYNC_LAG)
+        appended = {}
+        for table, spec in TABLES.items():
+            if spec["model"] is None:
+                continue
+            entry = state["tables"].setdefault(table, {"watermark": None, "rows": 0})
+            derived = "kyc_failures" if table == "kyc_results" else None
+            buffered, flushes, n = {}, 0, 0
+
+            def flush():
+                nonlocal flushes
+                name = f"part-{seq:06d}-{flushes:03d}.npz"
+                for month, rows in buffered.items():
+                    self._write_part(table, month, name, rows)
+                    if derived:
+                        failures = _failures(rows)
+                        if failures:
+                            self._write_part(derived, month, name, failures)
+                buffered.clear()
+                flushes += 1
+
+            while True:
+                rows = self._read_batch(spec, entry["watermark"], cutoff)
+                if not rows:
+                    break
+                for r in rows:
+                    buffered.setdefault(r[_time(spec)].strftime("%Y-%m"), []).append(r)
+                n += len(rows)
+                last = rows[-1]
+                entry["watermark"] = [last[spec["watermark"]].isoformat(), last[spec["key"][0]]]
+                if sum(len(v) for v in buffered.values()) >= settings.ANALYTICS_PART_ROWS:
+                    flush()
+                if len(rows) < settings.ANALYTICS_SYNC_BATCH:
+                    break
+            if buffered:
+                flush()
+            entry["rows"] += n
+            entry["synced_at"] = datetime.now().isoformat(timespec="seconds")
+            self._save_state(state)          # parts first: a crash re-reads, never skips
+            ROWS_SYNCED.inc(table, amount=n)
+            appended[table] = n
+
+        for table in TABLES:
+            for month in self._months(table):
+                if len(self._part_paths(table, month)) > settings.ANALYTICS_COMPACT_PARTS:
+                    self.compact(table, month)
+        return appended
+
+    def compact(self, table: str, month: str) -> int:
+        """Merge a month's parts into one (newest version per key); returns rows kept."""
+        paths = self._part_paths(table, month)
+        if len(paths) < 2:
+            return 0
+        spec = TABLES[table]
+        cols = _newest(self._concat(paths, list(spec["columns"])), spec["key"])
+        name = os.path.basename(paths[-1]).replace(".npz", "-c.npz")      # sorts after the parts it replaces
+        path = os.path.join(self.root, table, month, name)
+        write_atomic(path, lambda f: np.savez_compressed(f, **cols))
+        for p in paths:
+            os.unlink(p)
+        return len(next(iter(cols.values())))
+
+    # ---- reading ----
+    def _months(self, table: str) -> List[str]:
+        d = os.path.join(self.root, table)
+        return sorted(os.listdir(d)) if os.path.isdir(d) else []
+
+    def _part_paths(self, table: str, month: str) -> List[str]:
+        d = os.path.join(self.root, table, month)
+        return [os.path.join(d, f) for f in sorted(os.listdir(d)) if f.endswith(".npz")]
+
+    def _concat(self, paths: List[str], columns: List[str]) -> Dict[str, np.ndarray]:
+        return {c: np.concatenate([_load_column(p, c) for p in paths]) for c in columns}
+
+    def scan(self, table: str, columns: Sequence[str] = None, since=None, until=None,
+             latest_by: str = None, where: dict = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of `table` with since <= time column < until (dates or
+        datetimes; month partitions outside the range are not read), one row
+        per key. latest_by="app_id" keeps only the newest row per application.
+        where: {column: value or list of values}.
+        """
+        spec = _spec(table)
+        columns = list(columns or spec["columns"])
+        where = where or {}
+        ts = _time(spec)
+        needed = list(dict.fromkeys(columns + list(spec["key"]) + [ts] + list(where) + ([latest_by] if latest_by else [])))
+        for c in needed:
+            if c not in spec["columns"]:
+                raise ValueError(f"Unknown column {c} in {table}")
+
+        lo = since.strftime("%Y-%m") if since else None
+        hi = until.strftime("%Y-%m") if until else None
+        for attempt in range(3):
+            paths = [p for m in self._months(table) if (lo is None or m >= lo) and (hi is None or m <= hi)
+                     for p in self._part_paths(table, m)]
+            if not paths:
+                return {c: np.empty(0, dtype=_EMPTY[spec["columns"][c]]) for c in columns}
+            try:
+                cols = self._concat(paths, needed)
+                break
+            except FileNotFoundError:       # a compaction replaced the parts mid-scan
+                if attempt == 2:
+                    raise
+        cols = _newest(cols, spec["key"])
+        mask = np.ones(len(cols[ts]), dtype=bool)
+        if since:
+            mask &= cols[ts] >= np.datetime64(since)
+        if until:
+            mask &= cols[ts] < np.datetime64(until)
+        for c, v in where.items():
+            mask &= np.isin(cols[c], np.asarray(v if isinstance(v, (list, tuple)) else [v]))
+        cols = {c: a[mask] for c, a in cols.items()}
+        if latest_by:
+            cols = _newest(cols, (latest_by,), order=(ts,) + tuple(spec["key"]))
+        return {c: cols[c] for c in columns}
+
+    def query(self, table: str, by: Sequence[str] = (), aggs: dict = None, since=None, until=None,
+              latest_by: str = None, where: dict = None) -> List[dict]:
+        """
+        Group-by aggregate. by: columns and / or a period ("day", "month",
+        "year" of the table's time column). aggs: {name: (op, column, arg)}
+        with op count / sum / mean / min / max / quantile (arg q) / share
+        (arg value: fraction of rows where column == value).
+        """
+        aggs = aggs or {"count": ("count",)}
+        spec = _spec(table)
+        for name, agg in aggs.items():
+            if not agg or agg[0] not in AGGS or (agg[0] != "count" and len(agg) < 2):
+                raise ValueError(f"Bad aggregate {name}: {agg}")
+            if agg[0] in ("quantile", "share") and len(agg) < 3:
+                raise ValueError(f"Aggregate {name}: {agg[0]} needs an argument")
+            if agg[0] == "quantile":
+                try:
+                    q = float(agg[2])
+                except (TypeError, ValueError):
+                    q = None
+                if q is None or not 0.0 <= q <= 1.0:
+                    raise ValueError(f"Aggregate {name}: quantile must be between 0 and 1")
+        columns = [c for c in by if c not in PERIODS] + [a[1] for a in aggs.values() if len(a) > 1]
+        with span("analytics_query"):
+            cols = self.scan(table, list(dict.fromkeys(columns + [_time(spec)])),
+                             since, until, latest_by, where)
+            n = len(cols[_time(spec)])
+            keys = [
+                cols[_time(spec)].astype(f"datetime64[{PERIODS[c]}]").astype(str) if c in PERIODS else cols[c]
+                for c in by
+            ]
+            if n == 0:
+                return []
+            gid, labels = _groups(keys, n)
+            results = {
+                name: _aggregate(agg[0], gid, len(labels), cols[agg[1]] if len(agg) > 1 else None,
+                                 agg[2] if len(agg) > 2 else None)
+                for name, agg in aggs.items()
+            }
+        return [
+            {**{b: _json_value(v) for b, v in zip(by, label)},
+             **{name: _json_value(values[g]) for name, values in results.items()}}
+            for g, label in enumerate(labels)
+        ]
+
+    def histogram(self, table: str, column: str, bins: int = 20, range=None, by: Sequence[str] = (),
+                  since=None, until=None, latest_by: str = None, where: dict = None) -> dict:
+        """Counts of a numeric column over shared bin edges, per group of `by`."""
+        spec = _spec(table)
+        if spec["columns"].get(column) != "num":
+            raise ValueError(f"{table}.{column} is not numeric")
+        with span("analytics_query"):
+            cols = self.scan(table, list(dict.fromkeys([column, _time(spec)] + [c for c in by if c not in PERIODS])),
+                             since, until, latest_by, where)
+            x = cols[column]
+            valid = ~np.isnan(x)
+            edges = np.histogram_bin_edges(x[valid], bins=bins, range=range) if valid.any() else np.zeros(0)
+            keys = [
+                cols[_time(spec)].astype(f"datetime64[{PERIODS[c]}]").astype(str) if c in PERIODS else cols[c]
+                for c in by
+            ]
+            if not valid.any():
+                return {"edges": [], "groups": []}
+            gid, labels = _groups([k[valid] for k in keys], int(valid.sum()))
+            b = np.clip(np.searchsorted(edges, x[valid], side="right") - 1, 0, len(edges) - 2)
+            counts = np.bincount(gid * (len(edges) - 1) + b, minlength=len(labels) * (len(edges) - 1))
+            counts = counts.reshape(len(labels), len(edges) - 1)
+        return {
+            "edges": edges.tolist(),
+            "groups": [{**{c: _json_value(v) for c, v in zip(by, label)}, "counts": counts[g].tolist()}
+                       for g, label in enumerate(labels)],
+        }
+
+    # ---- dashboard queries ----
+    def approval_rates(self, period: str = "month", since=None, until=None) -> List[dict]:
+        """Latest credit score per application, grouped by scoring period."""
+        return self.query("credit_scores", by=(period,) if period else (), since=since, until=until,
+                          latest_by="app_id", aggs={
+                              "applications": ("count",),
+                              "approved_rate": ("share", "approval_status", "APPROVED"),
+                              "manual_rate": ("share", "approval_status", "MANUAL"),
+                              "rejected_rate": ("share", "approval_status", "REJECTED"),
+                              "mean_model_score": ("mean", "model_score"),
+                              "mean_sanctioned_amount": ("mean", "sanctioned_amount"),
+                              "mean_interest_rate": ("mean", "interest_rate"),
+                          })
+
+    def kyc_failures(self, period: str = None, since=None, until=None) -> List[dict]:
+        """
+        Failures per field over the latest KYC run of each application:
+        count and share of those runs (per period, if given).
+        """
+        runs = self.scan("kyc_results", ("id", "updated_at"), since, until, latest_by="app_id")
+        fails = self.scan("kyc_failures", ("id", "field", "updated_at"), since, until)
+        keep = np.isin(fails["id"], runs["id"])
+        fails = {c: a[keep] for c, a in fails.items()}
+        if period:
+            unit = f"datetime64[{PERIODS[period]}]"
+            run_keys, fail_keys = [runs["updated_at"].astype(unit).astype(str)], [fails["updated_at"].astype(unit).astype(str)]
+        else:
+            run_keys, fail_keys = [], []
+        if len(fails["id"]) == 0:
+            return []
+        run_gid, run_labels = _groups(run_keys, len(runs["id"]))
+        totals = dict(zip(run_labels, np.bincount(run_gid, minlength=len(run_labels)).tolist()))
+        gid, labels = _groups(fail_keys + [fails["field"]], len(fails["id"]))
+        counts = np.bincount(gid, minlength=len(labels))
+        rows = []
+        for label, count in zip(labels, counts.tolist()):
+            runs_in = totals.get(label[:-1], 0)
+            row = {"period": _json_value(label[0])} if period else {}
+            row.update({"field": _json_value(label[-1]), "failures": count, "kyc_runs": runs_in,
+                        "failure_rate": round(count / runs_in, 4) if runs_in else None})
+            rows.append(row)
+        return sorted(rows, key=lambda r: (r.get("period") or "", -r["failures"]))
+
+    def status(self) -> dict:
+        state = self.state()
+        tables = {}
+        for table in TABLES:
+            months = self._months(table)
+            parts = [p for m in months for p in self._part_paths(table, m)]
+            entry = state["tables"].get(table, {})
+            tables[table] = {
+                "rows_synced": entry.get("rows"),
+                "watermark": entry.get("watermark"),
+                "synced_at": entry.get("synced_at"),
+                "months": len(months),
+                "parts": len(parts),
+                "bytes": sum(os.path.getsize(p) for p in parts),
+            }
+        return {"root": self.root, "seq": state["seq"], "tables": tables}
+
+
+def _spec(table: str) -> dict:
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table}; one of {sorted(TABLES)}")
+    return TABLES[table]
+
+
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_snapshot(root: str = None) -> AnalyticsSnapshot:
+    """Shared snapshot per directory (settings.ANALYTICS_DIR by default)."""
+    root = root or settings.ANALYTICS_DIR
+    with _SNAPSHOTS_LOCK:
+        snap = _SNAPSHOTS.get(root)
+        if snap is None:
+            snap = _SNAPSHOTS[root] = AnalyticsSnapshot(root)
+        return snap
@@ -0,0 +1,314 @@
+# backend/utils/document_store.py
+"""
+Content-addressed document store.
+
+Uploads are keyed by sha256 of their bytes, so an identical re-upload is
+stored once and its derivatives are reused instead of decoded again:
+
+    <hash>/original         the uploaded bytes (PDF or image)
+    <hash>/meta.json        kind, size, page count / sizes, derivatives; written last
+    <hash>/gray-<i>.npy     page i as 8-bit grayscale (the OCR input), np.load(mmap_mode="r")
+    <hash>/page-<i>.png     page i as rasterised at PDF_DPI (PDFs only)
+    <hash>/thumb-<i>.jpg    page i scaled to DOCUMENT_THUMB_SIZE
+
+    store = get_document_store()
+    ref = store.put(data, pages=pages)        # {"hash", "kind", "pages", ..., "deduped"}
+    pages = store.pages(ref["hash"])           # PIL pages, PDFs are not re-rasterised
+    gray = store.gray(ref["hash"], 0)          # uint8 array, memory-mapped on file://
+
+KYCData.document_hash points at the document an OCR snapshot was read from,
+so re-verification and reprocessing jobs start from the stored derivatives.
+
+Backends (settings.DOCUMENT_STORE_URL):
+  file://<dir>  FileBackend, local directory (gray pages are memory-mapped)
+  memory://     MemoryBackend, in-process stand-in for an object store: flat
+                keys, no local paths (tests; not shared between processes)
+A backend only needs put / get / exists / delete_prefix / local_path.
+"""
+import io
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from backend.config import settings
+from backend.utils.metrics import Counter, register, span
+from backend.utils.ocr_utils import decode_document, is_pdf
+
+STORE_PUTS = register(Counter(
+    "lending_document_store_puts_total", "Documents put into the store", ("result",)      # stored / deduped
+))
+
+
+# -----------------------
+# Backends
+# -----------------------
+class FileBackend:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, key: str, data: bytes):
+        """Atomic write: readers never see a partial file."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def get(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        """prefix is "<hash>/": one directory per document."""
+        d = os.path.dirname(self._path(prefix + "x"))
+        if not os.path.isdir(d):
+            return 0
+        n = len(os.listdir(d))
+        shutil.rmtree(d, ignore_errors=True)
+        return n
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+class MemoryBackend:
+    """Object-store stand-in: opaque keys, whole-object get / put, no local files."""
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._objects[key] = bytes(data)
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            return self._objects[key]
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self._objects
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._objects if k.startswith(prefix)]
+            for k in keys:
+                del self._objects[k]
+            return len(keys)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+
+# -----------------------
+# Store
+# -----------------------
+def document_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _png(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=settings.DOCUMENT_PNG_COMPRESS_LEVEL)
+    return buf.getvalue()
+
+
+def encoded_page(data: bytes, pages: List[Image.Image], page: int = 0) -> bytes:
+    """page_bytes() of an upload that is decoded but maybe not stored yet (same bytes)."""
+    return _png(pages[page]) if is_pdf(data) else data
+
+
+def _npy(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, arr, allow_pickle=False)
+    return buf.getvalue()
+
+
+class DocumentStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    # ---- writing ----
+    def put(self, data: bytes, pages: List[Image.Image] = None, derive: bool = True,
+            filename: str = None) -> dict:
+        """
+        Store `data` (no-op if already present) and return its meta plus
+        "deduped". pages: the caller's decoded pages, so nothing is decoded
+        twice. derive=False stores only the original; derivatives are then
+        written on first use (ensure_derivatives).
+        """
+        h = document_hash(data)
+        meta = self.meta(h)
+        if meta is not None:
+            STORE_PUTS.inc("deduped")
+            if derive and not meta["derivatives"]:
+                meta = self.ensure_derivatives(h, pages)
+            return dict(meta, deduped=True)
+
+        with span("document_store_put"):
+            self.backend.put(f"{h}/original", data)
+            meta = {
+                "hash": h,
+                "kind": "pdf" if is_pdf(data) else "image",
+                "size": len(data),
+                "filename": filename,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "pages": None,
+                "page_sizes": None,
+                "derivatives": False,
+            }
+            if derive:
+                self._derive(meta, pages if pages is not None else decode_document(data))
+            self._write_meta(meta)
+        STORE_PUTS.inc("stored")
+        return dict(meta, deduped=False)
+
+    def ensure_derivatives(self, h: str, pages: List[Image.Image] = None) -> dict:
+        meta = self._require(h)
+        if not meta["derivatives"]:
+            with span("document_store_derive"):
+                self._derive(meta, pages if pages is not None else decode_document(self.original(h)))
+                self._write_meta(meta)
+        return meta
+
+    def _derive(self, meta: dict, pages: List[Image.Image]):
+        h = meta["hash"]
+        size = settings.DOCUMENT_THUMB_SIZE
+        for i, page in enumerate(pages):
+            self.backend.put(f"{h}/gray-{i}.npy", _npy(np.asarray(page.convert("L"), dtype=np.uint8)))
+            if meta["kind"] == "pdf":
+                self.backend.put(f"{h}/page-{i}.png", _png(page))
+            thumb = page.convert("RGB")
+            thumb.thumbnail((size, size))
+            buf = io.BytesIO()
+            thumb.save(buf, format="JPEG", quality=80)
+            self.backend.put(f"{h}/thumb-{i}.jpg", buf.getvalue())
+        meta["pages"] = len(pages)
+        meta["page_sizes"] = [list(p.size) for p in pages]
+        meta["derivatives"] = True
+
+    def _write_meta(self, meta: dict):
+        self.backend.put(f"{meta['hash']}/meta.json", json.dumps(meta).encode())
+
+    def delete(self, h: str) -> int:
+        return self.backend.delete_prefix(f"{h}/")
+
+    # ---- reading ----
+    def meta(self, h: str) -> Optional[dict]:
+        try:
+            return json.loads(self.backend.get(f"{h}/meta.json"))
+        except KeyError:
+            return None
+
+    def exists(self, h: str) -> bool:
+        return self.backend.exists(f"{h}/meta.json")
+
+    def _require(self, h: str) -> dict:
+        meta = self.meta(h)
+        if meta is None:
+            raise KeyError(f"document {h} not in store")
+        return meta
+
+    def original(self, h: str) -> bytes:
+        return self.backend.get(f"{h}/original")
+
+    def decode(self, data: bytes) -> Tuple[str, List[Image.Image], bool]:
+        """(hash, pages, already stored): a stored PDF is read back instead of rasterised again."""
+        h = document_hash(data)
+        meta = self.meta(h)
+        if meta is not None and meta["derivatives"]:
+            return h, self.pages(h), True
+        return h, decode_document(data), meta is not None
+
+    def pages(self, h: str) -> List[Image.Image]:
+        """Document pages as PIL images (stored rasterised pages for PDFs)."""
+        meta = self.ensure_derivatives(h)
+        if meta["kind"] != "pdf":
+            return decode_document(self.original(h))
+        with span("document_store_pages"):
+            return [self._image(f"{h}/page-{i}.png") for i in range(meta["pages"])]
+
+    def page(self, h: str, page: int = 0) -> Image.Image:
+        """One page, without reading the others."""
+        meta = self.ensure_derivatives(h)
+        if meta["kind"] != "pdf":
+            return decode_document(self.original(h))[page]
+        return self._image(f"{h}/page-{page}.png")
+
+    def page_bytes(self, h: str, page: int = 0) -> bytes:
+        """One page encoded: the original of an image upload, the stored PNG of a PDF page."""
+        meta = self.ensure_derivatives(h)
+        if meta["kind"] != "pdf":
+            return self.original(h)
+        return self.backend.get(f"{h}/page-{page}.png")
+
+    def gray(self, h: str, page: int = 0) -> np.ndarray:
+        """Page as uint8 grayscale; a read-only memory map when the backend has local files."""
+        self.ensure_derivatives(h)
+        key = f"{h}/gray-{page}.npy"
+        path = self.backend.local_path(key)
+        if path is not None:
+            return np.load(path, mmap_mode="r")
+        return np.load(io.BytesIO(self.backend.get(key)), allow_pickle=False)
+
+    def gray_pages(self, h: str) -> List[Image.Image]:
+        """Every page as a mode "L" image over gray() (what tesseract binarises anyway)."""
+        meta = self.ensure_derivatives(h)
+        return [Image.fromarray(self.gray(h, i)) for i in range(meta["pages"])]
+
+    def thumbnail(self, h: str, page: int = 0) -> bytes:
+        self.ensure_derivatives(h)
+        return self.backend.get(f"{h}/thumb-{page}.jpg")
+
+    def _image(self, key: str) -> Image.Image:
+        path = self.backend.local_path(key)
+        img = Image.open(path if path is not None else io.BytesIO(self.backend.get(key)))
+        img.load()
+        return img
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_document_store(url: str = None) -> DocumentStore:
+    """Shared store per URL (file://<dir> or memory://)."""
+    url = url or settings.DOCUMENT_STORE_URL
+    with _STORES_LOCK:
+        store = _STORES.get(url)
+        if store is None:
+            if url.startswith("file://"):
+                store = DocumentStore(FileBackend(url[len("file://"):]))
+            elif url == "memory://":
+                store = DocumentStore(MemoryBackend())
+            else:
+                raise ValueError(f"Unsupported DOCUMENT_STORE_URL: {url}")
+            _STORES[url] = store
+        return store
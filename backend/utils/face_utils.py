@@ -0,0 +1,240 @@
+# backend/utils/face_utils.py
+"""
+CPU-only face subsystem.
+
+  - detect_and_embed()  : insightface (ONNX, CPUExecutionProvider) -> L2-normalised
+                          embedding of the largest face in an image
+  - EmbeddingCache      : LRU of embeddings keyed by image content hash
+  - FaceIndex           : nearest-neighbour search over every stored embedding.
+                          Brute-force NumPy matmul for small sets; above
+                          brute_force_max it switches to an IVF layout
+                          (k-means coarse partitions + int8 scalar-quantised
+                          vectors, only nprobe partitions scanned per query).
+"""
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from backend.config import settings
+
+EMBEDDING_DIM = 512
+
+_FACE_APP = None
+_FACE_APP_LOCK = threading.Lock()
+
+
+# -------- Model --------
+def load_face_app():
+    """
+    Load the insightface detector + recogniser once, pinned to CPU.
+    """
+    global _FACE_APP
+    with _FACE_APP_LOCK:
+        if _FACE_APP is None:
+            from insightface.app import FaceAnalysis
+            app = FaceAnalysis(
+                name=settings.FACE_MODEL_NAME,
+                allowed_modules=["detection", "recognition"],
+                providers=["CPUExecutionProvider"],
+            )
+            app.prepare(ctx_id=-1, det_size=(settings.FACE_DET_SIZE, settings.FACE_DET_SIZE))
+            _FACE_APP = app
+        return _FACE_APP
+
+
+def image_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def decode_image(data: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+def detect_and_embed(img: Image.Image) -> Optional[np.ndarray]:
+    """
+    Embedding (float32, unit norm) of the largest detected face, or None.
+    Large photos are downscaled first: detection runs at FACE_DET_SIZE anyway.
+    """
+    rgb = img.convert("RGB")
+    limit = settings.FACE_MAX_SIDE
+    if max(rgb.size) > limit:
+        scale = limit / float(max(rgb.size))
+        rgb = rgb.resize((int(rgb.size[0] * scale), int(rgb.size[1] * scale)), Image.BILINEAR)
+    bgr = np.asarray(rgb)[:, :, ::-1].copy()
+
+    faces = load_face_app().get(bgr)
+    if not faces:
+        return None
+    face = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
+    emb = np.asarray(face.embedding, dtype=np.float32)
+    return emb / max(float(np.linalg.norm(emb)), 1e-12)
+
+
+def match_score(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Cosine similarity of two unit embeddings, clipped to [0, 1].
+    """
+    return float(np.clip(np.dot(a, b), 0.0, 1.0))
+
+
+# -------- Embedding cache --------
+class EmbeddingCache:
+    """
+    Thread-safe LRU: image hash -> embedding (None = no face found, also cached).
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return False, None
+            self._data.move_to_end(key)
+            return True, self._data[key]
+
+    def put(self, key: str, emb: Optional[np.ndarray]):
+        with self._lock:
+            self._data[key] = emb
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+
+# -------- Nearest-neighbour index --------
+class FaceIndex:
+    """
+    ids (e.g. app_id) + unit embeddings. search() returns [(id, score)] best first.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, brute_force_max: int = 20000, nprobe: int = 8):
+        self.dim = dim
+        self.brute_force_max = brute_force_max
+        self.nprobe = nprobe
+        self.n = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vecs = np.empty((0, dim), dtype=np.float32)     # brute-force mode
+        self._codes = np.empty((0, dim), dtype=np.int8)       # IVF mode
+        self.centroids = None
+        self._lists = None
+        self._trained_n = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def partitioned(self) -> bool:
+        return self.centroids is not None
+
+    # ---- storage helpers ----
+    @staticmethod
+    def _grow(arr: np.ndarray, needed: int) -> np.ndarray:
+        if arr.shape[0] >= needed:
+            return arr
+        cap = max(needed, arr.shape[0] * 2, 1024)
+        out = np.empty((cap,) + arr.shape[1:], dtype=arr.dtype)
+        out[:arr.shape[0]] = arr
+        return out
+
+    @staticmethod
+    def _quantise(vecs: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vecs * 127.0), -127, 127).astype(np.int8)
+
+    # ---- writes ----
+    def add(self, ids, vecs: np.ndarray):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        vecs = np.asarray(vecs, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            start, end = self.n, self.n + len(ids)
+            self._ids = self._grow(self._ids, end)
+            self._ids[start:end] = ids
+            if self.partitioned:
+                self._codes = self._grow(self._codes, end)
+                self._codes[start:end] = self._quantise(vecs)
+                assign = np.argmax(vecs @ self.centroids.T, axis=1)
+                for row, c in zip(range(start, end), assign.tolist()):
+                    self._lists[c].append(row)
+            else:
+                self._vecs = self._grow(self._vecs, end)
+                self._vecs[start:end] = vecs
+            self.n = end
+
+            if (not self.partitioned and self.n > self.brute_force_max) or \
+                    (self.partitioned and self.n > 2 * self._trained_n):
+                self.train()
+
+    def train(self, iterations: int = 10, sample: int = 50000, seed: int = 0):
+        """
+        Spherical k-means coarse quantiser with ~4*sqrt(n) partitions,
+        then re-assign every vector and switch storage to int8 codes.
+        """
+        with self._lock:
+            vecs = self._all_vectors()
+            n = vecs.shape[0]
+            nlist = max(1, int(4 * np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            train = vecs[rng.choice(n, min(n, sample), replace=False)]
+            centroids = train[rng.choice(train.shape[0], min(nlist, train.shape[0]), replace=False)].copy()
+            for _ in range(iterations):
+                assign = np.argmax(train @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, train)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                empty = norms[:, 0] == 0
+                sums[empty] = centroids[empty]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+            lists = [[] for _ in range(centroids.shape[0])]
+            for lo in range(0, n, 65536):
+                assign = np.argmax(vecs[lo:lo + 65536] @ centroids.T, axis=1)
+                for row, c in enumerate(assign.tolist(), start=lo):
+                    lists[c].append(row)
+
+            self.centroids = centroids.astype(np.float32)
+            self._lists = lists
+            self._codes = self._quantise(vecs)
+            self._vecs = np.empty((0, self.dim), dtype=np.float32)
+            self._trained_n = n
+
+    def _all_vectors(self) -> np.ndarray:
+        if self.partitioned:
+            return self._codes[:self.n].astype(np.float32) / 127.0
+        return self._vecs[:self.n]
+
+    # ---- reads ----
+    def search(self, vec: np.ndarray, k: int = 5, exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        q = np.asarray(vec, dtype=np.float32).ravel()
+        with self._lock:
+            if self.n == 0:
+                return []
+            if not self.partitioned:
+                rows = np.arange(self.n)
+                scores = self._vecs[:self.n] @ q
+            else:
+                cs = self.centroids @ q
+                probe = np.argsort(-cs)[:self.nprobe]
+                rows = np.concatenate([np.asarray(self._lists[c], dtype=np.int64) for c in probe])
+                if rows.size == 0:
+                    return []
+                scores = (self._codes[rows].astype(np.float32) @ q) / 127.0
+            ids = self._ids[rows]
+
+        if exclude_id is not None:
+            keep = ids != exclude_id
+            ids, scores = ids[keep], scores[keep]
+        if ids.size == 0:
+            return []
+        k = min(k, ids.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
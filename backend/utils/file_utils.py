@@ -0,0 +1,54 @@
+# backend/utils/file_utils.py
+"""
+File helpers shared by the on-disk stores (analytics snapshot, KYC archive).
+
+  write_atomic(path, data)   readers see the old file or the new one, never a partial write
+  run_lock(path, busy)       cross-process "one run at a time" lock (O_EXCL file)
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Union
+
+STALE_LOCK_SECONDS = 3600
+
+
+def write_atomic(path: str, data: Union[bytes, Callable]):
+    """Write bytes, or call data(f) with the open file, to a temp file renamed over path."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, "wb") as f:
+            if callable(data):
+                data(f)
+            else:
+                f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def run_lock(path: str, busy: str):
+    """
+    Hold the lock file `path` for the block; RuntimeError(busy) if another
+    process holds it. A lock older than STALE_LOCK_SECONDS is left over from a
+    crashed run and taken over.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+            os.unlink(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        raise RuntimeError(busy)
+    try:
+        yield
+    finally:
+        os.unlink(path)
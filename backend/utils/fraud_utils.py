@@ -0,0 +1,179 @@
+# backend/utils/fraud_utils.py
+"""
+Vectorised document-forensics checks (NumPy only, no per-pixel Python loops).
+
+All checks take arrays / images that were already decoded for OCR:
+  - laplacian_variance     : sharpness (low -> blurry)
+  - error_level_analysis   : JPEG re-save residual, hot regions hint at pasted content
+  - copy_move_score        : identical textured blocks at different positions
+  - font_inconsistency     : glyph height / ink density of field words vs the rest of the card
+"""
+import io
+import re
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageChops
+
+# Field tokens we care about on the cards (PAN and Aadhaar digit groups)
+FIELD_TOKEN_RE = re.compile(r"^([A-Z]{5}[0-9]{4}[A-Z]|[0-9]{4})$")
+
+
+# -------- Sharpness --------
+def laplacian_variance(gray: np.ndarray) -> float:
+    """
+    Variance of the 4-neighbour Laplacian. gray is a 2-D float array.
+    """
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    lap = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4.0 * gray[1:-1, 1:-1]
+    )
+    return float(lap.var())
+
+
+# -------- Error level analysis --------
+def error_level_analysis(img: Image.Image, quality: int = 90, block: int = 32) -> dict:
+    """
+    Re-save as JPEG and measure the residual per block.
+    Returns mean residual and ratio of the hottest block to the median
+    non-blank block (blank paper compresses perfectly and would skew the median).
+    """
+    rgb = img.convert("RGB")
+    buf = io.BytesIO()
+    rgb.save(buf, "JPEG", quality=quality)
+    buf.seek(0)
+    resaved = Image.open(buf)
+    diff = np.asarray(ImageChops.difference(rgb, resaved), dtype=np.float32).max(axis=2)
+
+    h = (diff.shape[0] // block) * block
+    w = (diff.shape[1] // block) * block
+    if h == 0 or w == 0:
+        return {"ela_mean": float(diff.mean()) if diff.size else 0.0, "ela_ratio": 0.0}
+
+    blocks = diff[:h, :w].reshape(h // block, block, w // block, block).mean(axis=(1, 3))
+    content = blocks[blocks > 0.05]
+    if content.size == 0:
+        return {"ela_mean": round(float(diff.mean()), 4), "ela_ratio": 0.0}
+    median = float(np.median(content))
+    ratio = float(content.max() / max(median, 1.0))
+    return {"ela_mean": round(float(diff.mean()), 4), "ela_ratio": round(ratio, 4)}
+
+
+# -------- Copy-move --------
+def _box_sums(sat: np.ndarray, size: int) -> np.ndarray:
+    """
+    Sum of every size x size window from a summed-area table (top-left anchored).
+    """
+    return sat[size:, size:] - sat[:-size, size:] - sat[size:, :-size] + sat[:-size, :-size]
+
+
+def _summed_area(a: np.ndarray) -> np.ndarray:
+    sat = np.zeros((a.shape[0] + 1, a.shape[1] + 1))
+    sat[1:, 1:] = a.cumsum(axis=0).cumsum(axis=1)
+    return sat
+
+
+def copy_move_score(gray: np.ndarray, block: int = 16, stride: int = 1,
+                    levels: int = 16, min_std: float = 12.0, min_shift: int = 32) -> float:
+    """
+    Fraction of textured blocks cloned along the dominant shift vector.
+    Every block gets a 64-bit signature (4x4 grid of sub-block means, 16 levels
+    each); blocks with an identical twin at least min_shift pixels away are
+    grouped by offset, and a pasted region shows up as many blocks sharing
+    one offset. Flat background blocks are ignored.
+    """
+    if gray.shape[0] < block or gray.shape[1] < block:
+        return 0.0
+
+    g = gray.astype(np.float64)
+    sub = block // 4
+    area = float(block * block)
+
+    # block mean / std at every position from summed-area tables
+    mean = _box_sums(_summed_area(g), block) / area
+    sq = _box_sums(_summed_area(g * g), block) / area
+    std = np.sqrt(np.maximum(sq - mean * mean, 0.0))
+
+    # sub-block means at every position; block (y, x) uses 16 of them
+    sub_mean = _box_sums(_summed_area(g), sub) / float(sub * sub)
+    ny, nx = std.shape
+    ys, xs = np.mgrid[0:ny:stride, 0:nx:stride]
+    textured = std[ys, xs] >= min_std
+    ys = ys[textured]
+    xs = xs[textured]
+    if ys.size < 2:
+        return 0.0
+
+    q = np.minimum(sub_mean * (levels / 256.0), levels - 1).astype(np.uint64)
+    keys = np.zeros(ys.shape, dtype=np.uint64)
+    for i in range(4):
+        for j in range(4):
+            keys = (keys << np.uint64(4)) | q[ys + i * sub, xs + j * sub]
+
+    order = np.lexsort((xs, ys, keys))
+    keys = keys[order]
+    ys = ys[order]
+    xs = xs[order]
+
+    dy = ys[1:] - ys[:-1]
+    dx = xs[1:] - xs[:-1]
+    same = keys[1:] == keys[:-1]
+    far = (np.abs(dy) + np.abs(dx)) >= min_shift
+    matches = same & far
+    if not matches.any():
+        return 0.0
+
+    # canonical offset sign so (a->b) and (b->a) count together
+    dy = dy[matches]
+    dx = dx[matches]
+    flip = (dy < 0) | ((dy == 0) & (dx < 0))
+    dy = np.where(flip, -dy, dy)
+    dx = np.where(flip, -dx, dx)
+    _, counts = np.unique(np.stack([dy, dx], axis=1), axis=0, return_counts=True)
+    return round(float(counts.max()) / float(keys.size), 4)
+
+
+# -------- Font inconsistency around OCR fields --------
+def font_inconsistency(gray: np.ndarray, word_data: Optional[dict], ink_threshold: float = 128.0) -> float:
+    """
+    Robust z-score (max over field words) of glyph height and ink density of
+    PAN / Aadhaar field tokens relative to all other words on the card.
+    word_data is pytesseract image_to_data output on the SAME image as gray.
+    """
+    if not word_data:
+        return 0.0
+
+    texts = [(t or "").strip().upper() for t in word_data.get("text", [])]
+    keep = np.array([bool(t) and any(c.isalnum() for c in t) for t in texts])
+    if keep.sum() < 4:
+        return 0.0
+
+    left = np.asarray(word_data["left"], dtype=int)[keep]
+    top = np.asarray(word_data["top"], dtype=int)[keep]
+    width = np.asarray(word_data["width"], dtype=int)[keep]
+    height = np.asarray(word_data["height"], dtype=int)[keep]
+    words = [t for t, k in zip(texts, keep) if k]
+    is_field = np.array([bool(FIELD_TOKEN_RE.match(w)) for w in words])
+    if not is_field.any() or is_field.all():
+        return 0.0
+
+    # ink density per box via a summed-area table (O(1) per box)
+    ink = (gray < ink_threshold).astype(np.float64)
+    sat = _summed_area(ink)
+    y0 = np.clip(top, 0, ink.shape[0])
+    x0 = np.clip(left, 0, ink.shape[1])
+    y1 = np.clip(top + height, 0, ink.shape[0])
+    x1 = np.clip(left + width, 0, ink.shape[1])
+    area = np.maximum((y1 - y0) * (x1 - x0), 1)
+    density = (sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]) / area
+
+    def robust_z(values):
+        ref = values[~is_field]
+        med = np.median(ref)
+        mad = np.median(np.abs(ref - med)) * 1.4826
+        return np.abs(values[is_field] - med) / max(mad, 0.05 * abs(med), 1e-3)
+
+    z = np.maximum(robust_z(height.astype(float)).max(), robust_z(density).max())
+    return round(float(z), 4)
@@ -0,0 +1,201 @@
+# backend/utils/idempotency.py
+"""
+Idempotent POST handling for endpoints that mobile clients retry
+(/apply, /agent/ocr/both).
+
+key = sha256(endpoint, Idempotency-Key header)   when the client sends one
+      sha256(endpoint, payload fingerprint)      otherwise (body + uploaded bytes)
+
+  1. same process: a duplicate awaits the first call's future (no DB polling)
+  2. across workers: the first request INSERTs an IN_PROGRESS row (the primary
+     key is the claim); duplicates poll until it is COMPLETED
+  3. the response is stored and replayed until IDEMPOTENCY_TTL, with an
+     `Idempotent-Replayed: true` header
+  4. an exception releases the claim, so the next retry executes again
+  5. an IN_PROGRESS claim older than IDEMPOTENCY_LEASE is treated as abandoned
+"""
+import json
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import IdempotencyKey
+
+IN_PROGRESS, COMPLETED = "IN_PROGRESS", "COMPLETED"
+
+_INFLIGHT = {}            # key -> (request_hash, asyncio.Future)
+_LAST_PURGE = [0.0]
+
+
+def fingerprint(*parts) -> str:
+    """sha256 over str / bytes / JSON-able parts (dict keys sorted)."""
+    h = hashlib.sha256()
+    for p in parts:
+        if p is None:
+            p = b""
+        elif isinstance(p, str):
+            p = p.encode()
+        elif not isinstance(p, bytes):
+            p = json.dumps(jsonable_encoder(p), sort_keys=True, separators=(",", ":")).encode()
+        h.update(len(p).to_bytes(8, "big"))
+        h.update(p)
+    return h.hexdigest()
+
+
+def make_key(endpoint: str, client_key: Optional[str], request_hash: str) -> str:
+    if client_key:
+        return fingerprint(endpoint, "key", client_key)
+    return fingerprint(endpoint, "payload", request_hash)
+
+
+# -----------------------
+# DB claim / store (blocking, run in threadpool)
+# -----------------------
+def _claim(key: str, endpoint: str, request_hash: str):
+    """
+    Claim the key (returns None) or return the stored (status_code, body).
+    Waits while another worker holds an IN_PROGRESS claim.
+    """
+    deadline = time.time() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while True:
+        db = SessionLocal()
+        try:
+            now = datetime.now()
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is None or row.expires_at <= now:
+                if row is not None:
+                    db.delete(row)
+                    db.flush()
+                db.add(IdempotencyKey(
+                    key=key,
+                    endpoint=endpoint,
+                    request_hash=request_hash,
+                    state=IN_PROGRESS,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE),
+                ))
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()          # another worker claimed it first
+                    continue
+            if row.request_hash != request_hash:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            if row.state == COMPLETED:
+                return row.status_code, json.loads(row.response)
+        finally:
+            db.close()
+
+        if time.time() > deadline:
+            raise HTTPException(
+                status_code=409, detail="A request with this idempotency key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+
+def _complete(key: str, status_code: int, body):
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        if row is not None:
+            row.state = COMPLETED
+            row.status_code = status_code
+            row.response = json.dumps(body)
+            row.expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_TTL)
+        # opportunistic cleanup, at most once a minute per process
+        if time.time() - _LAST_PURGE[0] > 60:
+            _LAST_PURGE[0] = time.time()
+            db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _release(key: str):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key, IdempotencyKey.state == IN_PROGRESS
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+    finally:
+        db.close()
+
+
+# -----------------------
+# Entry point
+# -----------------------
+def _response(status_code: int, body, replayed: bool) -> JSONResponse:
+    return JSONResponse(
+        content=body, status_code=status_code,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+async def run_idempotent(endpoint: str, client_key: Optional[str], request_hash: str,
+                         fn: Callable[[], Awaitable], status_code: int = 200,
+                         store_if: Callable = None) -> JSONResponse:
+    """
+    Execute `fn` (async, returns a JSON-able body) at most once per key while
+    the key is live; duplicates get the stored response.
+    store_if(body) -> False skips storing (e.g. partial failures), so only
+    requests already waiting share that body and later retries run again.
+    """
+    key = make_key(endpoint, client_key, request_hash)
+
+    inflight = _INFLIGHT.get(key)
+    if inflight is not None:
+        if inflight[0] != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        code, body = await asyncio.shield(inflight[1])
+        return _response(code, body, replayed=True)
+
+    fut = asyncio.get_running_loop().create_future()
+    _INFLIGHT[key] = (request_hash, fut)
+    try:
+        stored = await run_in_threadpool(_claim, key, endpoint, request_hash)
+        if stored is not None:
+            fut.set_result(stored)
+            return _response(*stored, replayed=True)
+
+        try:
+            body = jsonable_encoder(await fn())
+        except BaseException:
+            await run_in_threadpool(_release, key)
+            raise
+        if store_if is None or store_if(body):
+            await run_in_threadpool(_complete, key, status_code, body)
+        else:
+            await run_in_threadpool(_release, key)
+        fut.set_result((status_code, body))
+        return _response(status_code, body, replayed=False)
+
+    except BaseException as e:
+        if fut.done():
+            pass
+        elif isinstance(e, asyncio.CancelledError):
+            fut.cancel()
+        else:
+            fut.set_exception(e)
+            fut.exception()       # mark retrieved when nobody was waiting
+        raise
+    finally:
+        _INFLIGHT.pop(key, None)
@@ -0,0 +1,336 @@
+# backend/utils/identity_utils.py
+"""
+Identity-reuse index: find applications that share an Aadhaar / PAN / phone /
+email, or whose name + address is a near-duplicate of another applicant.
+
+  - exact keys  : normalised value -> 64-bit hash -> app_ids
+  - near dups   : character-trigram MinHash (NUM_PERM permutations) split into
+                  BANDS x ROWS LSH bands; applicants sharing any band are candidates
+
+Both live in SortedMultiMap: one sorted NumPy array (binary search) plus a
+small dict of recent inserts that is merged in on compaction. That keeps
+10M+ applications in a few hundred MB and every lookup O(log n).
+"""
+import re
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+COMPACT_EVERY = 50000          # merge the insert buffer into the sorted arrays
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = (_rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)).reshape(-1, 1)
+_PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64).reshape(-1, 1)
+_FNV_PRIME = np.uint64(1099511628211)
+_BAND_SALT = (np.arange(BANDS, dtype=np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+
+EXACT_FIELDS = ("aadhaar", "pan", "phone", "email")
+
+
+# -------- Normalisation --------
+def normalize_aadhaar(v) -> str:
+    return re.sub(r"\D", "", v or "")
+
+
+def normalize_pan(v) -> str:
+    return re.sub(r"[^A-Z0-9]", "", (v or "").upper())
+
+
+def normalize_phone(v) -> str:
+    digits = re.sub(r"\D", "", v or "")
+    return digits[-10:]          # drop +91 / leading 0
+
+
+def normalize_email(v) -> str:
+    v = (v or "").strip().lower()
+    if "@" not in v:
+        return v
+    local, domain = v.rsplit("@", 1)
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+    return f"{local}@{domain}"
+
+
+def normalize_text(v) -> str:
+    v = re.sub(r"[^a-z0-9]+", " ", (v or "").lower())
+    return re.sub(r"\s+", " ", v).strip()
+
+
+NORMALIZERS = {
+    "aadhaar": normalize_aadhaar,
+    "pan": normalize_pan,
+    "phone": normalize_phone,
+    "email": normalize_email,
+}
+
+
+def key_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def identity_text(name, address) -> str:
+    return normalize_text(name) + " | " + normalize_text(address)
+
+
+# -------- MinHash / LSH --------
+def shingles(text: str) -> np.ndarray:
+    """
+    Unique character trigrams of text packed into uint64 (vectorised over the bytes).
+    """
+    b = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if b.size < 3:
+        b = np.concatenate([b, np.zeros(3 - b.size, dtype=np.uint64)])
+    grams = (b[:-2] << np.uint64(16)) | (b[1:-1] << np.uint64(8)) | b[2:]
+    return np.unique(grams)
+
+
+def jaccard(a: str, b: str) -> float:
+    sa = shingles(a)
+    sb = shingles(b)
+    inter = np.intersect1d(sa, sb, assume_unique=True).size
+    union = sa.size + sb.size - inter
+    return inter / union if union else 0.0
+
+
+def minhash_batch(texts: List[str]) -> np.ndarray:
+    """
+    (len(texts), NUM_PERM) uint64 MinHash signatures, one reduceat for the whole batch.
+    Uses multiply-shift hashing (uint64 wrap-around) so no modulo is needed.
+    """
+    parts = [shingles(t) for t in texts]
+    lengths = np.fromiter((p.size for p in parts), dtype=np.int64, count=len(parts))
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    flat = np.concatenate(parts)
+    hashed = (_PERM_A * flat + _PERM_B) >> np.uint64(32)
+    return np.minimum.reduceat(hashed, offsets, axis=1).T
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """
+    (n, BANDS) uint64 bucket keys; the band index is salted in so one map can hold all bands.
+    """
+    sig = signatures.reshape(-1, BANDS, ROWS)
+    h = np.broadcast_to(_BAND_SALT, sig.shape[:2]).copy()
+    for r in range(ROWS):
+        h = (h ^ sig[:, :, r]) * _FNV_PRIME
+    return h
+
+
+# -------- Storage --------
+class SortedMultiMap:
+    """
+    uint64 key -> uint32 values. Sorted base arrays + insert buffer.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.vals = np.empty(0, dtype=np.uint32)
+        self._buf_keys = []
+        self._buf_vals = []
+        self._delta = {}
+        self._chunks = []
+
+    def __len__(self):
+        return int(self.keys.size) + len(self._buf_keys) + sum(k.size for k, _ in self._chunks)
+
+    def add(self, key: int, val: int):
+        self._buf_keys.append(key)
+        self._buf_vals.append(val)
+        self._delta.setdefault(key, []).append(val)
+        if len(self._buf_keys) >= COMPACT_EVERY:
+            self.compact()
+
+    def extend(self, keys: np.ndarray, vals: np.ndarray):
+        """
+        Bulk insert (rebuilds go through here, not add()).
+        Chunks are only sorted in once, on the next compact() / read.
+        """
+        self._chunks.append((keys.astype(np.uint64).ravel(), vals.astype(np.uint32).ravel()))
+
+    def compact(self):
+        if not self._buf_keys and not self._chunks:
+            return
+        if not self._chunks:
+            self._merge_buffer()
+            return
+        key_parts = [self.keys] + [k for k, _ in self._chunks]
+        val_parts = [self.vals] + [v for _, v in self._chunks]
+        if self._buf_keys:
+            key_parts.append(np.asarray(self._buf_keys, dtype=np.uint64))
+            val_parts.append(np.asarray(self._buf_vals, dtype=np.uint32))
+        keys = np.concatenate(key_parts)
+        vals = np.concatenate(val_parts)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.vals = vals[order]
+        self._buf_keys = []
+        self._buf_vals = []
+        self._delta = {}
+        self._chunks = []
+
+    def _merge_buffer(self):
+        """
+        Insert buffer -> base without re-sorting the base: only the buffer is
+        sorted, then placed after equal keys (same order as a stable sort).
+        add() runs this every COMPACT_EVERY keys under the index lock, so it
+        stays one linear copy of the base instead of an n log n sort.
+        """
+        keys = np.asarray(self._buf_keys, dtype=np.uint64)
+        vals = np.asarray(self._buf_vals, dtype=np.uint32)
+        order = np.argsort(keys, kind="stable")
+        keys, vals = keys[order], vals[order]
+        pos = np.searchsorted(self.keys, keys, side="right")
+        self.keys = np.insert(self.keys, pos, keys)
+        self.vals = np.insert(self.vals, pos, vals)
+        self._buf_keys = []
+        self._buf_vals = []
+        self._delta = {}
+
+    def get(self, key: int) -> List[int]:
+        if self._chunks:
+            self.compact()
+        k = np.uint64(key)
+        lo = np.searchsorted(self.keys, k, side="left")
+        hi = np.searchsorted(self.keys, k, side="right")
+        out = self.vals[lo:hi].tolist()
+        out.extend(self._delta.get(key, ()))
+        return out
+
+    def get_many(self, keys: np.ndarray) -> List[int]:
+        if self._chunks:
+            self.compact()
+        keys = keys.astype(np.uint64).ravel()
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        out = []
+        for k, a, b in zip(keys.tolist(), lo.tolist(), hi.tolist()):
+            out.extend(self.vals[a:b].tolist())
+            out.extend(self._delta.get(k, ()))
+        return out
+
+
+class IdentityIndex:
+    """
+    Exact-key and near-duplicate index over applications.
+    Records are dicts with app_id, aadhaar, pan, phone, email, name, address.
+    max_app_id / max_updated_at are the watermarks of new rows / corrections
+    already indexed (fraud_agent._catch_up reads the table past them).
+    """
+
+    def __init__(self):
+        self.exact = {f: SortedMultiMap() for f in EXACT_FIELDS}
+        self.bands = SortedMultiMap()
+        self.max_app_id = 0
+        self.max_updated_at: Optional[datetime] = None     # corrections indexed up to here
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.bands) // BANDS
+
+    # ---- writes ----
+    def add(self, record: dict):
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[dict], bulk: bool = False, new_only: bool = False,
+                 update: bool = False):
+        """
+        new_only: skip records at or below max_app_id, checked under the lock,
+        so concurrent catch-ups never index an application twice.
+        update: records of indexed applications (corrections); only keys not
+        already held for that app_id are added.
+        """
+        records = list(records)
+        if not records:
+            return
+        ids = np.fromiter((int(r["app_id"]) for r in records), dtype=np.uint32, count=len(records))
+        sigs = minhash_batch([identity_text(r.get("name"), r.get("address")) for r in records])
+        bkeys = band_keys(sigs)
+
+        with self._lock:
+            if new_only:
+                keep = ids > self.max_app_id
+                if not keep.any():
+                    return
+                records = [r for r, k in zip(records, keep.tolist()) if k]
+                ids, bkeys = ids[keep], bkeys[keep]
+            for field in EXACT_FIELDS:
+                norm = NORMALIZERS[field]
+                pairs = [(key_hash(v), int(r["app_id"])) for r in records for v in [norm(r.get(field))] if v]
+                if not pairs:
+                    continue
+                if bulk:
+                    k, v = zip(*pairs)
+                    self.exact[field].extend(np.asarray(k, dtype=np.uint64), np.asarray(v, dtype=np.uint32))
+                else:
+                    for k, v in pairs:
+                        if not (update and v in self.exact[field].get(k)):
+                            self.exact[field].add(k, v)
+
+            if bulk:
+                self.bands.extend(bkeys.ravel(), np.repeat(ids, BANDS))
+            else:
+                for app_id, row in zip(ids.tolist(), bkeys.tolist()):
+                    for key in row:
+                        if not (update and app_id in self.bands.get(key)):
+                            self.bands.add(key, app_id)
+
+            self.max_app_id = max(self.max_app_id, int(ids.max()))
+
+    # ---- reads ----
+    def exact_matches(self, record: dict) -> Dict[str, List[int]]:
+        out = {}
+        with self._lock:
+            for field in EXACT_FIELDS:
+                v = NORMALIZERS[field](record.get(field))
+                if not v:
+                    continue
+                ids = sorted(set(self.exact[field].get(key_hash(v))) - {int(record.get("app_id") or 0)})
+                if ids:
+                    out[field] = ids
+        return out
+
+    def near_candidates(self, record: dict) -> Dict[int, int]:
+        """
+        app_id -> number of LSH bands shared with record (self excluded).
+        """
+        sig = minhash_batch([identity_text(record.get("name"), record.get("address"))])
+        with self._lock:
+            hits = self.bands.get_many(band_keys(sig))
+        counts = {}
+        self_id = int(record.get("app_id") or 0)
+        for app_id in hits:
+            if app_id != self_id:
+                counts[app_id] = counts.get(app_id, 0) + 1
+        return counts
+
+    # ---- persistence ----
+    def save(self, path: str):
+        with self._lock:
+            arrays = {
+                "max_app_id": np.asarray([self.max_app_id], dtype=np.int64),
+                "max_updated_at": np.asarray([self.max_updated_at or "NaT"], dtype="datetime64[us]"),
+            }
+            for field, m in list(self.exact.items()) + [("bands", self.bands)]:
+                m.compact()
+                arrays[f"{field}_keys"] = m.keys
+                arrays[f"{field}_vals"] = m.vals
+            np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IdentityIndex"]:
+        idx = cls()
+        with np.load(path) as data:
+            idx.max_app_id = int(data["max_app_id"][0])
+            if "max_updated_at" in data.files and not np.isnat(data["max_updated_at"][0]):
+                idx.max_updated_at = data["max_updated_at"][0].astype(datetime)
+            for field, m in list(idx.exact.items()) + [("bands", idx.bands)]:
+                m.keys = data[f"{field}_keys"]
+                m.vals = data[f"{field}_vals"]
+        return idx
@@ -0,0 +1,75 @@
+# backend/utils/lazy.py
+"""
+Deferred imports for heavy modules (agents pull in PIL, pytesseract,
+pdf2image, fuzzywuzzy, numpy and, through the models, lightgbm / insightface).
+
+    aadhar_agent = lazy_module("backend.agents.aadhar_agent")
+    ...
+    aadhar_agent.run_aadhaar_ocr_agent(app_id, pages=pages)   # imported here, once
+
+Routers hold module proxies instead of `from ... import` so importing
+backend.main stays cheap; the warmup (backend/startup.py) resolves them
+ahead of the readiness probe. Each first import is timed into IMPORT_TIMES.
+"""
+import sys
+import time
+import importlib
+import threading
+from types import ModuleType
+
+IMPORT_TIMES = {}                  # module name -> milliseconds of its first (cumulative) import
+_LOCK = threading.RLock()
+
+
+class LazyModule:
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with _LOCK:
+                if self._module is None:
+                    self._module = timed_import(self._name)
+                module = self._module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'loaded' if self._module is not None else 'not loaded'})>"
+
+
+_MODULES = {}
+
+
+def lazy_module(name: str) -> LazyModule:
+    """One shared proxy per module name."""
+    with _LOCK:
+        proxy = _MODULES.get(name)
+        if proxy is None:
+            proxy = _MODULES[name] = LazyModule(name)
+        return proxy
+
+
+def timed_import(name: str) -> ModuleType:
+    already = name in sys.modules
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    if not already:
+        IMPORT_TIMES.setdefault(name, round((time.perf_counter() - t0) * 1000, 1))
+    return module
+
+
+def lazy_modules() -> dict:
+    """name -> loaded? for every proxy created so far."""
+    with _LOCK:
+        return {name: proxy.loaded for name, proxy in _MODULES.items()}
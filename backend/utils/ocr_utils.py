@@ -0,0 +1,152 @@
+# backend/utils/ocr_utils.py
+"""
+Shared OCR plumbing used by the Aadhaar / PAN agents and document forensics.
+
+  - decode a document ONCE (image or PDF -> list of PIL pages) so OCR and
+    forensics work on the same in-memory pixels instead of re-reading disk
+  - a shared worker pool for tesseract calls and image checks
+  - image_to_data helpers that rebuild plain text AND keep word boxes
+"""
+import os
+import io
+import shutil
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+from PIL import Image
+from pdf2image import convert_from_path, convert_from_bytes
+import pytesseract
+
+from backend.config import settings
+from backend.utils.metrics import span, psm_of
+
+# tesseract is an external process, so a thread pool gives real parallelism
+OCR_POOL = ThreadPoolExecutor(max_workers=settings.OCR_WORKERS, thread_name_prefix="ocr")
+
+
+def pool_map(fn, items) -> list:
+    """
+    [fn(item) for item in items] fanned out over OCR_POOL; safe to call from
+    an OCR_POOL thread. Items no idle worker has started by the time the
+    caller waits for them run inline, so a saturated pool never blocks on
+    its own sub-tasks.
+    """
+    items = list(items)
+    if len(items) < 2:
+        return [fn(item) for item in items]
+    futures = [OCR_POOL.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [fn(item) if f.cancel() else f.result() for f, item in zip(futures, items)]
+
+
+# -----------------------
+# Uploads
+# -----------------------
+def save_temp_upload(upload, dir: str = None) -> str:
+    """Save a FastAPI UploadFile to a temporary file (in `dir` if given) and return its path."""
+    suffix = os.path.splitext(upload.filename or "")[1] or ".png"
+    if dir:
+        os.makedirs(dir, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=dir)
+    try:
+        with tmp as f:
+            shutil.copyfileobj(upload.file, f)
+        return tmp.name
+    except Exception:
+        try:
+            os.unlink(tmp.name)
+        except Exception:
+            pass
+        raise
+
+
+# -----------------------
+# Decoding
+# -----------------------
+def load_document_pages(path: str, dpi: int = None) -> List[Image.Image]:
+    """
+    Decode an uploaded document into PIL pages (PDF pages are rasterised).
+    Images are fully loaded so the file can be removed afterwards.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        with span("pdf_rasterise"):
+            pages = convert_from_path(path, dpi=dpi or settings.PDF_DPI)
+        if not pages:
+            raise RuntimeError("PDF conversion returned no pages")
+        return pages
+    with span("image_decode"):
+        img = Image.open(path)
+        img.load()
+    return [img]
+
+
+def is_pdf(data: bytes) -> bool:
+    return data[:1024].lstrip()[:5] == b"%PDF-"
+
+
+def decode_document(data: bytes, dpi: int = None) -> List[Image.Image]:
+    """load_document_pages for in-memory bytes; PDF vs image is sniffed, not taken from a filename."""
+    if is_pdf(data):
+        with span("pdf_rasterise"):
+            pages = convert_from_bytes(data, dpi=dpi or settings.PDF_DPI)
+        if not pages:
+            raise RuntimeError("PDF conversion returned no pages")
+        return pages
+    with span("image_decode"):
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    return [img]
+
+
+def to_gray_array(img: Image.Image, max_width: int = None) -> np.ndarray:
+    """
+    PIL image -> float32 grayscale array, optionally downscaled to max_width.
+    """
+    gray = img.convert("L")
+    if max_width and gray.size[0] > max_width:
+        w, h = gray.size
+        gray = gray.resize((max_width, max(1, int(h * max_width / w))), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float32)
+
+
+# -----------------------
+# OCR with word boxes
+# -----------------------
+def ocr_data(img: Image.Image, lang: str = "eng", config: str = "") -> dict:
+    """
+    pytesseract.image_to_data as a dict (text, left, top, width, height, conf, block/par/line ids).
+    """
+    with span("tesseract", psm=psm_of(config)):
+        return pytesseract.image_to_data(img, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+
+def text_from_data(data: dict) -> str:
+    """
+    Rebuild image_to_string-style text from image_to_data output:
+    words joined by spaces, one line per tesseract line, blank line between paragraphs.
+    """
+    lines = []
+    current_key = None
+    current_par = None
+    words = []
+    for i, txt in enumerate(data.get("text", [])):
+        txt = (txt or "").strip()
+        if not txt:
+            continue
+        par_key = (data["page_num"][i], data["block_num"][i], data["par_num"][i])
+        line_key = par_key + (data["line_num"][i],)
+        if line_key != current_key:
+            if words:
+                lines.append(" ".join(words))
+            if current_par is not None and par_key != current_par:
+                lines.append("")
+            words = []
+            current_key = line_key
+            current_par = par_key
+        words.append(txt)
+    if words:
+        lines.append(" ".join(words))
+    return "\n".join(lines) + "\n"
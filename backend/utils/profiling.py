@@ -0,0 +1,360 @@
+# backend/utils/profiling.py
+"""
+On-demand sampling profiler for single requests.
+
+A request is profiled when it carries `X-Profile: 1` (or `?profile=1`), or at
+random with probability PROFILE_SAMPLE_RATE. When ADMIN_TOKEN is set the flag
+must be the token instead of 1. The response then carries `X-Profile-Id`, and
+three files land in PROFILE_DIR:
+
+  <id>.collapsed          "thread;outer;...;leaf <microseconds>" (flamegraph.pl, speedscope)
+  <id>.speedscope.json    one time-ordered sampled profile per thread (speedscope.app)
+  <id>.json               request, duration and time per category
+
+How it works: one daemon thread wakes every PROFILE_INTERVAL seconds and,
+while any profile is active, reads sys._current_frames() for the threads that
+profile has registered. The request's event-loop thread is registered by the
+middleware; worker threads register themselves through metrics spans and DB
+statements while the request's context is active (run_in_threadpool and the
+executor helpers copy contextvars). Unregistered threads are never walked, so
+the cost outside profiled requests is one contextvar lookup per span.
+
+Categories come from the innermost recognised frame: ocr_subprocess
+(pytesseract / pdf2image / subprocess), pil, db (sqlalchemy / sqlite3),
+loop_wait (event loop idle in select) and python for the rest. The event loop
+thread is shared, so concurrent requests also show up in its samples.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+import contextvars
+from collections import Counter
+from typing import Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import settings
+
+MAX_DEPTH = 128
+PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+_PROFILE = contextvars.ContextVar("request_profile", default=None)
+
+_CATEGORIES = (
+    ("ocr_subprocess", ("pytesseract", "pdf2image", f"{os.sep}subprocess.py")),
+    ("pil", (f"{os.sep}PIL{os.sep}",)),
+    ("db", ("sqlalchemy", "sqlite3")),
+    ("loop_wait", (f"{os.sep}selectors.py",)),
+)
+
+
+def current_profile() -> Optional["Profile"]:
+    return _PROFILE.get()
+
+
+# -----------------------
+# Profile
+# -----------------------
+class Profile:
+    def __init__(self, meta: dict):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.meta = meta
+        self.started = time.perf_counter()
+        self.duration = None
+        self.truncated = False
+        self._threads = {}                 # thread id -> nesting depth
+        self._samples = []                 # (thread id, code tuple root..leaf, seconds)
+        self._last = self.started
+        self._lock = threading.Lock()
+
+    # threads ---------------------------------------------------------
+    def enter_thread(self):
+        tid = threading.get_ident()
+        with self._lock:
+            self._threads[tid] = self._threads.get(tid, 0) + 1
+
+    def leave_thread(self):
+        tid = threading.get_ident()
+        with self._lock:
+            n = self._threads.get(tid, 0) - 1
+            if n > 0:
+                self._threads[tid] = n
+            else:
+                self._threads.pop(tid, None)
+
+    # sampling (sampler thread) ---------------------------------------
+    def _sample(self, frames: dict, now: float):
+        weight, self._last = now - self._last, now
+        with self._lock:
+            tids = list(self._threads)
+        if len(self._samples) >= settings.PROFILE_MAX_SAMPLES:
+            self.truncated = True
+            return
+        for tid in tids:
+            frame = frames.get(tid)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            self._samples.append((tid, tuple(stack), weight))
+
+    # output ----------------------------------------------------------
+    def save(self, directory: str = None) -> dict:
+        directory = directory or settings.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        names = {t.ident: t.name for t in threading.enumerate()}
+        thread_name = lambda tid: names.get(tid, f"thread-{tid}")
+
+        categories, collapsed = Counter(), Counter()
+        for tid, stack, w in self._samples:
+            categories[_category(stack)] += w
+            collapsed[";".join([thread_name(tid)] + [_frame_name(c) for c in stack])] += w
+
+        base = os.path.join(directory, self.id)
+        with open(base + ".collapsed", "w") as f:
+            for line, w in collapsed.items():
+                f.write(f"{line} {max(1, round(w * 1e6))}\n")
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(self._speedscope(thread_name), f)
+
+        summary = dict(self.meta)
+        summary.update({
+            "id": self.id,
+            "duration_ms": round((self.duration or 0.0) * 1000, 1),
+            "samples": len(self._samples),
+            "truncated": self.truncated,
+            "interval_ms": settings.PROFILE_INTERVAL * 1000,
+            "category_ms": {k: round(v * 1000, 1) for k, v in categories.most_common()},
+        })
+        with open(base + ".json", "w") as f:
+            json.dump(summary, f)
+        _prune(directory)
+        return summary
+
+    def _speedscope(self, thread_name) -> dict:
+        frames, index, by_thread = [], {}, {}
+        for tid, stack, w in self._samples:
+            ids = []
+            for code in stack:
+                i = index.get(code)
+                if i is None:
+                    i = index[code] = len(frames)
+                    frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                ids.append(i)
+            samples, weights = by_thread.setdefault(tid, ([], []))
+            samples.append(ids)
+            weights.append(round(w * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.meta.get('method')} {self.meta.get('path')} ({self.id})",
+            "exporter": "agentic-lending profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_name(tid),
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 3),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for tid, (samples, weights) in by_thread.items()
+            ],
+        }
+
+
+def _frame_name(code) -> str:
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+def _category(stack) -> str:
+    for code in reversed(stack):
+        for name, needles in _CATEGORIES:
+            if any(n in code.co_filename for n in needles):
+                return name
+    return "python"
+
+
+def _prune(directory: str):
+    metas = sorted(f for f in os.listdir(directory) if PROFILE_ID.match(f[:-5]) and f.endswith(".json"))
+    for f in metas[: max(0, len(metas) - settings.PROFILE_KEEP)]:
+        for ext in (".json", ".collapsed", ".speedscope.json"):
+            try:
+                os.remove(os.path.join(directory, f[:-5] + ext))
+            except OSError:
+                pass
+
+
+# -----------------------
+# Sampler thread
+# -----------------------
+class _Sampler:
+    def __init__(self):
+        self.active = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, profile: Profile) -> bool:
+        with self.lock:
+            if len(self.active) >= settings.PROFILE_MAX_CONCURRENT:
+                return False
+            self.active.add(profile)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self.thread.start()
+            return True
+
+    def remove(self, profile: Profile):
+        with self.lock:
+            self.active.discard(profile)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.PROFILE_INTERVAL)
+            with self.lock:
+                profiles = list(self.active)
+                if not profiles:
+                    self.thread = None
+                    return
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for p in profiles:
+                p._sample(frames, now)
+            del frames
+
+
+_SAMPLER = _Sampler()
+
+
+def start_profile(meta: dict) -> Optional[Profile]:
+    """Start sampling; None when PROFILE_MAX_CONCURRENT profiles are already running."""
+    profile = Profile(meta)
+    return profile if _SAMPLER.add(profile) else None
+
+
+def stop_profile(profile: Profile):
+    _SAMPLER.remove(profile)
+    profile.duration = time.perf_counter() - profile.started
+
+
+# -----------------------
+# Sampling rate (shared by all workers through PROFILE_DIR)
+# -----------------------
+_RATE_CACHE = [0.0, None]          # checked_at, rate
+
+
+def sample_rate() -> float:
+    """PROFILE_SAMPLE_RATE, or the override set through PUT /admin/profiles/sampling."""
+    now = time.monotonic()
+    if now - _RATE_CACHE[0] > 5.0:
+        _RATE_CACHE[0] = now
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, "sample_rate")) as f:
+                _RATE_CACHE[1] = float(f.read().strip())
+        except (OSError, ValueError):
+            _RATE_CACHE[1] = None
+    return settings.PROFILE_SAMPLE_RATE if _RATE_CACHE[1] is None else _RATE_CACHE[1]
+
+
+def set_sample_rate(rate: Optional[float]):
+    """Override the sampling rate for every worker (None restores PROFILE_SAMPLE_RATE)."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILE_DIR, "sample_rate")
+    if rate is None:
+        if os.path.exists(path):
+            os.remove(path)
+    else:
+        with open(path, "w") as f:
+            f.write(repr(float(rate)))
+    _RATE_CACHE[0] = 0.0
+
+
+def list_profiles(limit: int = 50) -> list:
+    directory = settings.PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    metas = sorted((f for f in os.listdir(directory) if f.endswith(".json") and PROFILE_ID.match(f[:-5])),
+                   reverse=True)
+    out = []
+    for f in metas[:limit]:
+        try:
+            with open(os.path.join(directory, f)) as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+# -----------------------
+# Middleware
+# -----------------------
+def _requested(scope) -> Optional[bool]:
+    flag = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            flag = value.decode("latin-1")
+            break
+    if flag is None and scope.get("query_string"):
+        flag = (parse_qs(scope["query_string"].decode("latin-1")).get("profile") or [None])[0]
+    if flag is None:
+        return None
+    if settings.ADMIN_TOKEN:
+        return flag == settings.ADMIN_TOKEN
+    return flag.lower() not in ("", "0", "false", "no")
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; requests that are not profiled pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(("/admin", "/metrics")):
+            return await self.app(scope, receive, send)
+        wanted = _requested(scope)
+        if wanted is None:
+            wanted = random.random() < sample_rate()
+        profile = start_profile({
+            "method": scope["method"],
+            "path": scope["path"],
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }) if wanted else None
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _PROFILE.set(profile)
+        profile.enter_thread()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.leave_thread()
+            _PROFILE.reset(token)
+            stop_profile(profile)
+            profile.meta["status"] = status[0]
+            profile.meta["route"] = getattr(scope.get("route"), "path", None)
+            try:
+                await run_in_threadpool(profile.save)
+            except Exception:
+                pass                       # never fail a request on its profile
@@ -0,0 +1,153 @@
+# backend/utils/redis_utils.py
+"""
+Redis client factory.
+
+settings.REDIS_URL = "redis://..."  -> real redis-py client
+settings.REDIS_URL = "memory://"    -> LocalRedis, an in-process stand-in
+                                       (tests / no-network setups)
+"""
+import time
+import fnmatch
+import threading
+
+from backend.config import settings
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+class LocalRedis:
+    """
+    Minimal thread-safe subset of the redis-py API used in this codebase:
+    strings, hashes, expiry and pipelines.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expiry = {}
+        self._lock = threading.RLock()
+
+    # ---- internals ----
+    def _alive(self, key):
+        exp = self._expiry.get(key)
+        if exp is not None and exp <= time.time():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._data
+
+    # ---- strings ----
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = value if isinstance(value, bytes) else str(value).encode()
+            if ex:
+                self._expiry[key] = time.time() + ex
+            else:
+                self._expiry.pop(key, None)
+            return True
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            val = int(self._data[key]) if self._alive(key) else 0
+            val += amount
+            self._data[key] = str(val).encode()
+            return val
+
+    def delete(self, *keys):
+        with self._lock:
+            n = 0
+            for k in keys:
+                if self._alive(k):
+                    n += 1
+                self._data.pop(k, None)
+                self._expiry.pop(k, None)
+            return n
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expiry[key] = time.time() + seconds
+            return True
+
+    def keys(self, pattern="*"):
+        with self._lock:
+            return [k.encode() for k in list(self._data) if self._alive(k) and fnmatch.fnmatchcase(k, pattern)]
+
+    # ---- hashes ----
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            if not self._alive(key):
+                self._data[key] = {}
+            h = self._data[key]
+            if not isinstance(h, dict):
+                raise TypeError("WRONGTYPE")
+            field = field if isinstance(field, bytes) else str(field).encode()
+            h[field] = int(h.get(field, 0)) + amount
+            return h[field]
+
+    def hget(self, key, field):
+        with self._lock:
+            if not self._alive(key):
+                return None
+            field = field if isinstance(field, bytes) else str(field).encode()
+            v = self._data[key].get(field)
+            return None if v is None else str(v).encode()
+
+    def hgetall(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return {}
+            return {f: str(v).encode() for f, v in self._data[key].items()}
+
+    # ---- pipeline ----
+    def pipeline(self, transaction=True):
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._ops.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            out = [m(*a, **kw) for m, a, kw in self._ops]
+        self._ops = []
+        return out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._ops = []
+
+
+def get_redis(url: str = None):
+    """
+    Shared client per URL. Import redis lazily so the stand-in works without it.
+    """
+    url = url or settings.REDIS_URL
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(url)
+        if client is None:
+            if url.startswith("memory://"):
+                client = LocalRedis()
+            else:
+                import redis
+                client = redis.Redis.from_url(url)
+            _CLIENTS[url] = client
+        return client
@@ -0,0 +1,295 @@
+# backend/utils/retention.py
+"""
+Retention for OCR snapshots (kyc_data) and KYC runs (kyc_results).
+
+Every OCR retry adds a kyc_data row and every KYC run a kyc_results row.
+Only the newest RETENTION_KEEP rows per application stay in the live table
+(per document type for kyc_data: the agents and the incremental engine read
+the latest Aadhaar and the latest PAN snapshot). Older rows, and only those
+older than RETENTION_MIN_AGE_DAYS, move to compressed monthly partitions:
+
+    ARCHIVE_DIR/state.json                                    cursor / totals per table
+    ARCHIVE_DIR/kyc_data/2025-01/0000001200-0000001699.jsonl.gz   rows, one JSON object per line
+    ARCHIVE_DIR/kyc_data/2025-01/0000001200-0000001699.apps.npy   sorted app_ids in that file
+
+run_retention() is the throttled job (worker task "retention", POST
+/jobs/retention). It walks applications in app_id order from a saved
+cursor, and in each batch of at most RETENTION_BATCH rows it:
+  1. reads the rows (short read, session closed)
+  2. writes the archive file, then its app_id sidecar (atomic renames)
+  3. deletes exactly those ids in one short transaction
+then sleeps RETENTION_PAUSE so intake writes get the database. A run stops
+after RETENTION_MAX_SECONDS and the next resumes at the cursor. A crash
+between 2 and 3 leaves the rows live; they are archived again later and
+reads drop the duplicate (the live row wins).
+
+kyc_history() is the read path for audits: live and archived rows of one
+application merged by id, archived ones marked "archived": True. The
+sidecars let it open only the files that hold the application.
+
+Archived rows carry the same personal data as the live tables.
+"""
+import io
+import os
+import gzip
+import json
+import time
+import functools
+import threading
+from datetime import date, datetime, timedelta
+from typing import List
+
+import numpy as np
+from sqlalchemy import func
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import KYCData, KYCResult
+from backend.utils.file_utils import run_lock, write_atomic
+from backend.utils.metrics import Counter, register, span
+
+ARCHIVED_ROWS = register(Counter(
+    "lending_retention_archived_rows_total", "Rows moved from the live tables to the archive", ("table",)
+))
+
+TABLES = {
+    # group: rows ranked newest first within (app_id, group)
+    "kyc_data": {"model": KYCData, "group": lambda: KYCData.doc_type},      # AADHAAR / PAN
+    "kyc_results": {"model": KYCResult, "group": None},
+}
+_APPS_PER_STEP = 200
+_LOCK = threading.Lock()
+
+
+def _spec(table: str) -> dict:
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table}; one of {sorted(TABLES)}")
+    return TABLES[table]
+
+
+def _row_dict(model, row) -> dict:
+    out = {}
+    for col in model.__table__.columns:
+        v = getattr(row, col.name)
+        out[col.name] = v.isoformat() if isinstance(v, (datetime, date)) else v
+    return out
+
+
+# -----------------------
+# State
+# -----------------------
+def _state_path() -> str:
+    return os.path.join(settings.ARCHIVE_DIR, "state.json")
+
+
+def _load_state() -> dict:
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(state: dict):
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    write_atomic(_state_path(), json.dumps(state, indent=1).encode())
+
+
+# -----------------------
+# Archiving
+# -----------------------
+def _apps_over_limit(spec: dict, cursor: int) -> List[int]:
+    """Next app_ids after cursor with more than RETENTION_KEEP rows (uses the app_id index)."""
+    model = spec["model"]
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(model.app_id)
+            .filter(model.app_id > cursor)
+            .group_by(model.app_id)
+            .having(func.count(model.id) > settings.RETENTION_KEEP)
+            .order_by(model.app_id)
+            .limit(_APPS_PER_STEP)
+            .all()
+        )
+    finally:
+        db.close()
+    return [r[0] for r in rows]
+
+
+def _expired_ids(spec: dict, app_ids: List[int], cutoff: datetime) -> List[int]:
+    """Ids beyond the newest RETENTION_KEEP per (app_id, group) and older than cutoff."""
+    model = spec["model"]
+    group = spec["group"]() if spec["group"] is not None else None
+    db = SessionLocal()
+    try:
+        cols = [model.id, model.app_id, model.updated_at] + ([group] if group is not None else [])
+        rows = db.query(*cols).filter(model.app_id.in_(app_ids)).order_by(model.id.desc()).all()
+    finally:
+        db.close()
+    seen, expired = {}, []
+    for r in rows:
+        key = (r[1], r[3] if group is not None else None)
+        rank = seen[key] = seen.get(key, 0) + 1
+        if rank > settings.RETENTION_KEEP and (r[2] is None or r[2] < cutoff):
+            expired.append(r[0])
+    return sorted(expired)
+
+
+def _archive_batch(table: str, spec: dict, ids: List[int]) -> int:
+    model = spec["model"]
+    db = SessionLocal()
+    try:
+        rows = [_row_dict(model, r) for r in db.query(model).filter(model.id.in_(ids)).order_by(model.id).all()]
+    finally:
+        db.close()
+    if not rows:
+        return 0
+
+    months = {}
+    for r in rows:
+        months.setdefault((r["updated_at"] or "unknown")[:7], []).append(r)
+    for month, rs in months.items():
+        d = os.path.join(settings.ARCHIVE_DIR, table, month)
+        os.makedirs(d, exist_ok=True)
+        base = os.path.join(d, f"{rs[0]['id']:010d}-{rs[-1]['id']:010d}")
+        body = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in rs).encode()
+        write_atomic(base + ".jsonl.gz", gzip.compress(body, compresslevel=settings.ARCHIVE_COMPRESS_LEVEL))
+        apps = np.unique(np.asarray([-1 if r["app_id"] is None else r["app_id"] for r in rs], dtype=np.int64))
+        buf = io.BytesIO()
+        np.save(buf, apps, allow_pickle=False)
+        write_atomic(base + ".apps.npy", buf.getvalue())      # the sidecar publishes the file to readers
+
+    archived = [r["id"] for r in rows]
+    db = SessionLocal()
+    try:
+        db.query(model).filter(model.id.in_(archived)).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    ARCHIVED_ROWS.inc(table, amount=len(archived))
+    return len(archived)
+
+
+def run_retention(max_seconds: float = None, tables=None) -> dict:
+    """
+    Archive expired rows until done or max_seconds (RETENTION_MAX_SECONDS)
+    is spent; returns rows archived per table and where each cursor stands.
+    """
+    deadline = time.monotonic() + (max_seconds if max_seconds is not None else settings.RETENTION_MAX_SECONDS)
+    cutoff = datetime.now() - timedelta(days=settings.RETENTION_MIN_AGE_DAYS)
+    tables = list(tables or TABLES)
+    for t in tables:
+        _spec(t)
+    busy = "Another retention run is in progress"
+    with _LOCK, span("retention"), run_lock(os.path.join(settings.ARCHIVE_DIR, "retention.lock"), busy):
+        state = _load_state()
+        report = {}
+        for table in tables:
+            spec = TABLES[table]
+            entry = state.setdefault(table, {"cursor": 0, "archived": 0, "passes": 0})
+            n, done = 0, False
+            while time.monotonic() < deadline:
+                app_ids = _apps_over_limit(spec, entry["cursor"])
+                if not app_ids:
+                    entry["cursor"] = 0          # full pass; the next run starts over
+                    entry["passes"] += 1
+                    entry["last_pass"] = datetime.now().isoformat(timespec="seconds")
+                    done = True
+                    break
+                ids = _expired_ids(spec, app_ids, cutoff)
+                for i in range(0, len(ids), settings.RETENTION_BATCH):
+                    n += _archive_batch(table, spec, ids[i:i + settings.RETENTION_BATCH])
+                    time.sleep(settings.RETENTION_PAUSE)
+                    if time.monotonic() >= deadline:
+                        break
+                else:
+                    entry["cursor"] = app_ids[-1]    # only once the whole range is archived
+                _save_state(state)
+            entry["archived"] += n
+            _save_state(state)
+            report[table] = {"archived": n, "pass_complete": done, "cursor": entry["cursor"]}
+        return report
+
+
+# -----------------------
+# Read path (audits)
+# -----------------------
+@functools.lru_cache(maxsize=4096)
+def _file_apps(path: str) -> np.ndarray:
+    """App ids of one archive file (files are immutable once published)."""
+    return np.load(path, allow_pickle=False)
+
+
+def _archive_files(table: str, since=None, until=None) -> List[str]:
+    root = os.path.join(settings.ARCHIVE_DIR, table)
+    if not os.path.isdir(root):
+        return []
+    lo = since.strftime("%Y-%m") if since else None
+    hi = until.strftime("%Y-%m") if until else None
+    out = []
+    for month in sorted(os.listdir(root)):
+        if month != "unknown" and ((lo and month < lo) or (hi and month > hi)):
+            continue
+        d = os.path.join(root, month)
+        out += [os.path.join(d, f[:-len(".apps.npy")]) for f in sorted(os.listdir(d)) if f.endswith(".apps.npy")]
+    return out
+
+
+def kyc_history(app_id: int, table: str = "kyc_data", since=None, until=None,
+                include_archive: bool = True) -> List[dict]:
+    """
+    Every row of `table` for an application, live and archived, oldest
+    first (archived ones have "archived": True). since / until filter on
+    updated_at (dates or datetimes, until exclusive).
+    """
+    spec = _spec(table)
+    model = spec["model"]
+    lo = since.isoformat() if since else None
+    hi = until.isoformat() if until else None
+
+    def in_range(r):
+        ts = r.get("updated_at")
+        return (lo is None or (ts is not None and ts >= lo)) and (hi is None or (ts is not None and ts < hi))
+
+    db = SessionLocal()
+    try:
+        live = [dict(_row_dict(model, r), archived=False)
+                for r in db.query(model).filter(model.app_id == app_id).order_by(model.id).all()]
+    finally:
+        db.close()
+    rows = {r["id"]: r for r in live if in_range(r)}
+
+    if include_archive:
+        with span("archive_read"):
+            for base in _archive_files(table, since, until):
+                apps = _file_apps(base + ".apps.npy")
+                i = int(np.searchsorted(apps, app_id))
+                if i >= len(apps) or apps[i] != app_id:
+                    continue
+                with gzip.open(base + ".jsonl.gz", "rt") as f:
+                    for line in f:
+                        r = json.loads(line)
+                        if r["app_id"] == app_id and r["id"] not in rows and in_range(r):
+                            rows[r["id"]] = dict(r, archived=True)
+    return [rows[k] for k in sorted(rows)]
+
+
+def retention_status() -> dict:
+    state = _load_state()
+    tables = {}
+    for table in TABLES:
+        files = _archive_files(table)
+        tables[table] = dict(
+            state.get(table, {}),
+            archive_files=len(files),
+            archive_bytes=sum(os.path.getsize(b + ".jsonl.gz") for b in files),
+        )
+    return {
+        "keep_per_app": settings.RETENTION_KEEP,
+        "min_age_days": settings.RETENTION_MIN_AGE_DAYS,
+        "tables": tables,
+    }
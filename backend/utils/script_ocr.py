@@ -0,0 +1,234 @@
+# backend/utils/script_ocr.py
+"""
+Script-aware OCR for bilingual (Latin + Devanagari) documents.
+
+tesseract with "eng+hin" on every page roughly doubles OCR cost, and "eng"
+alone turns the Devanagari half of an Aadhaar card into noise. Instead:
+
+  1. the usual eng pass (image_to_data) segments the page into words and lines
+  2. every low-confidence word box is classified by a projection heuristic:
+     Devanagari words hang from a headline (shirorekha), a band of rows in
+     the upper part of the box that is ink across nearly the whole word;
+     Latin words have no such band
+  3. runs of adjacent Devanagari words on a line are cropped and read with
+     the Hindi model (--psm 7, one line) through the OCR worker pool
+  4. the Hindi text replaces the eng noise in the rebuilt text
+
+A page without Devanagari costs one small numpy pass per low-confidence
+word. If the Hindi traineddata is not installed, text is the plain eng pass.
+
+transliterate() turns Devanagari into plain lowercase Latin, so a name read
+from the Hindi line can be fuzzy-matched against the intake name.
+"""
+import functools
+import unicodedata
+from typing import List, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from backend.config import settings
+from backend.utils.metrics import Counter, register, span
+from backend.utils.ocr_utils import ocr_data, pool_map, text_from_data
+
+DEVANAGARI_REGIONS = register(Counter(
+    "lending_ocr_devanagari_regions_total", "Devanagari regions re-read with the Hindi model",
+    ("result",)     # replaced / kept (no Devanagari in the Hindi read) / failed
+))
+
+
+@functools.lru_cache(maxsize=None)
+def hindi_available() -> bool:
+    """Whether tesseract has the OCR_HINDI_LANG traineddata (checked once per process)."""
+    try:
+        return settings.OCR_HINDI_LANG in pytesseract.get_languages(config="")
+    except Exception:
+        return False        # no tesseract at all: the eng pass reports that itself
+
+
+# -----------------------
+# Script detection
+# -----------------------
+def _longest_run(row: np.ndarray) -> int:
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], row.astype(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max()) if edges.size else 0
+
+
+def headline_coverage(gray: np.ndarray) -> float:
+    """
+    Ink coverage of the best 3-row band in the upper 60% of a word box (the
+    band absorbs a pixel or two of skew), 0 unless one unbroken run in it
+    spans at least 40% of the word: a headline joins the letters, while
+    Latin letters, even with flat tops (T, E, F), are separated by spacing.
+    ~0.9 and up for a Devanagari word; 0 for boxes too small to tell.
+    """
+    h, w = gray.shape
+    if h < 8 or w < h:
+        return 0.0
+    lo, hi = float(gray.min()), float(gray.max())
+    if hi - lo < 40:
+        return 0.0
+    ink = gray < (lo + hi) / 2
+    xs = np.flatnonzero(ink.any(axis=0))
+    ink = ink[: max(3, int(h * 0.6)), xs[0]:xs[-1] + 1]
+    band = ink[:-2] | ink[1:-1] | ink[2:]
+    coverage = band.mean(axis=1)
+    best = int(coverage.argmax())
+    if _longest_run(band[best]) < 0.4 * band.shape[1]:
+        return 0.0
+    return float(coverage[best])
+
+
+def devanagari_regions(gray: np.ndarray, data: dict) -> List[Tuple[List[int], Tuple[int, int, int, int]]]:
+    """
+    Runs of adjacent Devanagari words on one tesseract line:
+    [(word indices into data, (x0, y0, x1, y1))].
+    """
+    regions, current, current_line = [], None, None
+    for i, level in enumerate(data["level"]):
+        if level != 5:
+            continue
+        x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        hit = (
+            float(data["conf"][i]) < settings.OCR_SCRIPT_CONF_MAX
+            and headline_coverage(gray[y:y + h, x:x + w]) >= settings.OCR_HEADLINE_MIN
+        )
+        if not hit:
+            current = None
+            continue
+        line = (data["page_num"][i], data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if current is not None and line == current_line:
+            idx, (x0, y0, x1, y1) = current
+            idx.append(i)
+            current[1] = (min(x0, x), min(y0, y), max(x1, x + w), max(y1, y + h))
+        else:
+            current = [[i], (x, y, x + w, y + h)]
+            current_line = line
+            regions.append(current)
+    return [(idx, box) for idx, box in regions]
+
+
+def devanagari_ratio(text: str) -> float:
+    """Share of letters in the Devanagari block."""
+    letters = [c for c in text if c.isalpha() or "ऀ" <= c <= "ॿ"]
+    if not letters:
+        return 0.0
+    return sum("ऀ" <= c <= "ॿ" for c in letters) / len(letters)
+
+
+# -----------------------
+# OCR
+# -----------------------
+def _read_region(img: Image.Image, box: Tuple[int, int, int, int]) -> str:
+    x0, y0, x1, y1 = box
+    pad = max(2, (y1 - y0) // 4)
+    crop = img.crop((max(0, x0 - pad), max(0, y0 - pad), x1 + pad, y1 + pad))
+    try:
+        data = ocr_data(crop, lang=settings.OCR_HINDI_LANG, config="--psm 7")
+    except pytesseract.TesseractError:
+        return None
+    return " ".join(t.strip() for t in data["text"] if t and t.strip())
+
+
+def text_with_devanagari(img: Image.Image, data: dict) -> str:
+    """
+    text_from_data(data) for an eng image_to_data pass over img, with its
+    Devanagari runs re-read by the Hindi model. data itself is not modified
+    (forensics use its boxes as they are).
+    """
+    if not settings.OCR_SCRIPT_DETECT or not hindi_available():
+        return text_from_data(data)
+    with span("script_detect"):
+        regions = devanagari_regions(np.asarray(img.convert("L")), data)
+    if not regions:
+        return text_from_data(data)
+
+    texts = pool_map(functools.partial(_read_region, img), [box for _, box in regions])
+    words = list(data["text"])
+    for (idx, _), hindi in zip(regions, texts):
+        if hindi is None:
+            DEVANAGARI_REGIONS.inc("failed")
+            continue
+        if devanagari_ratio(hindi) < 0.5:
+            DEVANAGARI_REGIONS.inc("kept")
+            continue
+        words[idx[0]] = hindi
+        for i in idx[1:]:
+            words[i] = ""
+        DEVANAGARI_REGIONS.inc("replaced")
+    return text_from_data(dict(data, text=words))
+
+
+# -----------------------
+# Transliteration (Devanagari -> plain Latin, as names are usually spelled)
+# -----------------------
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    "क़": "q", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f", "य़": "y",
+}
+_NUKTA_FORMS = {"क": "क़", "ख": "ख़", "ग": "ग़", "ज": "ज़", "ड": "ड़", "ढ": "ढ़", "फ": "फ़", "य": "य़"}
+_VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_MATRAS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o",
+}
+_NASALS = {"ं": "n", "ँ": "n", "ः": "h"}
+_VIRAMA = "्"
+_NUKTA = "़"
+_DIGITS = {chr(0x0966 + d): str(d) for d in range(10)}
+
+
+def _syllables(word: str) -> list:
+    """[consonant, vowel] units; vowel None = inherent schwa, "" = none."""
+    units = []
+    for ch in word:
+        last = units[-1] if units else None
+        if ch in _CONSONANTS:
+            units.append([ch, None])
+        elif ch == _NUKTA and last and last[0] in _NUKTA_FORMS and last[1] is None:
+            last[0] = _NUKTA_FORMS[last[0]]
+        elif ch in _MATRAS and last and last[0] in _CONSONANTS and last[1] is None:
+            last[1] = _MATRAS[ch]
+        elif ch == _VIRAMA and last and last[0] in _CONSONANTS and last[1] is None:
+            last[1] = ""
+        elif ch in _VOWELS:
+            units.append(["", _VOWELS[ch]])
+        elif ch in _NASALS:
+            units.append([ch, ""])
+        elif ch in _DIGITS:
+            units.append([_DIGITS[ch], ""])
+        elif ch.isascii():
+            units.append([ch, ""])
+    return units
+
+
+def _transliterate_word(word: str) -> str:
+    units = _syllables(word)
+    # schwa deletion, right to left: word-final, and medial between a vowel
+    # and a consonant+vowel (VC_CV): कमला -> kamla, राजेश -> rajesh
+    for i in range(len(units) - 1, 0, -1):
+        cons, vowel = units[i]
+        if vowel is not None or cons not in _CONSONANTS:
+            continue
+        nxt = units[i + 1] if i + 1 < len(units) else None
+        if nxt is None:
+            units[i][1] = ""
+        elif nxt[0] in _CONSONANTS and nxt[1] != "" and units[i - 1][1] != "":
+            units[i][1] = ""
+    return "".join(_CONSONANTS.get(c, _NASALS.get(c, c)) + ("a" if v is None else v) for c, v in units)
+
+
+def transliterate(text: str) -> str:
+    """Devanagari -> lowercase Latin (राहुल कुमार -> rahul kumar); other characters pass through."""
+    text = unicodedata.normalize("NFD", text)      # precomposed nukta letters (U+0958..) -> base + nukta
+    return " ".join(_transliterate_word(w) for w in text.split()).lower()
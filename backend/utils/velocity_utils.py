@@ -0,0 +1,262 @@
+# backend/utils/velocity_utils.py
+"""
+Sliding-window velocity counters ("applications from this phone in the last hour").
+
+Each signal has a window split into time buckets held in a ring:
+  - ExactWindowCounter : per-key ring buffer + running total
+  - SketchWindowCounter: ring of count-min sketches for high-cardinality keys
+                         (approximate, never under-counts, fixed memory)
+
+Recording and lookups are amortised O(1): advancing the clock only clears
+the buckets that fell out of the window and subtracts them from the total.
+ExactWindowCounter drops idle keys once per window from add(), so memory
+follows the keys seen in the last two windows, not every key ever seen.
+
+Optional Redis: every increment is also written to a Redis hash per
+(signal, bucket) and counts are read back from there (the live buckets
+summed), so all workers see each other's records; a restarted worker also
+replays the live window into its local counters. Without Redis the counts
+are per process, i.e. only right with a single worker.
+"""
+import time
+import hashlib
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def _bucket_of(ts: float, bucket_seconds: float) -> int:
+    return int(ts // bucket_seconds)
+
+
+class ExactWindowCounter:
+    """
+    Exact per-key counts over the last `window` seconds.
+    """
+
+    def __init__(self, window: float, buckets: int = 60):
+        self.window = float(window)
+        self.buckets = int(buckets)
+        self.bucket_seconds = self.window / self.buckets
+        self._keys = {}          # key -> [counts ndarray, last_bucket, total]
+        self._swept = None       # bucket of the last sweep
+        self._lock = threading.Lock()
+
+    def _advance(self, state, bucket: int):
+        counts, last, total = state
+        gap = bucket - last
+        if gap <= 0:
+            return
+        if gap >= self.buckets:
+            counts[:] = 0
+            total = 0
+        else:
+            idx = (np.arange(last + 1, bucket + 1)) % self.buckets
+            total -= int(counts[idx].sum())
+            counts[idx] = 0
+        state[1] = bucket
+        state[2] = total
+
+    def add(self, key: str, amount: int = 1, now: Optional[float] = None):
+        bucket = _bucket_of(time.time() if now is None else now, self.bucket_seconds)
+        with self._lock:
+            if self._swept is None:
+                self._swept = bucket
+            elif bucket - self._swept >= self.buckets:
+                self._sweep(bucket)
+            state = self._keys.get(key)
+            if state is None:
+                state = [np.zeros(self.buckets, dtype=np.int32), bucket, 0]
+                self._keys[key] = state
+            else:
+                self._advance(state, bucket)
+            if bucket < state[1] - self.buckets + 1:
+                return   # older than the window (late replay)
+            state[0][bucket % self.buckets] += amount
+            state[2] += amount
+
+    def count(self, key: str, now: Optional[float] = None) -> int:
+        bucket = _bucket_of(time.time() if now is None else now, self.bucket_seconds)
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                return 0
+            self._advance(state, bucket)
+            return int(state[2])
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Drop keys with no events inside the window. Returns number dropped.
+        """
+        bucket = _bucket_of(time.time() if now is None else now, self.bucket_seconds)
+        with self._lock:
+            return self._sweep(bucket)
+
+    def _sweep(self, bucket: int) -> int:
+        stale = [k for k, st in self._keys.items() if bucket - st[1] >= self.buckets]
+        for k in stale:
+            del self._keys[k]
+        self._swept = bucket
+        return len(stale)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class SketchWindowCounter:
+    """
+    Approximate per-key counts via a ring of count-min sketches.
+    Memory is buckets x depth x width regardless of key cardinality.
+    """
+
+    def __init__(self, window: float, buckets: int = 24, width: int = 2 ** 16, depth: int = 4):
+        self.window = float(window)
+        self.buckets = int(buckets)
+        self.bucket_seconds = self.window / self.buckets
+        self.width = int(width)
+        self.depth = int(depth)
+        self._ring = np.zeros((self.buckets, self.depth, self.width), dtype=np.int32)
+        self._total = np.zeros((self.depth, self.width), dtype=np.int64)
+        self._last = None
+        self._rows = np.arange(self.depth)
+        self._lock = threading.Lock()
+
+    def _cols(self, key: str) -> np.ndarray:
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        h1 = int.from_bytes(d[:4], "little")
+        h2 = int.from_bytes(d[4:], "little") | 1
+        return (h1 + self._rows * h2) % self.width
+
+    def _advance(self, bucket: int):
+        if self._last is None:
+            self._last = bucket
+            return
+        gap = bucket - self._last
+        if gap <= 0:
+            return
+        if gap >= self.buckets:
+            self._ring[:] = 0
+            self._total[:] = 0
+        else:
+            for b in range(self._last + 1, bucket + 1):
+                slot = b % self.buckets
+                self._total -= self._ring[slot]
+                self._ring[slot] = 0
+        self._last = bucket
+
+    def add(self, key: str, amount: int = 1, now: Optional[float] = None):
+        bucket = _bucket_of(time.time() if now is None else now, self.bucket_seconds)
+        cols = self._cols(key)
+        with self._lock:
+            self._advance(bucket)
+            if bucket < self._last - self.buckets + 1:
+                return
+            self._ring[bucket % self.buckets, self._rows, cols] += amount
+            self._total[self._rows, cols] += amount
+
+    def count(self, key: str, now: Optional[float] = None) -> int:
+        bucket = _bucket_of(time.time() if now is None else now, self.bucket_seconds)
+        cols = self._cols(key)
+        with self._lock:
+            self._advance(bucket)
+            return int(self._total[self._rows, cols].min())
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return 0
+
+    def __len__(self):
+        return 0
+
+
+class VelocityEngine:
+    """
+    Named velocity signals. signals: {name: {"window": s, "buckets": n, "mode": "exact"|"sketch"}}.
+    redis: optional client (real or LocalRedis); records are written through
+    and counts are read from it, so the counts are shared across workers.
+    """
+
+    def __init__(self, signals: Dict[str, dict], redis=None, prefix: str = "velocity"):
+        self.counters = {}
+        for name, spec in signals.items():
+            if spec.get("mode") == "sketch":
+                self.counters[name] = SketchWindowCounter(
+                    spec["window"], buckets=spec.get("buckets", 24),
+                    width=spec.get("width", 2 ** 16), depth=spec.get("depth", 4),
+                )
+            else:
+                self.counters[name] = ExactWindowCounter(spec["window"], buckets=spec.get("buckets", 60))
+        self.redis = redis
+        self.prefix = prefix
+
+    def _redis_key(self, name: str, bucket: int) -> str:
+        return f"{self.prefix}:{name}:{bucket}"
+
+    def record(self, name: str, key: Optional[str], amount: int = 1, now: Optional[float] = None):
+        if not key:
+            return
+        now = time.time() if now is None else now
+        counter = self.counters[name]
+        counter.add(key, amount, now=now)
+        if self.redis is not None:
+            bucket = _bucket_of(now, counter.bucket_seconds)
+            rkey = self._redis_key(name, bucket)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(rkey, key, amount)
+            pipe.expire(rkey, int(counter.window + counter.bucket_seconds) + 1)
+            pipe.execute()
+
+    def _live_buckets(self, name: str, now: float) -> range:
+        counter = self.counters[name]
+        current = _bucket_of(now, counter.bucket_seconds)
+        return range(current - counter.buckets + 1, current + 1)
+
+    def count(self, name: str, key: Optional[str], now: Optional[float] = None) -> int:
+        return self.count_many({name: key}, now=now)[name]
+
+    def count_many(self, keys: Dict[str, Optional[str]], now: Optional[float] = None) -> Dict[str, int]:
+        """
+        {signal: key} -> {signal: count}. With redis every live bucket is
+        read with HGET in one pipeline (exact counts, also for sketch signals).
+        """
+        now = time.time() if now is None else now
+        out = {name: 0 for name in keys}
+        live = {name: key for name, key in keys.items() if key}
+        if self.redis is None:
+            for name, key in live.items():
+                out[name] = self.counters[name].count(key, now=now)
+            return out
+        pipe = self.redis.pipeline(transaction=False)
+        spans = []
+        for name, key in live.items():
+            buckets = self._live_buckets(name, now)
+            for bucket in buckets:
+                pipe.hget(self._redis_key(name, bucket), key)
+            spans.append((name, len(buckets)))
+        values = pipe.execute()
+        i = 0
+        for name, n in spans:
+            out[name] = sum(int(v) for v in values[i:i + n] if v is not None)
+            i += n
+        return out
+
+    def restore(self, now: Optional[float] = None) -> int:
+        """
+        Replay the live window from Redis into the in-memory counters.
+        Returns number of (bucket, key) entries replayed.
+        """
+        if self.redis is None:
+            return 0
+        now = time.time() if now is None else now
+        replayed = 0
+        for name, counter in self.counters.items():
+            for bucket in self._live_buckets(name, now):
+                entries = self.redis.hgetall(self._redis_key(name, bucket))
+                for field, value in entries.items():
+                    key = field.decode() if isinstance(field, bytes) else field
+                    counter.add(key, int(value), now=(bucket + 0.5) * counter.bucket_seconds)
+                    replayed += 1
+        return replayed
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        return sum(c.sweep(now=now) for c in self.counters.values())
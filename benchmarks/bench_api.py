@@ -0,0 +1,185 @@
+# benchmarks/bench_api.py
+"""
+In-process load test of POST /apply and POST /agent/ocr/both.
+
+    python -m benchmarks.bench_api --requests 500 --concurrency 32
+    python -m benchmarks.bench_api --scenario ocr --requests 50 --concurrency 8 --dpi 200 --blur 0.5
+    python -m benchmarks.bench_api --scenario overload --requests 200 --concurrency 64 --deadline 10
+    python -m benchmarks.bench_api --scenario overload --requests 200 --concurrency 64 --deadline 10 --no-admission
+
+Requests go through httpx.ASGITransport straight into the FastAPI app (no
+sockets, no uvicorn), so the numbers cover routing, validation, middleware,
+idempotency, the agents and SQLite, not the network. Every request carries a
+distinct payload / document, so idempotent replays never short-circuit the work.
+
+The app runs against a scratch database (--workdir, default a temp dir).
+Without tesseract the OCR scenario still exercises upload, decode, the blur
+gate and forensics; the OCR agents then report errors, counted under
+result_errors.
+
+overload floods /agent/ocr/both while light GET / traffic runs alongside and
+reports OCR goodput (successful responses within --deadline per second) and
+light latency; compare with --no-admission to see what shedding buys. All
+requests come from one client, so per-client rate limits are off unless
+--client-rate is given.
+"""
+import sys
+import time
+import asyncio
+import argparse
+from collections import Counter
+from dataclasses import asdict
+
+import numpy as np
+
+from benchmarks.harness import latency_stats, add_result_args, finish, scratch_workdir
+from benchmarks.synthetic_docs import (
+    DocSpec, synthetic_applicant, application_payload, render_aadhaar, render_pan, to_bytes,
+    add_spec_args, spec_from_args,
+)
+
+
+async def _load(send, items, concurrency: int, deadline: float = None) -> dict:
+    """
+    Run send(item) for all items with at most `concurrency` in flight.
+    With a deadline, goodput counts successful responses that arrived in time.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    samples, statuses, errors, good = [], Counter(), [0], [0]
+
+    async def one(item):
+        async with sem:
+            t = time.perf_counter()
+            try:
+                resp = await send(item)
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+                return
+            elapsed = time.perf_counter() - t
+            samples.append(elapsed)
+            statuses[str(resp.status_code)] += 1
+            if resp.status_code < 400 and _has_result_error(resp):
+                errors[0] += 1
+            elif resp.status_code < 400 and deadline is not None and elapsed <= deadline:
+                good[0] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in items))
+    wall = time.perf_counter() - t0
+
+    stats = latency_stats(samples)
+    stats["rps"] = round(len(items) / wall, 1) if wall else None
+    stats["wall_seconds"] = round(wall, 3)
+    stats["status"] = dict(statuses)
+    stats["result_errors"] = errors[0]
+    if deadline is not None:
+        stats["goodput_per_s"] = round(good[0] / wall, 2) if wall else None
+    return stats
+
+
+def _has_result_error(resp) -> bool:
+    try:
+        body = resp.json()
+    except ValueError:
+        return False
+    results = body.get("results") if isinstance(body, dict) else None
+    return isinstance(results, dict) and any("error" in r for r in results.values() if isinstance(r, dict))
+
+
+async def _apply_all(client, payloads, concurrency: int):
+    ids = []
+
+    async def send(p):
+        resp = await client.post("/apply/", json=p)
+        if resp.status_code == 201:
+            ids.append(resp.json()["application_id"])
+        return resp
+
+    stats = await _load(send, payloads, concurrency)
+    return stats, ids
+
+
+async def run_async(scenario: str, n: int, concurrency: int, seed: int, spec: DocSpec,
+                    deadline: float = 10.0) -> dict:
+    import httpx
+    from backend.main import app
+    from backend import startup
+
+    # ASGITransport does not run the lifespan: warm up explicitly (untimed)
+    startup.warmup()
+
+    rng = np.random.default_rng(seed)
+    people = [synthetic_applicant(rng, i) for i in range(1, n + 1)]
+    payloads = [application_payload(p) for p in people]
+
+    result = {
+        "benchmark": f"api_{scenario}", "requests": n, "concurrency": concurrency,
+        "startup": {
+            "import_ms": startup.STATE["import_ms"],
+            "warmup_ms": startup.STATE["warmup_ms"],
+            "warmup_step_ms": {k: v["ms"] for k, v in startup.STATE["warmup"].items()},
+        },
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        if scenario == "apply":
+            result["apply"], _ = await _apply_all(client, payloads, concurrency)
+            return result
+
+        # ocr: applications are created first (untimed), documents rendered up front
+        _, ids = await _apply_all(client, payloads, concurrency)
+        uploads = [
+            (app_id, to_bytes(render_aadhaar(p, spec, rng)), to_bytes(render_pan(p, spec, rng)))
+            for app_id, p in zip(ids, people)
+        ]
+        result["spec"] = asdict(spec)
+
+        async def send(u):
+            app_id, aadhaar, pan = u
+            return await client.post(
+                "/agent/ocr/both",
+                data={"app_id": str(app_id)},
+                files={"aadhaar_document": ("aadhaar.png", aadhaar, "image/png"),
+                       "pan_document": ("pan.png", pan, "image/png")},
+            )
+
+        if scenario == "ocr":
+            result["ocr_both"] = await _load(send, uploads, concurrency)
+            return result
+
+        # overload: OCR flood + light requests at the same time
+        result["deadline_seconds"] = deadline
+        result["ocr_both"], result["light"] = await asyncio.gather(
+            _load(send, uploads, concurrency, deadline=deadline),
+            _load(lambda _: client.get("/"), range(n * 10), 8),
+        )
+        return result
+
+
+def run(scenario: str, n: int, concurrency: int, seed: int, spec: DocSpec, workdir: str = None,
+        deadline: float = 10.0, admission: bool = True, client_rate: bool = False) -> dict:
+    from backend.config import settings
+
+    settings.ADMISSION_ENABLED = admission
+    if not client_rate:
+        settings.ADMISSION_CLASSES = {k: dict(v, rate=None) for k, v in settings.ADMISSION_CLASSES.items()}
+    result = {"workdir": scratch_workdir(workdir), "admission": admission}
+    result.update(asyncio.run(run_async(scenario, n, concurrency, seed, spec, deadline)))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=("apply", "ocr", "overload"), default="apply")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", help="scratch directory for the app database (default: temp dir)")
+    parser.add_argument("--deadline", type=float, default=10.0, help="overload: seconds a client waits")
+    parser.add_argument("--no-admission", action="store_true", help="disable admission control")
+    parser.add_argument("--client-rate", action="store_true", help="keep per-client rate limits")
+    add_spec_args(parser)
+    add_result_args(parser)
+    args = parser.parse_args()
+    sys.exit(finish(run(args.scenario, args.requests, args.concurrency, args.seed, spec_from_args(args),
+                        args.workdir, args.deadline, not args.no_admission, args.client_rate), args))
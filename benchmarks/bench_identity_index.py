@@ -0,0 +1,157 @@
+# benchmarks/bench_identity_index.py
+"""
+Identity-reuse index benchmark (default: 10M synthetic applications).
+
+    python -m benchmarks.bench_identity_index --n 10000000
+
+Measures bulk build throughput, index size, and p50/p99 latency of exact-key
+lookups, near-duplicate (LSH) lookups and incremental inserts (plus the
+slowest insert: the one that merges the insert buffer). A fraction of
+the synthetic applicants reuse a PAN / phone or are near-duplicates of an
+earlier applicant, so recall of planted duplicates is reported as well.
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from backend.utils.identity_utils import BANDS, COMPACT_EVERY, IdentityIndex
+from benchmarks.harness import add_result_args, finish
+
+FIRST = ["RAHUL", "PRIYA", "AMIT", "SNEHA", "VIKRAM", "ANJALI", "ARJUN", "DIVYA", "KIRAN", "MEERA",
+         "ROHAN", "POOJA", "SURESH", "LAKSHMI", "NIKHIL", "KAVYA", "ARUN", "DEEPA", "MANOJ", "RITU"]
+LAST = ["SHARMA", "VERMA", "IYER", "REDDY", "NAIR", "GUPTA", "PATEL", "SINGH", "RAO", "MENON",
+        "JOSHI", "KUMAR", "DAS", "BOSE", "PILLAI", "MEHTA", "SHAH", "KAPOOR", "CHOPRA", "MISHRA"]
+STREETS = ["MG ROAD", "PARK STREET", "STATION ROAD", "GANDHI NAGAR", "LAKE VIEW", "TEMPLE STREET",
+           "NEHRU COLONY", "HILL ROAD", "MARKET LANE", "CANAL ROAD"]
+CITIES = ["BENGALURU", "CHENNAI", "MUMBAI", "PUNE", "HYDERABAD", "KOCHI", "DELHI", "JAIPUR"]
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def synthetic_batch(rng, start_id: int, n: int, dup_rate: float = 0.01):
+    """
+    n synthetic application records with app_id starting at start_id.
+    Returns (records, planted) where planted maps app_id -> (kind, source_app_id).
+    """
+    ids = np.arange(start_id, start_id + n)
+    aadhaar = rng.integers(10 ** 11, 10 ** 12, n)
+    phone = rng.integers(6 * 10 ** 9, 10 ** 10, n)
+    pan_letters = LETTERS[rng.integers(0, 26, (n, 6))]
+    pan_digits = rng.integers(1000, 10000, n)
+    first = rng.integers(0, len(FIRST), n)
+    middle = rng.integers(0, len(FIRST), n)
+    last = rng.integers(0, len(LAST), n)
+    house = rng.integers(1, 999, n)
+    street = rng.integers(0, len(STREETS), n)
+    city = rng.integers(0, len(CITIES), n)
+    pin = rng.integers(100000, 999999, n)
+
+    records = []
+    for i in range(n):
+        p = pan_letters[i]
+        records.append({
+            "app_id": int(ids[i]),
+            "aadhaar": f"{aadhaar[i]:012d}",
+            "pan": f"{''.join(p[:5])}{pan_digits[i]}{p[5]}",
+            "phone": f"+91{phone[i]}",
+            "email": f"user{ids[i]}@example.com",
+            "name": f"{FIRST[first[i]]} {FIRST[middle[i]]} {LAST[last[i]]}",
+            "address": f"{house[i]} {STREETS[street[i]]} {CITIES[city[i]]} {pin[i]}",
+        })
+
+    planted = {}
+    n_dup = int(n * dup_rate)
+    if n_dup and n > 1:
+        targets = rng.choice(np.arange(1, n), n_dup, replace=False)
+        for t in targets.tolist():
+            src = int(rng.integers(0, t))
+            kind = ("pan", "phone", "near")[t % 3]
+            if kind == "near":
+                s = records[src]
+                records[t]["name"] = s["name"].title()
+                records[t]["address"] = s["address"].replace("ROAD", "RD").lower()
+            else:
+                records[t][kind] = records[src][kind]
+            planted[records[t]["app_id"]] = (kind, records[src]["app_id"])
+    return records, planted
+
+
+def _pct(samples, q):
+    return round(float(np.percentile(np.asarray(samples) * 1000.0, q)), 4)
+
+
+def run(n: int, batch: int, queries: int, seed: int):
+    rng = np.random.default_rng(seed)
+    index = IdentityIndex()
+
+    probe = []              # records to query with
+    planted_probe = []      # (record, kind, source_app_id)
+
+    t0 = time.perf_counter()
+    next_id = 1
+    while next_id <= n:
+        size = min(batch, n - next_id + 1)
+        records, planted = synthetic_batch(rng, next_id, size)
+        index.add_many(records, bulk=True)
+        if len(probe) < queries:
+            probe.extend(records[: queries - len(probe)])
+        for aid, (kind, src) in planted.items():
+            if len(planted_probe) < queries:
+                planted_probe.append((records[aid - next_id], kind, src))
+        next_id += size
+    index.bands.compact()
+    for m in index.exact.values():
+        m.compact()
+    build_s = time.perf_counter() - t0
+
+    exact_lat, near_lat = [], []
+    for r in probe:
+        t = time.perf_counter()
+        index.exact_matches(r)
+        exact_lat.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        index.near_candidates(r)
+        near_lat.append(time.perf_counter() - t)
+
+    # recall of planted duplicates
+    found = 0
+    for r, kind, src in planted_probe:
+        if kind == "near":
+            found += src in index.near_candidates(r)
+        else:
+            found += src in index.exact_matches(r).get(kind, [])
+    total = len(planted_probe)
+
+    # enough inserts for the band map (BANDS keys per application) to compact at least once
+    insert_lat = []
+    extra, _ = synthetic_batch(rng, n + 1, max(queries, COMPACT_EVERY // BANDS + 1000), dup_rate=0.0)
+    for r in extra:
+        t = time.perf_counter()
+        index.add(r)
+        insert_lat.append(time.perf_counter() - t)
+
+    size_bytes = sum(m.keys.nbytes + m.vals.nbytes for m in list(index.exact.values()) + [index.bands])
+    return {
+        "benchmark": "identity_index",
+        "applications": n,
+        "build_seconds": round(build_s, 2),
+        "build_rate_per_s": round(n / build_s, 1),
+        "index_mb": round(size_bytes / 2 ** 20, 1),
+        "exact_lookup_ms": {"p50": _pct(exact_lat, 50), "p99": _pct(exact_lat, 99)},
+        "near_lookup_ms": {"p50": _pct(near_lat, 50), "p99": _pct(near_lat, 99)},
+        "incremental_add_ms": {"p50": _pct(insert_lat, 50), "p99": _pct(insert_lat, 99),
+                               "max": round(max(insert_lat) * 1000, 4)},      # the add that compacted
+        "planted_duplicate_recall": round(found / total, 4) if total else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    add_result_args(parser)
+    args = parser.parse_args()
+    sys.exit(finish(run(args.n, args.batch, args.queries, args.seed), args))
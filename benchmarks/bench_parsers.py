@@ -0,0 +1,174 @@
+# benchmarks/bench_parsers.py
+"""
+OCR parser / matcher / agent benchmark on synthetic documents.
+
+    python -m benchmarks.bench_parsers --n 500 --char-error 0.01
+    python -m benchmarks.bench_parsers --agents --n 20 --blur 0.8 --noise 0.03 --skew 2
+
+Text stage (no tesseract needed): parse_aadhaar_text, extract_pan_from_text,
+the PAN text fallback parser and both compare_with_intake functions, run on
+the text tesseract would read off each synthetic card (--char-error adds OCR
+confusions). kyc_accuracy is the fraction of applicants the parser + matcher
+approve, so a faster parser that matches less shows up as a regression too.
+
+--agents also renders the cards (--dpi/--blur/--noise/--skew/--jpeg-quality)
+and times document decode, the blur gate, pixel forensics and the full
+Aadhaar / PAN agents through process_document. Stages whose external tool
+(tesseract, poppler) is missing are reported as skipped. Agent runs write
+KYCData / FraudCheck rows, so they use a scratch database (--workdir).
+"""
+import os
+import sys
+import argparse
+from dataclasses import asdict
+
+import numpy as np
+import pytesseract
+
+from backend.agents import aadhar_agent, pan_agent
+from backend.models.db_models import Application
+from benchmarks.harness import measure, add_result_args, finish, scratch_workdir
+from benchmarks.synthetic_docs import (
+    DocSpec, synthetic_applicant, ocr_text, aadhaar_pages, render_aadhaar, render_pan, to_pdf,
+    add_spec_args, spec_from_args,
+)
+
+
+def _intake(person: dict, app_id: int = None) -> Application:
+    return Application(
+        app_id=app_id,
+        name=person["name"],
+        dob=person["dob"],
+        phone=person["phone"],
+        email=person["email"],
+        aadhaar=person["aadhaar"],
+        pan=person["pan"],
+        address=" ".join(person["address_lines"]),
+        income=person["income"],
+        loan_amount=person["loan_amount"],
+        loan_tenure=person["loan_tenure"],
+    )
+
+
+def run_text(people, spec: DocSpec, repeat: int, rng) -> dict:
+    intakes = [_intake(p) for p in people]
+    aadhaar_texts = [ocr_text(p, "AADHAAR", spec.char_error, rng) for p in people]
+    pan_texts = [ocr_text(p, "PAN", spec.char_error, rng) for p in people]
+
+    aadhaar_parsed = [aadhar_agent.parse_aadhaar_text(t) for t in aadhaar_texts]
+    pan_parsed = []
+    for t in pan_texts:
+        fields = pan_agent.extract_name_and_dob_from_pan_text(t)
+        fields["pan"] = pan_agent.extract_pan_from_text(t)
+        pan_parsed.append(fields)
+    aadhaar_pairs = list(zip(intakes, aadhaar_parsed))
+    pan_pairs = list(zip(intakes, pan_parsed))
+
+    aadhaar_ok = sum(aadhar_agent.compare_with_intake(i, o)["kyc_status"] == "APPROVED" for i, o in aadhaar_pairs)
+    pan_ok = sum(pan_agent.compare_with_intake(i, o)["kyc_status"] == "APPROVED" for i, o in pan_pairs)
+
+    return {
+        "parse_aadhaar_text": measure(aadhar_agent.parse_aadhaar_text, aadhaar_texts, repeat),
+        "extract_pan_from_text": measure(pan_agent.extract_pan_from_text, pan_texts, repeat),
+        "parse_pan_text": measure(pan_agent.extract_name_and_dob_from_pan_text, pan_texts, repeat),
+        "compare_aadhaar": measure(lambda p: aadhar_agent.compare_with_intake(*p), aadhaar_pairs, repeat),
+        "compare_pan": measure(lambda p: pan_agent.compare_with_intake(*p), pan_pairs, repeat),
+        "aadhaar_kyc_accuracy": round(aadhaar_ok / len(people), 4),
+        "pan_kyc_accuracy": round(pan_ok / len(people), 4),
+    }
+
+
+def _try(fn, *args):
+    """Run a stage; a missing external tool becomes {"skipped": reason}."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"[:200]}
+
+
+def _tesseract_missing():
+    """
+    Why the OCR agents cannot run here, or None. The PAN agent swallows a
+    missing binary and returns empty fields, so its failure path would be timed.
+    """
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        return f"tesseract: {type(e).__name__}: {e}"[:200]
+    return None
+
+
+def run_agents(people, spec: DocSpec, rng, workdir: str = None) -> dict:
+    scratch_workdir(workdir)
+    from backend.database import SessionLocal
+    from backend.agents.document_agent import process_document
+    from backend.agents.fraud_agent import check_blur, run_image_forensics
+    from backend.utils.ocr_utils import load_document_pages
+
+    db = SessionLocal()
+    try:
+        intakes = [_intake(p) for p in people]
+        db.add_all(intakes)
+        db.commit()
+        for i in intakes:
+            db.refresh(i)
+        db.expunge_all()
+    finally:
+        db.close()
+
+    aadhaar = [aadhaar_pages(p, spec, rng) for p in people]
+    pan = [[render_pan(p, spec, rng)] for p in people]
+
+    os.makedirs("docs", exist_ok=True)
+    png_paths, pdf_paths = [], []
+    for k, (person, pages) in enumerate(zip(people, aadhaar)):
+        png_paths.append(os.path.join("docs", f"aadhaar_{k}.png"))
+        render_aadhaar(person, spec, rng).save(png_paths[-1])
+        pdf_paths.append(os.path.join("docs", f"aadhaar_{k}.pdf"))
+        with open(pdf_paths[-1], "wb") as f:
+            f.write(to_pdf(pages, spec.dpi))
+
+    def agent(doc_type, docs):
+        def one(k):
+            out = process_document(intakes[k].app_id, doc_type, docs[k], intake=intakes[k])
+            if "error" in out:
+                raise RuntimeError(out.get("details") or out["error"])
+            return out
+        return lambda: measure(one, list(range(len(people))), warmup=0)
+
+    no_ocr = _tesseract_missing()
+    return {
+        "decode_png": _try(measure, load_document_pages, png_paths),
+        "decode_pdf": _try(measure, load_document_pages, pdf_paths),
+        "blur_gate": measure(check_blur, [pages[0] for pages in aadhaar]),
+        "image_forensics": measure(run_image_forensics, [pages[0] for pages in aadhaar]),
+        "aadhaar_agent": {"skipped": no_ocr} if no_ocr else _try(agent("AADHAAR", aadhaar)),
+        "pan_agent": {"skipped": no_ocr} if no_ocr else _try(agent("PAN", pan)),
+    }
+
+
+def run(n: int, repeat: int, seed: int, spec: DocSpec, agents: bool = False, workdir: str = None) -> dict:
+    rng = np.random.default_rng(seed)
+    people = [synthetic_applicant(rng, i) for i in range(1, n + 1)]
+    result = {
+        "benchmark": "parsers",
+        "applications": n,
+        "spec": asdict(spec),
+        "text": run_text(people, spec, repeat, rng),
+    }
+    if agents:
+        result["agents"] = run_agents(people, spec, rng, workdir)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--agents", action="store_true", help="also render cards and run the full agents")
+    parser.add_argument("--workdir", help="scratch directory for the agent database (default: temp dir)")
+    add_spec_args(parser)
+    add_result_args(parser)
+    args = parser.parse_args()
+    sys.exit(finish(run(args.n, args.repeat, args.seed, spec_from_args(args), args.agents, args.workdir), args))
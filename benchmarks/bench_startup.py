@@ -0,0 +1,95 @@
+# benchmarks/bench_startup.py
+"""
+Worker startup benchmark: cold import of backend.main and warmup time.
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --repeat 5 --baseline benchmarks/baselines/startup.json
+
+Every measurement runs in a fresh interpreter (nothing cached in
+sys.modules), in a scratch directory so the real lending.db is untouched:
+  - import_ms     `import backend.main` (what every uvicorn worker pays before it can bind)
+  - warmup_ms     backend.startup.warmup(), per step; steps that fail on this
+                  host (no tesseract / insightface) are listed, not timed as ok
+  - top_imports   heaviest modules by cumulative `-X importtime` of backend.main
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.harness import add_result_args, finish
+
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import sys, json, time
+t0 = time.perf_counter()
+import backend.main
+import_ms = (time.perf_counter() - t0) * 1000
+heavy = [m for m in ("PIL", "numpy", "pytesseract", "backend.agents.aadhar_agent") if m in sys.modules]
+from backend import startup
+from backend.config import settings
+settings.AUTO_CREATE_SCHEMA = True          # scratch database (cwd is the workdir)
+state = startup.warmup() if sys.argv[1] == "1" else startup.STATE
+print(json.dumps({"import_ms": import_ms, "heavy_at_import": heavy, "state": state}, default=str))
+"""
+
+
+def _child(workdir: str, warm: bool, extra=()) -> subprocess.CompletedProcess:
+    os.makedirs(workdir, exist_ok=True)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_REPO, os.environ.get("PYTHONPATH")])))
+    return subprocess.run([sys.executable, *extra, "-c", _CHILD, "1" if warm else "0"],
+                          capture_output=True, text=True, env=env, cwd=workdir, check=True)
+
+
+def top_imports(workdir: str, limit: int = 15) -> list:
+    """[(module, cumulative ms)] from `python -X importtime`, heaviest first."""
+    err = _child(workdir, False, ("-X", "importtime")).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")      # self us | cumulative us | name
+        rows.append((name.strip(), round(int(cumulative) / 1000, 1)))
+    return sorted(rows, key=lambda r: -r[1])[:limit]
+
+
+def run(repeat: int, workdir: str = None) -> dict:
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="lending-bench-"))
+    imports, warmups, steps, heavy = [], [], {}, set()
+    for _ in range(repeat):
+        out = json.loads(_child(workdir, True).stdout.strip().splitlines()[-1])
+        imports.append(out["import_ms"])
+        heavy.update(out["heavy_at_import"])
+        state = out["state"]
+        warmups.append(state["warmup_ms"])
+        for name, entry in state["warmup"].items():
+            steps.setdefault(name, {"status": entry["status"], "ms": []})["ms"].append(entry["ms"])
+
+    return {
+        "benchmark": "startup",
+        "repeat": repeat,
+        "workdir": workdir,
+        "import_ms": {"p50": round(float(np.median(imports)), 1), "min": round(min(imports), 1)},
+        "warmup_ms": {"p50": round(float(np.median(warmups)), 1), "min": round(min(warmups), 1)},
+        "warmup_steps": {
+            name: ({"step_ms": round(float(np.median(s["ms"])), 1)} if s["status"] == "ok"
+                   else {"status": s["status"]})
+            for name, s in steps.items()
+        },
+        "heavy_modules_at_import": sorted(heavy),
+        "top_imports": top_imports(workdir),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", help="scratch directory for the app database (default: temp dir)")
+    add_result_args(parser)
+    args = parser.parse_args()
+    sys.exit(finish(run(args.repeat, args.workdir), args))
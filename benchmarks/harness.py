@@ -0,0 +1,211 @@
+# benchmarks/harness.py
+"""
+Timing, result files and baseline comparison shared by the benchmarks.
+
+    python -m benchmarks.bench_parsers --save benchmarks/results --baseline benchmarks/baselines/parsers.json
+    python -m benchmarks.harness benchmarks/results/parsers-20250101-120000.json benchmarks/baselines/parsers.json
+
+A result is a JSON dict with a "benchmark" name. Comparison walks the nested
+metrics and uses the key to decide the direction:
+  - *_ms, *_seconds, *_mb          lower is better
+  - *per_s, *rps, *recall, *accuracy  higher is better
+anything else (counts, settings) is informational. A metric regresses when it
+is worse than the baseline by more than --tolerance (relative) and by more
+than MIN_ABS_MS for latencies, so sub-microsecond jitter is not flagged.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from typing import Callable, Iterable, List
+
+import numpy as np
+
+MIN_ABS_MS = 0.005
+
+_CWD = os.getcwd()          # result / baseline paths are relative to where the benchmark was started
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LOWER = ("_ms", "_seconds", "_mb")
+_HIGHER = ("per_s", "rps", "recall", "accuracy")
+
+
+# -----------------------
+# Timing
+# -----------------------
+def latency_stats(samples: Iterable[float]) -> dict:
+    """samples in seconds -> {n, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}."""
+    ms = np.asarray(list(samples), dtype=np.float64) * 1000.0
+    if not len(ms):
+        return {"n": 0}
+    return {
+        "n": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def measure(fn: Callable, inputs: List, repeat: int = 1, warmup: int = 1) -> dict:
+    """
+    Call fn(x) for every x in inputs, `repeat` times, after `warmup` untimed
+    passes over the first few inputs. Returns latency_stats + ops_per_s.
+    """
+    for x in inputs[: max(warmup, 0) * 8]:
+        fn(x)
+    samples = []
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for x in inputs:
+            t = time.perf_counter()
+            fn(x)
+            samples.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    stats = latency_stats(samples)
+    stats["ops_per_s"] = round(len(samples) / total, 1) if total else None
+    return stats
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5, cwd=_REPO).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def scratch_workdir(path: str = None) -> str:
+    """
+    chdir into `path` (default: a fresh temp dir) and create the schema there.
+    DATABASE_URL and the index / job files are relative, so benchmarks that
+    write never touch the real lending.db. Call before backend.main is imported.
+    """
+    path = os.path.abspath(path or tempfile.mkdtemp(prefix="lending-bench-"))
+    os.makedirs(path, exist_ok=True)
+    os.chdir(path)
+    from backend.database import engine
+    from backend.models.db_models import Base
+    Base.metadata.create_all(bind=engine)
+    return path
+
+
+# -----------------------
+# Results / baselines
+# -----------------------
+def save_result(result: dict, out_dir: str) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{result['benchmark']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    write_json(result, path)
+    return path
+
+
+def write_json(result: dict, path: str):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+
+def _flatten(d: dict, prefix: str = ""):
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            yield from _flatten(v, key + ".")
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield key, float(v)
+
+
+def _direction(key: str) -> int:
+    parts = key.split(".")
+    if parts[-1].startswith("max_"):
+        return 0                        # single worst sample, too noisy to gate on
+    for part in reversed(parts):        # "exact_lookup_ms.p50" takes its parent's unit
+        if part.endswith(_LOWER):
+            return -1
+        if part.endswith(_HIGHER):
+            return 1
+    return 0
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> List[dict]:
+    """Metrics of `current` that regressed against `baseline` (missing ones are ignored)."""
+    base = dict(_flatten({k: v for k, v in baseline.items() if k != "environment"}))
+    regressions = []
+    for key, value in _flatten({k: v for k, v in current.items() if k != "environment"}):
+        direction = _direction(key)
+        old = base.get(key)
+        if not direction or old is None:
+            continue
+        worse = (value - old) if direction < 0 else (old - value)
+        if worse <= 0 or worse <= abs(old) * tolerance:
+            continue
+        if direction < 0 and "_ms" in key and worse < MIN_ABS_MS:
+            continue
+        regressions.append({
+            "metric": key,
+            "baseline": old,
+            "current": value,
+            "change": round((value - old) / old, 4) if old else None,
+        })
+    return regressions
+
+
+def add_result_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--save", metavar="DIR", help="write the result to DIR/<benchmark>-<time>.json")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a saved result; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative slack before flagging (default 0.10)")
+    parser.add_argument("--write-baseline", metavar="FILE", help="store this run as the new baseline")
+
+
+def finish(result: dict, args) -> int:
+    """Print / save the result and check it against the baseline. Returns the exit code."""
+    result["environment"] = environment()
+    print(json.dumps(result, indent=2))
+    if args.save:
+        print(f"saved {save_result(result, os.path.join(_CWD, args.save))}", file=sys.stderr)
+    if args.write_baseline:
+        write_json(result, os.path.join(_CWD, args.write_baseline))
+        print(f"baseline written to {args.write_baseline}", file=sys.stderr)
+    if args.baseline:
+        with open(os.path.join(_CWD, args.baseline)) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        report(regressions)
+        return 1 if regressions else 0
+    return 0
+
+
+def report(regressions: List[dict]):
+    if not regressions:
+        print("no regressions", file=sys.stderr)
+        return
+    print(f"{len(regressions)} regression(s):", file=sys.stderr)
+    for r in regressions:
+        change = f"{r['change']:+.1%}" if r["change"] is not None else "n/a"
+        print(f"  {r['metric']}: {r['baseline']} -> {r['current']} ({change})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a saved benchmark result with a baseline")
+    parser.add_argument("result")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    with open(args.result) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        regressions = compare(current, json.load(f), args.tolerance)
+    report(regressions)
+    sys.exit(1 if regressions else 0)
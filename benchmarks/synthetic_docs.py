@@ -0,0 +1,298 @@
+# benchmarks/synthetic_docs.py
+"""
+Synthetic Aadhaar / PAN documents for benchmarks (no customer data).
+
+    python -m benchmarks.synthetic_docs --out bench_data --n 20 --blur 1.0 --noise 0.05 --skew 2 --pdf
+
+Every applicant comes with
+  - an ApplicationRequest payload (POST /apply body) whose fields match the cards
+  - Aadhaar front / back and PAN card images rendered with PIL
+  - the text tesseract would read off those cards, for parser benchmarks
+    that should not depend on tesseract being installed
+
+Degradations (DocSpec): resolution (dpi), gaussian blur radius, pixel noise,
+skew in degrees, JPEG re-compression and, for OCR text, a character error rate
+(O/0, I/1, S/5 ... confusions). The same seed always produces the same documents.
+"""
+import io
+import os
+import json
+import argparse
+import datetime
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from benchmarks.bench_identity_index import FIRST, LAST, STREETS, CITIES
+
+CARD_MM = (85.6, 54.0)                 # ID-1 card size
+STATES = {"BENGALURU": "KARNATAKA", "CHENNAI": "TAMIL NADU", "MUMBAI": "MAHARASHTRA",
+          "PUNE": "MAHARASHTRA", "HYDERABAD": "TELANGANA", "KOCHI": "KERALA",
+          "DELHI": "DELHI", "JAIPUR": "RAJASTHAN"}
+OCR_CONFUSIONS = {"O": "0", "0": "O", "I": "1", "1": "I", "S": "5", "5": "S", "B": "8", "8": "B",
+                  "E": "F", "l": "1", "/": "1"}
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@dataclass
+class DocSpec:
+    dpi: int = 300
+    blur: float = 0.0                  # gaussian radius in pixels at 300 dpi
+    noise: float = 0.0                 # pixel noise sigma as a fraction of 255
+    skew: float = 0.0                  # max rotation in degrees (random sign / magnitude)
+    jpeg_quality: Optional[int] = None
+    char_error: float = 0.0            # OCR text only: fraction of characters confused
+
+
+# -----------------------
+# Applicants
+# -----------------------
+def synthetic_applicant(rng: np.random.Generator, i: int) -> dict:
+    """One applicant; the source of truth for both the payload and the cards."""
+    first, middle = FIRST[rng.integers(len(FIRST))], FIRST[rng.integers(len(FIRST))]
+    last = LAST[rng.integers(len(LAST))]
+    city = CITIES[rng.integers(len(CITIES))]
+    dob = datetime.date(1960, 1, 1) + datetime.timedelta(days=int(rng.integers(0, 365 * 45)))
+    income = int(rng.integers(15, 300)) * 1000
+    return {
+        "name": f"{first} {middle} {last}".title(),
+        "father": f"{FIRST[rng.integers(len(FIRST))]} {last}".title(),
+        "gender": "MALE" if rng.random() < 0.5 else "FEMALE",
+        "dob": dob,
+        "aadhaar": f"{int(rng.integers(2 * 10 ** 11, 10 ** 12)):012d}",
+        "pan": "".join(LETTERS[k] for k in rng.integers(0, 26, 3)) + "P" + last[0]
+               + f"{int(rng.integers(1000, 10000))}" + LETTERS[rng.integers(26)],
+        "phone": f"+91{int(rng.integers(6 * 10 ** 9, 10 ** 10))}",
+        "email": f"applicant{i}@example.com",
+        "address_lines": [
+            f"{int(rng.integers(1, 999))}, {STREETS[rng.integers(len(STREETS))].title()}",
+            f"{city.title()}, {STATES[city].title()}",
+            f"{int(rng.integers(100000, 999999))}",
+        ],
+        "income": income,
+        "loan_amount": int(rng.integers(1, 20)) * 25000,
+        "loan_tenure": int(rng.choice([12, 24, 36, 48, 60])),
+    }
+
+
+def application_payload(person: dict) -> dict:
+    """POST /apply body (validates as ApplicationRequest)."""
+    return {
+        "name": person["name"],
+        "dob": person["dob"].isoformat(),
+        "phone": person["phone"],
+        "email": person["email"],
+        "aadhaar_number": person["aadhaar"],
+        "pan": person["pan"],
+        "address": " ".join(person["address_lines"]),
+        "income": person["income"],
+        "loan_amount": person["loan_amount"],
+        "loan_tenure": person["loan_tenure"],
+    }
+
+
+def _grouped_aadhaar(person: dict) -> str:
+    a = person["aadhaar"]
+    return f"{a[:4]} {a[4:8]} {a[8:]}"
+
+
+# -----------------------
+# Card content (shared by renderer and OCR text)
+# -----------------------
+def _aadhaar_front_lines(person: dict) -> List[str]:
+    return [
+        "GOVERNMENT OF INDIA",
+        person["name"],
+        f"DOB: {person['dob']:%d/%m/%Y}",
+        person["gender"],
+        _grouped_aadhaar(person),
+    ]
+
+
+def _aadhaar_back_lines(person: dict) -> List[str]:
+    return [
+        "UNIQUE IDENTIFICATION AUTHORITY OF INDIA",
+        f"Address: S/O {person['father']},",
+        *person["address_lines"],
+        _grouped_aadhaar(person),
+    ]
+
+
+def _pan_lines(person: dict) -> List[str]:
+    return [
+        "INCOME TAX DEPARTMENT",
+        person["name"].upper(),
+        person["father"].upper(),
+        f"{person['dob']:%d/%m/%Y}",
+        "Permanent Account Number",
+        person["pan"],
+        "GOVT. OF INDIA",
+    ]
+
+
+def ocr_text(person: dict, doc_type: str, char_error: float = 0.0, rng: np.random.Generator = None) -> str:
+    """Text as tesseract would return it for the rendered card (AADHAAR: front then back)."""
+    if doc_type == "AADHAAR":
+        lines = _aadhaar_front_lines(person) + _aadhaar_back_lines(person)
+    elif doc_type == "PAN":
+        lines = _pan_lines(person)
+    else:
+        raise ValueError(f"unknown doc_type {doc_type}")
+    text = "\n".join(lines) + "\n"
+    if char_error > 0:
+        rng = rng or np.random.default_rng()
+        chars = list(text)
+        for k in np.flatnonzero(rng.random(len(chars)) < char_error).tolist():
+            chars[k] = OCR_CONFUSIONS.get(chars[k], chars[k])
+        text = "".join(chars)
+    return text
+
+
+# -----------------------
+# Rendering
+# -----------------------
+_FONTS = {}
+
+
+def _font(px: int, bold: bool = False):
+    key = (px, bold)
+    if key not in _FONTS:
+        names = ("DejaVuSans-Bold.ttf", "Arial Bold.ttf") if bold else ("DejaVuSans.ttf", "Arial.ttf")
+        for name in names:
+            try:
+                _FONTS[key] = ImageFont.truetype(name, px)
+                break
+            except OSError:
+                continue
+        else:
+            _FONTS[key] = ImageFont.load_default(size=px)
+    return _FONTS[key]
+
+
+def _card(lines: List[str], dpi: int, header_fill) -> Image.Image:
+    w, h = int(CARD_MM[0] / 25.4 * dpi), int(CARD_MM[1] / 25.4 * dpi)
+    img = Image.new("RGB", (w, h), "white")
+    draw = ImageDraw.Draw(img)
+    band = int(h * 0.16)
+    draw.rectangle([0, 0, w, band], fill=header_fill)
+
+    header_px = max(8, int(band * 0.45))
+    while header_px > 8 and draw.textlength(lines[0], font=_font(header_px, bold=True)) > w * 0.94:
+        header_px -= 1
+    draw.text((w // 2, band // 2), lines[0], font=_font(header_px, bold=True), fill="black", anchor="mm")
+
+    body_px = max(8, int(h * 0.065))
+    y = band + int(h * 0.06)
+    x = int(w * 0.32)                  # photo area on the left
+    draw.rectangle([int(w * 0.05), y, int(w * 0.27), y + int(h * 0.45)], outline="gray", width=max(1, dpi // 150))
+    for line in lines[1:]:
+        draw.text((x, y), line, font=_font(body_px), fill="black")
+        y += int(body_px * 1.5)
+    return img
+
+
+def _degrade(img: Image.Image, spec: DocSpec, rng: np.random.Generator) -> Image.Image:
+    if spec.blur > 0:
+        img = img.filter(ImageFilter.GaussianBlur(spec.blur * spec.dpi / 300.0))
+    if spec.skew:
+        angle = float(rng.uniform(-spec.skew, spec.skew))
+        img = img.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor="white")
+    if spec.noise > 0:
+        arr = np.asarray(img, dtype=np.float32)
+        arr += rng.normal(0.0, spec.noise * 255.0, arr.shape).astype(np.float32)
+        img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    if spec.jpeg_quality:
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=spec.jpeg_quality)
+        img = Image.open(io.BytesIO(buf.getvalue())).convert("RGB")
+    return img
+
+
+def aadhaar_pages(person: dict, spec: DocSpec = None, rng: np.random.Generator = None) -> List[Image.Image]:
+    """[front, back] of an Aadhaar card."""
+    spec, rng = spec or DocSpec(), rng or np.random.default_rng()
+    return [
+        _degrade(_card(_aadhaar_front_lines(person), spec.dpi, (255, 153, 51)), spec, rng),
+        _degrade(_card(_aadhaar_back_lines(person), spec.dpi, (255, 153, 51)), spec, rng),
+    ]
+
+
+def render_aadhaar(person: dict, spec: DocSpec = None, rng: np.random.Generator = None) -> Image.Image:
+    """Single-image Aadhaar (front above back, like a printed e-Aadhaar)."""
+    front, back = aadhaar_pages(person, spec, rng)
+    img = Image.new("RGB", (max(front.width, back.width), front.height + back.height), "white")
+    img.paste(front, (0, 0))
+    img.paste(back, (0, front.height))
+    return img
+
+
+def render_pan(person: dict, spec: DocSpec = None, rng: np.random.Generator = None) -> Image.Image:
+    spec, rng = spec or DocSpec(), rng or np.random.default_rng()
+    return _degrade(_card(_pan_lines(person), spec.dpi, (170, 200, 230)), spec, rng)
+
+
+def to_pdf(pages: List[Image.Image], dpi: int = 300) -> bytes:
+    buf = io.BytesIO()
+    pages[0].save(buf, "PDF", save_all=True, append_images=pages[1:], resolution=float(dpi))
+    return buf.getvalue()
+
+
+def to_bytes(img: Image.Image, fmt: str = "PNG") -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, fmt)
+    return buf.getvalue()
+
+
+# -----------------------
+# Dataset on disk
+# -----------------------
+def write_dataset(out: str, n: int, spec: DocSpec, seed: int = 7, pdf: bool = False) -> dict:
+    """
+    out/aadhaar_0001.png, out/pan_0001.png (and out/aadhaar_0001.pdf front+back),
+    out/applications.jsonl with {"id", "payload", "aadhaar_text", "pan_text"} per line.
+    """
+    os.makedirs(out, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(out, "applications.jsonl"), "w") as f:
+        for i in range(1, n + 1):
+            person = synthetic_applicant(rng, i)
+            pages = aadhaar_pages(person, spec, rng)
+            render_aadhaar(person, spec, rng).save(os.path.join(out, f"aadhaar_{i:04d}.png"))
+            render_pan(person, spec, rng).save(os.path.join(out, f"pan_{i:04d}.png"))
+            if pdf:
+                with open(os.path.join(out, f"aadhaar_{i:04d}.pdf"), "wb") as p:
+                    p.write(to_pdf(pages, spec.dpi))
+            f.write(json.dumps({
+                "id": i,
+                "payload": application_payload(person),
+                "aadhaar_text": ocr_text(person, "AADHAAR", spec.char_error, rng),
+                "pan_text": ocr_text(person, "PAN", spec.char_error, rng),
+            }) + "\n")
+    return {"out": out, "applications": n, "spec": asdict(spec), "seed": seed}
+
+
+def add_spec_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--blur", type=float, default=0.0)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--skew", type=float, default=0.0)
+    parser.add_argument("--jpeg-quality", type=int, default=None)
+    parser.add_argument("--char-error", type=float, default=0.0)
+
+
+def spec_from_args(args) -> DocSpec:
+    return DocSpec(dpi=args.dpi, blur=args.blur, noise=args.noise, skew=args.skew,
+                   jpeg_quality=args.jpeg_quality, char_error=args.char_error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--n", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--pdf", action="store_true", help="also write multi-page Aadhaar PDFs")
+    add_spec_args(parser)
+    args = parser.parse_args()
+    print(json.dumps(write_dataset(args.out, args.n, spec_from_args(args), args.seed, args.pdf), indent=2))
@@ -5,13 +5,15 @@ CREATE TABLE applications (
     dob DATE,
     phone TEXT,
     email TEXT,
+    aadhaar TEXT,
     pan TEXT,
     address TEXT,
     income INTEGER,
     loan_amount INTEGER,
     loan_tenure INTEGER,
     created_at TIMESTAMP DEFAULT NOW(),
-    status TEXT DEFAULT 'PENDING'
+    status TEXT DEFAULT 'PENDING',
+    updated_at TIMESTAMP DEFAULT NOW()      -- set on every update by the application
 );
 
 -- OCR EXTRACTED DATA
@@ -22,9 +24,13 @@ CREATE TABLE kyc_data (
     extracted_dob TEXT,
     extracted_pan TEXT,
     ocr_confidence FLOAT,
+    document_hash TEXT,                 -- sha256 of the upload in the document store
+    doc_type TEXT,                      -- AADHAAR / PAN
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+CREATE INDEX ix_kyc_data_document_hash ON kyc_data (document_hash);
+
 -- FACE MATCH + LIVENESS + ID MATCH
 CREATE TABLE kyc_checks (
     id SERIAL PRIMARY KEY,
@@ -37,13 +43,26 @@ CREATE TABLE kyc_checks (
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- FACE EMBEDDINGS (cache by image hash + face-reuse index source)
+CREATE TABLE face_embeddings (
+    id SERIAL PRIMARY KEY,
+    app_id INTEGER REFERENCES applications(app_id),
+    image_hash TEXT,
+    kind TEXT,                -- SELFIE / ID_PHOTO
+    embedding BYTEA,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX ix_face_embeddings_image_hash ON face_embeddings (image_hash);
+
 -- FRAUD DETECTION RESULTS
 CREATE TABLE fraud_checks (
     id SERIAL PRIMARY KEY,
     app_id INTEGER REFERENCES applications(app_id),
+    doc_type TEXT,             -- AADHAAR / PAN
     fraud_score FLOAT,
     blur_level FLOAT,
     tamper_detected BOOLEAN,
+    signals JSONB,
     fraud_status TEXT,         -- PASS / FAIL / MANUAL
     updated_at TIMESTAMP DEFAULT NOW()
 );
@@ -55,6 +74,7 @@ CREATE TABLE credit_scores (
     model_score FLOAT,
     approval_status TEXT,       -- APPROVED / REJECTED / MANUAL
     sanctioned_amount INTEGER,
+    sanctioned_tenure INTEGER,
     interest_rate FLOAT,
     shap_top_features JSONB,
     updated_at TIMESTAMP DEFAULT NOW()
@@ -69,6 +89,30 @@ CREATE TABLE decisions (
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- IDEMPOTENCY KEYS (stored responses for retried POSTs)
+CREATE TABLE idempotency_keys (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT,
+    request_hash TEXT,
+    state TEXT,                 -- IN_PROGRESS / COMPLETED
+    status_code INTEGER,
+    response TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP
+);
+CREATE INDEX ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- STAGE RESULTS (incremental re-evaluation: result + fingerprint of its inputs)
+CREATE TABLE stage_results (
+    id SERIAL PRIMARY KEY,
+    app_id INTEGER REFERENCES applications(app_id),
+    stage TEXT,                 -- ocr_aadhaar / ocr_pan / face / kyc / fraud / scoring / explanation
+    fingerprint TEXT,
+    result JSONB,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (app_id, stage)
+);
+
 -- MANUAL REVIEW
 CREATE TABLE manual_review (
     id SERIAL PRIMARY KEY,
@@ -78,3 +122,14 @@ CREATE TABLE manual_review (
     notes TEXT,
     reviewed_at TIMESTAMP DEFAULT NOW()
 );
+
+-- IDENTITY REUSE LOOKUPS (duplicate Aadhaar / PAN / phone / email)
+CREATE INDEX ix_applications_aadhaar ON applications (aadhaar);
+CREATE INDEX ix_applications_pan ON applications (pan);
+CREATE INDEX ix_applications_phone ON applications (phone);
+CREATE INDEX ix_applications_email ON applications (email);
+
+-- ANALYTICS SNAPSHOT WATERMARKS (backend/utils/analytics.py keyset reads)
+CREATE INDEX ix_applications_created_at ON applications (created_at);
+CREATE INDEX ix_applications_updated_at ON applications (updated_at);
+CREATE INDEX ix_credit_scores_updated_at ON credit_scores (updated_at);
@@ -0,0 +1,331 @@
+# orchestrator/incremental.py
+"""
+Incremental re-evaluation: after a correction, re-run only the stages whose
+inputs changed.
+
+Every stage result is stored in stage_results with a fingerprint of its inputs:
+
+  stage        inputs
+  ocr_aadhaar  uploaded document bytes, else the latest KYCData snapshot
+  ocr_pan      (same)
+  face         latest selfie / ID photo hashes (face_embeddings) + aadhaar, pan
+  kyc          name, dob, aadhaar, pan, address + ocr_* + face
+  fraud        identity fields + latest forensics (fraud_checks) + face reuse
+  scoring      income, loan amount / tenure, dob + credit policy + model file
+  explanation  the decision-relevant parts of kyc, fraud and scoring
+
+Downstream fingerprints hash upstream RESULTS, so a recomputed stage whose
+output did not change leaves its dependants cached. An address correction
+re-runs kyc / fraud / explanation from stored OCR output; a PAN re-upload
+re-runs ocr_pan and whatever its new output affects.
+
+Time-dependent inputs (velocity counters, faces enrolled by other
+applications) are not part of the fingerprints; a full /pipeline/run
+refreshes them.
+"""
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import KYCData, StageResult
+from backend.agents.document_agent import process_document
+from backend.agents.aadhar_agent import compare_with_intake as compare_aadhaar
+from backend.agents.pan_agent import compare_with_intake as compare_pan
+from backend.agents.kyc_agent import (
+    run_kyc_agent, embed_document, stored_embeddings, face_checks, card_photo, latest_snapshot,
+    parsed_from_snapshot
+)
+from backend.agents.fraud_agent import run_fraud_agent, latest_forensics
+from backend.agents.scoring_agent import run_scoring_agent, scoring_inputs
+from backend.agents.explanation_agent import run_explanation_agent
+from backend.utils.idempotency import fingerprint
+from backend.utils.ocr_utils import OCR_POOL
+from backend.utils.document_store import get_document_store
+from orchestrator.workflow import DAG, Stage, StageError, load_application
+
+KYC_FIELDS = ("name", "dob", "aadhaar", "pan", "address")
+IDENTITY_FIELDS = ("name", "address", "phone", "email", "aadhaar", "pan")
+
+
+# -----------------------
+# Stored stage results
+# -----------------------
+def load_stage_results(app_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.query(StageResult).filter(StageResult.app_id == app_id).all()
+        return {r.stage: (r.fingerprint, json.loads(r.result) if r.result else None) for r in rows}
+    finally:
+        db.close()
+
+
+def save_stage_result(app_id: int, stage: str, fp: str, result):
+    body = json.dumps(result)
+    for _ in range(2):
+        db = SessionLocal()
+        try:
+            row = db.query(StageResult).filter(StageResult.app_id == app_id, StageResult.stage == stage).first()
+            if row is None:
+                db.add(StageResult(app_id=app_id, stage=stage, fingerprint=fp, result=body,
+                                   updated_at=datetime.now()))
+            else:
+                row.fingerprint = fp
+                row.result = body
+                row.updated_at = datetime.now()
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()           # concurrent insert, retry as update
+        finally:
+            db.close()
+
+
+def _fields(app, names) -> dict:
+    return {n: getattr(app, n) for n in names}
+
+
+def _cached(stage: str, inputs, compute):
+    """
+    Stage fn: reuse the stored result when fingerprint(inputs(ctx)) is unchanged.
+    """
+    def fn(ctx):
+        fp = fingerprint(stage, inputs(ctx))
+        prev = ctx["stored"].get(stage)
+        if prev is not None and prev[0] == fp:
+            ctx["cache"][stage] = "HIT"
+            return prev[1]
+        result = jsonable_encoder(compute(ctx))
+        save_stage_result(ctx["app_id"], stage, fp, result)
+        ctx["cache"][stage] = "MISS"
+        return result
+    return fn
+
+
+# -----------------------
+# Stages
+# -----------------------
+def stage_application(ctx):
+    return load_application(ctx["app_id"])
+
+
+def _latest_snapshot(app_id: int, doc: str) -> Optional[KYCData]:
+    db = SessionLocal()
+    try:
+        return latest_snapshot(db, app_id, doc)
+    finally:
+        db.close()
+
+
+def _ocr_stage(doc: str):
+    """
+    OCR output of one document: re-OCR only for new bytes, otherwise the
+    stored result or the latest KYCData snapshot (e.g. from /agent/ocr/both).
+    """
+    stage = f"ocr_{doc}"
+
+    def fn(ctx):
+        app = ctx["application"]
+        prev = ctx["stored"].get(stage)
+        prev_result = prev[1] if prev else None
+        path = ctx["documents"].get(doc)
+        upload_hash = None
+
+        if path:
+            with open(path, "rb") as f:
+                data = f.read()
+            upload_hash = fingerprint(data)
+            if prev_result and prev_result.get("upload_hash") == upload_hash:
+                ctx["cache"][stage] = "HIT"
+                return prev_result
+            store = get_document_store()
+            digest, pages, _ = store.decode(data)
+            store.put(data, pages)
+            res = process_document(app.app_id, doc.upper(), pages, intake=app, document_hash=digest)
+            if "error" in res:
+                raise StageError(res.get("details") or res["error"])
+            snapshot = _latest_snapshot(app.app_id, doc)
+            result = {
+                "parsed": res.get("parsed"),
+                "blurry": "parsed" not in res,
+                "snapshot_id": snapshot.id if snapshot else None,
+                "upload_hash": upload_hash,
+            }
+        else:
+            snapshot = _latest_snapshot(app.app_id, doc)
+            if prev_result and prev_result.get("snapshot_id") == (snapshot.id if snapshot else None):
+                ctx["cache"][stage] = "HIT"
+                return prev_result
+            if snapshot is None:
+                ctx["cache"][stage] = "NONE"
+                return None
+            result = {
+                "parsed": parsed_from_snapshot(snapshot, doc),
+                "blurry": False,
+                "snapshot_id": snapshot.id,
+                "upload_hash": None,
+            }
+
+        save_stage_result(app.app_id, stage, fingerprint(stage, result), result)
+        ctx["cache"][stage] = "MISS"
+        return result
+    return fn
+
+
+def _face_inputs(ctx):
+    app = ctx["application"]
+    db = SessionLocal()
+    try:
+        for kind, data in (("SELFIE", ctx.get("selfie")), ("ID_PHOTO", ctx.get("id_photo"))):
+            if data:
+                embed_document(db, app.app_id, data, kind)
+        ctx["embeddings"] = stored_embeddings(db, app.app_id)
+        if "SELFIE" in ctx["embeddings"] and "ID_PHOTO" not in ctx["embeddings"]:
+            card = card_photo(db, app.app_id)      # no ID photo uploaded: the photo on the Aadhaar card
+            if card:
+                embed_document(db, app.app_id, card, "ID_PHOTO")
+                ctx["embeddings"] = stored_embeddings(db, app.app_id)
+    finally:
+        db.close()
+    return {
+        "images": {kind: h for kind, (h, _) in ctx["embeddings"].items()},
+        "aadhaar": app.aadhaar,
+        "pan": app.pan,
+    }
+
+
+def _face_compute(ctx):
+    db = SessionLocal()
+    try:
+        return face_checks(db, ctx["application"], {k: emb for k, (_, emb) in ctx["embeddings"].items()})
+    finally:
+        db.close()
+
+
+def _ocr_view(ocr: Optional[dict]):
+    return None if ocr is None else {"parsed": ocr.get("parsed"), "blurry": ocr.get("blurry")}
+
+
+def _kyc_inputs(ctx):
+    return {
+        "application": _fields(ctx["application"], KYC_FIELDS),
+        "aadhaar": _ocr_view(ctx.get("ocr_aadhaar")),
+        "pan": _ocr_view(ctx.get("ocr_pan")),
+        "face": ctx.get("face"),
+    }
+
+
+def _kyc_compute(ctx):
+    app = ctx["application"]
+    ocr_results = {}
+    for doc, compare in (("aadhaar", compare_aadhaar), ("pan", compare_pan)):
+        ocr = ctx.get(f"ocr_{doc}")
+        if ocr is None:
+            continue
+        if ocr.get("blurry") or not ocr.get("parsed"):
+            ocr_results[doc] = {"match_results": {"failed_fields": ["blur"]}}
+        else:
+            ocr_results[doc] = {"match_results": compare(app, ocr["parsed"])}
+    result = run_kyc_agent(app.app_id, intake=app, ocr_results=ocr_results or None, face=ctx.get("face"))
+    if result.get("status") == "ERROR":
+        raise StageError(result.get("message"))
+    return result
+
+
+def _fraud_inputs(ctx):
+    db = SessionLocal()
+    try:
+        ctx["forensics"] = latest_forensics(db, ctx["app_id"])
+    finally:
+        db.close()
+    return {
+        "application": _fields(ctx["application"], IDENTITY_FIELDS),
+        "forensics": ctx["forensics"],
+        "face_reuse": (ctx.get("face") or {}).get("face_reuse"),
+    }
+
+
+def _fraud_compute(ctx):
+    result = run_fraud_agent(
+        ctx["app_id"], intake=ctx["application"], forensics=ctx["forensics"],
+        face_reuse=(ctx.get("face") or {}).get("face_reuse"),
+    )
+    if "error" in result:
+        raise StageError(result.get("details") or result["error"])
+    return result
+
+
+def _scoring_compute(ctx):
+    result = run_scoring_agent(ctx["app_id"], intake=ctx["application"])
+    if "error" in result:
+        raise StageError(result.get("details") or result["error"])
+    return result
+
+
+def _explanation_inputs(ctx):
+    kyc = ctx.get("kyc") or {}
+    fraud = ctx.get("fraud") or {}
+    score = ctx.get("scoring") or {}
+    return {
+        "kyc": {k: v for k, v in kyc.items() if k.endswith("_match") or k == "kyc_status"},
+        "fraud": [fraud.get("fraud_status"), fraud.get("reasons")],
+        "scoring": [score.get("approval_status"), score.get("sanctioned")],
+    }
+
+
+def _explanation_compute(ctx):
+    return run_explanation_agent(ctx["app_id"], ctx.get("kyc"), ctx.get("fraud"), ctx.get("scoring"))
+
+
+def build_reevaluation_pipeline() -> DAG:
+    t = settings.PIPELINE_STAGE_TIMEOUTS
+    return DAG([
+        Stage("application", stage_application, timeout=t["intake"]),
+        Stage("ocr_aadhaar", _ocr_stage("aadhaar"), deps=("application",), timeout=t["ocr"], executor=OCR_POOL),
+        Stage("ocr_pan", _ocr_stage("pan"), deps=("application",), timeout=t["ocr"], executor=OCR_POOL),
+        Stage("face", _cached("face", _face_inputs, _face_compute), deps=("application",), timeout=t["kyc"]),
+        Stage("kyc", _cached("kyc", _kyc_inputs, _kyc_compute),
+              deps=("application", "ocr_aadhaar", "ocr_pan", "face"), timeout=t["kyc"]),
+        Stage("fraud", _cached("fraud", _fraud_inputs, _fraud_compute),
+              deps=("application", "ocr_aadhaar", "ocr_pan", "face"), timeout=t["fraud"]),
+        Stage("scoring", _cached("scoring", lambda ctx: scoring_inputs(ctx["application"]), _scoring_compute),
+              deps=("application",), timeout=t["scoring"]),
+        Stage("explanation", _cached("explanation", _explanation_inputs, _explanation_compute),
+              deps=("kyc", "fraud", "scoring"), timeout=t["explanation"]),
+    ])
+
+
+REEVALUATION_PIPELINE = build_reevaluation_pipeline()
+
+
+async def reevaluate(app_id: int, documents: dict = None, selfie: bytes = None, id_photo: bytes = None) -> dict:
+    """
+    Bring every stage of an application up to date, recomputing only stale ones.
+    documents: {"aadhaar": path, "pan": path} for re-uploaded documents.
+    """
+    ctx = {
+        "app_id": app_id,
+        "documents": {k: v for k, v in (documents or {}).items() if v},
+        "selfie": selfie,
+        "id_photo": id_photo,
+        "stored": load_stage_results(app_id),
+        "cache": {},
+    }
+    report = await REEVALUATION_PIPELINE.run(ctx)
+    for name, status in ctx["cache"].items():
+        report["stages"][name]["cache"] = status
+
+    explanation = ctx.get("explanation") or {}
+    return {
+        "app_id": app_id,
+        "final_status": explanation.get("final_status"),
+        "explanation": explanation.get("explanation"),
+        "recomputed": [n for n, s in ctx["cache"].items() if s == "MISS"],
+        "reused": [n for n, s in ctx["cache"].items() if s == "HIT"],
+        "results": {"kyc": ctx.get("kyc"), "fraud": ctx.get("fraud"), "scoring": ctx.get("scoring")},
+        **report,
+    }
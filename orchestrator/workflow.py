@@ -0,0 +1,401 @@
+# orchestrator/workflow.py
+"""
+In-process asyncio DAG executor for the lending pipeline.
+
+    intake ─┬─ aadhaar_ocr ─┐
+            ├─ pan_ocr ─────┼─ kyc ─┬─ fraud ───┬─ explanation
+    decode ─┼─ forensics ───┘       └─ scoring ─┘
+            └─ store            (document store derivatives, off the critical path)
+
+  - a stage starts as soon as all of its dependencies finished, so
+    independent stages (Aadhaar OCR / PAN OCR / forensics, fraud / scoring)
+    run concurrently and wall time tracks the critical path
+  - every stage has a timeout and a retry budget; a sync stage that timed
+    out is not retried (its thread cannot be stopped, and a second copy
+    would write its rows twice and hold another pool worker)
+  - stage outputs are handed to dependants in memory (ctx dict) instead
+    of being re-queried from the DB
+  - the run report carries per-stage timings plus the critical path
+"""
+import time
+import asyncio
+import inspect
+import contextvars
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.models.db_models import Application
+from backend.agents.intake_agent import create_application
+from backend.agents.aadhar_agent import run_aadhaar_ocr_agent
+from backend.agents.pan_agent import run_pan_ocr_agent
+from backend.agents.kyc_agent import run_kyc_agent
+from backend.agents.fraud_agent import (
+    check_blur, run_image_forensics, run_field_forensics, summarise_forensics, save_fraud_check,
+    run_fraud_agent, index_application, record_application_velocity, record_upload_velocity
+)
+from backend.agents.scoring_agent import run_scoring_agent
+from backend.agents.explanation_agent import run_explanation_agent
+from backend.utils.ocr_utils import OCR_POOL
+from backend.utils.document_store import encoded_page, get_document_store
+
+DOC_TYPES = ("aadhaar", "pan")
+
+
+class StageError(Exception):
+    """Raised by a stage function to fail the stage (counts toward retries)."""
+
+
+# -----------------------
+# Generic DAG executor
+# -----------------------
+class Stage:
+    """
+    fn(ctx) -> result, sync or async. Sync functions run on `executor`
+    (default thread pool if None). `when(ctx)` returning False skips the
+    stage without failing its dependants (their ctx entry is None).
+    """
+
+    def __init__(self, name: str, fn: Callable, deps: Iterable[str] = (), timeout: float = 30.0,
+                 retries: int = 0, retry_delay: float = 0.1, executor=None, when: Callable = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.executor = executor
+        self.when = when
+
+
+class DAG:
+    def __init__(self, stages: List[Stage]):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {s.name} depends on unknown stages {missing}")
+        self.order = self._toposort()
+
+    def _toposort(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle through stage {name}")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for d in self.stages[name].deps:
+                visit(d)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def _call(self, stage: Stage, ctx: dict):
+        if inspect.iscoroutinefunction(stage.fn):
+            return await stage.fn(ctx)
+        loop = asyncio.get_running_loop()
+        # copy contextvars into the worker thread (request-scoped instrumentation)
+        run = contextvars.copy_context().run
+        return await loop.run_in_executor(stage.executor, partial(run, stage.fn, ctx))
+
+    async def _run_stage(self, stage: Stage, ctx: dict, tasks: Dict[str, asyncio.Task],
+                         report: Dict[str, dict], t0: float):
+        dep_status = await asyncio.gather(*(tasks[d] for d in stage.deps)) if stage.deps else []
+        entry = report[stage.name]
+
+        if any(st in ("FAILED", "UPSTREAM_FAILED") for st in dep_status):
+            entry["status"] = "UPSTREAM_FAILED"
+            ctx[stage.name] = None
+            return entry["status"]
+
+        if stage.when is not None and not stage.when(ctx):
+            entry["status"] = "SKIPPED"
+            ctx[stage.name] = None
+            return entry["status"]
+
+        start = time.perf_counter()
+        entry["start_ms"] = round((start - t0) * 1000.0, 3)
+        for attempt in range(stage.retries + 1):
+            entry["attempts"] = attempt + 1
+            try:
+                ctx[stage.name] = await asyncio.wait_for(self._call(stage, ctx), timeout=stage.timeout)
+                entry["status"] = "OK"
+                entry.pop("error", None)
+                break
+            except asyncio.TimeoutError:
+                entry["status"] = "FAILED"
+                entry["error"] = f"timed out after {stage.timeout}s"
+                if not inspect.iscoroutinefunction(stage.fn):
+                    break           # the first attempt is still running on the executor
+            except Exception as e:
+                entry["status"] = "FAILED"
+                entry["error"] = str(e) or e.__class__.__name__
+            if attempt < stage.retries:
+                await asyncio.sleep(stage.retry_delay * (2 ** attempt))
+
+        if entry["status"] != "OK":
+            ctx[stage.name] = None
+        end = time.perf_counter()
+        entry["duration_ms"] = round((end - start) * 1000.0, 3)
+        entry["end_ms"] = round((end - t0) * 1000.0, 3)
+        return entry["status"]
+
+    def critical_path(self, report: Dict[str, dict]):
+        """
+        Longest chain of stage durations through the dependency graph.
+        """
+        best = {}
+        for name in self.order:
+            dur = report[name].get("duration_ms", 0.0)
+            prev = max((best[d] for d in self.stages[name].deps), key=lambda x: x[0], default=(0.0, []))
+            best[name] = (prev[0] + dur, prev[1] + [name])
+        total, path = max(best.values(), key=lambda x: x[0], default=(0.0, []))
+        return round(total, 3), path
+
+    async def run(self, ctx: Optional[dict] = None) -> dict:
+        ctx = {} if ctx is None else ctx
+        report = {name: {"status": "PENDING", "attempts": 0} for name in self.order}
+        t0 = time.perf_counter()
+        tasks = {}
+        for name in self.order:      # deps are created before dependants
+            tasks[name] = asyncio.ensure_future(self._run_stage(self.stages[name], ctx, tasks, report, t0))
+        await asyncio.gather(*tasks.values())
+
+        cp_ms, cp = self.critical_path(report)
+        total_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+        return {
+            "ok": all(r["status"] in ("OK", "SKIPPED") for r in report.values()),
+            "stages": report,
+            "total_ms": total_ms,
+            "sum_of_stages_ms": round(sum(r.get("duration_ms", 0.0) for r in report.values()), 3),
+            "critical_path_ms": cp_ms,
+            "critical_path": cp,
+        }
+
+
+# -----------------------
+# Lending pipeline stages
+# -----------------------
+def load_application(app_id: int) -> Application:
+    db = SessionLocal()
+    try:
+        app = db.query(Application).filter(Application.app_id == app_id).first()
+        if app is None:
+            raise StageError("Invalid application ID")
+        db.expunge(app)
+        return app
+    finally:
+        db.close()
+
+
+def stage_intake(ctx):
+    if ctx.get("app_id"):
+        app = load_application(ctx["app_id"])
+    else:
+        app = create_application(ctx["application"])
+        # same side effects as POST /apply (never fail intake on them)
+        try:
+            index_application(app)
+            record_application_velocity(app, client=ctx.get("client"))
+        except Exception:
+            pass
+    if ctx["documents"]:
+        try:
+            record_upload_velocity(app.app_id, uploads=len(ctx["documents"]))
+        except Exception:
+            pass
+    return app
+
+
+def _stage_decode(doc):
+    def fn(ctx):
+        with open(ctx["documents"][doc], "rb") as f:
+            data = f.read()
+        digest, pages, _ = get_document_store().decode(data)
+        return {"pages": pages, "blur": check_blur(pages[0]), "document_hash": digest, "data": data}
+    return fn
+
+
+def _stage_store(doc):
+    def fn(ctx):
+        decoded = ctx[f"decode_{doc}"]
+        try:
+            meta = get_document_store().put(decoded["data"], decoded["pages"])
+        except Exception as e:
+            # the decision does not depend on it: report, do not fail the run
+            return {"stored": False, "error": str(e)}
+        return {"stored": True, "deduped": meta["deduped"]}
+    return fn
+
+
+def _stage_ocr(doc, agent):
+    def fn(ctx):
+        app = ctx["intake"]
+        artifacts = {}
+        decoded = ctx[f"decode_{doc}"]
+        result = agent(app.app_id, pages=decoded["pages"], artifacts=artifacts, intake=app,
+                       document_hash=decoded["document_hash"])
+        if "error" in result:
+            raise StageError(result.get("details") or result["error"])
+        return {"result": result, "artifacts": artifacts}
+    return fn
+
+
+def _stage_forensics(doc):
+    def fn(ctx):
+        return run_image_forensics(ctx[f"decode_{doc}"]["pages"][0])
+    return fn
+
+
+def _has_document(doc):
+    return lambda ctx: bool(ctx.get("documents", {}).get(doc))
+
+
+def _ocr_ready(doc):
+    def when(ctx):
+        decoded = ctx.get(f"decode_{doc}")
+        return bool(decoded) and not decoded["blur"]["too_blurry"]
+    return when
+
+
+def _blurry_result() -> dict:
+    return {
+        "kyc_status": "REJECTED",
+        "message": "Document too blurry to OCR, please re-upload",
+        "match_results": {"failed_fields": ["blur"]},
+    }
+
+
+def stage_kyc(ctx):
+    app = ctx["intake"]
+    ocr_results = {}
+    for doc in DOC_TYPES:
+        decoded = ctx.get(f"decode_{doc}")
+        if not decoded:
+            continue
+        ocr = ctx.get(f"{doc}_ocr")
+        ocr_results[doc] = ocr["result"] if ocr else _blurry_result()
+    id_photo = ctx.get("id_photo")
+    card = ctx.get("decode_aadhaar")
+    if ctx.get("selfie") and not id_photo and card:
+        id_photo = encoded_page(card["data"], card["pages"])   # the photo on the card (store stage may still run)
+    result = run_kyc_agent(
+        app.app_id, selfie=ctx.get("selfie"), id_photo=id_photo,
+        intake=app, ocr_results=ocr_results or None,
+    )
+    if result.get("status") == "ERROR":
+        raise StageError(result.get("message"))
+    return result
+
+
+def stage_fraud(ctx):
+    app = ctx["intake"]
+    forensics = {}
+    for doc in DOC_TYPES:
+        decoded = ctx.get(f"decode_{doc}")
+        if not decoded:
+            continue
+        ocr = ctx.get(f"{doc}_ocr") or {}
+        artifacts = ocr.get("artifacts") or {}
+        field_checks = run_field_forensics(artifacts.get("image"), artifacts.get("word_data")) if artifacts else None
+        summary = summarise_forensics(decoded["blur"], ctx.get(f"forensics_{doc}"), field_checks)
+        save_fraud_check(app.app_id, doc.upper(), summary)
+        forensics[doc.upper()] = summary
+    result = run_fraud_agent(
+        app.app_id, intake=app, forensics=forensics or None,
+        face_reuse=(ctx.get("kyc") or {}).get("face_reuse"), client=ctx.get("client"),
+    )
+    if "error" in result:
+        raise StageError(result.get("details") or result["error"])
+    return result
+
+
+def stage_scoring(ctx):
+    app = ctx["intake"]
+    result = run_scoring_agent(app.app_id, intake=app)
+    if "error" in result:
+        raise StageError(result.get("details") or result["error"])
+    return result
+
+
+def stage_explanation(ctx):
+    return run_explanation_agent(ctx["intake"].app_id, ctx.get("kyc"), ctx.get("fraud"), ctx.get("scoring"))
+
+
+def build_lending_pipeline() -> DAG:
+    t = settings.PIPELINE_STAGE_TIMEOUTS
+    r = settings.PIPELINE_STAGE_RETRIES
+    stages = [Stage("intake", stage_intake, timeout=t["intake"], retries=r.get("intake", 0))]
+    for doc, agent in (("aadhaar", run_aadhaar_ocr_agent), ("pan", run_pan_ocr_agent)):
+        stages += [
+            Stage(f"decode_{doc}", _stage_decode(doc), timeout=t["decode"], executor=OCR_POOL,
+                  when=_has_document(doc)),
+            Stage(f"{doc}_ocr", _stage_ocr(doc, agent), deps=("intake", f"decode_{doc}"),
+                  timeout=t["ocr"], retries=r.get("ocr", 0), executor=OCR_POOL, when=_ocr_ready(doc)),
+            Stage(f"forensics_{doc}", _stage_forensics(doc), deps=(f"decode_{doc}",),
+                  timeout=t["forensics"], executor=OCR_POOL, when=lambda ctx, d=doc: bool(ctx.get(f"decode_{d}"))),
+            Stage(f"store_{doc}", _stage_store(doc), deps=(f"decode_{doc}",),
+                  timeout=t["decode"], executor=OCR_POOL, when=lambda ctx, d=doc: bool(ctx.get(f"decode_{d}"))),
+        ]
+    stages += [
+        Stage("kyc", stage_kyc, deps=("intake", "aadhaar_ocr", "pan_ocr"),
+              timeout=t["kyc"], retries=r.get("kyc", 0)),
+        Stage("fraud", stage_fraud, deps=("intake", "kyc", "forensics_aadhaar", "forensics_pan"),
+              timeout=t["fraud"], retries=r.get("fraud", 0)),
+        Stage("scoring", stage_scoring, deps=("intake", "kyc"),
+              timeout=t["scoring"], retries=r.get("scoring", 0)),
+        Stage("explanation", stage_explanation, deps=("kyc", "fraud", "scoring"),
+              timeout=t["explanation"], retries=r.get("explanation", 0)),
+    ]
+    return DAG(stages)
+
+
+LENDING_PIPELINE = build_lending_pipeline()
+
+
+async def run_lending_pipeline(application=None, app_id: int = None, documents: dict = None,
+                               selfie: bytes = None, id_photo: bytes = None, client: str = None) -> dict:
+    """
+    Run intake -> OCR / forensics -> KYC -> fraud / scoring -> explanation.
+    Either `application` (ApplicationRequest) or an existing `app_id` is required.
+    documents: {"aadhaar": path, "pan": path}, both optional.
+    """
+    documents = {k: v for k, v in (documents or {}).items() if v}
+    ctx = {
+        "application": application,
+        "app_id": app_id,
+        "documents": documents,
+        "selfie": selfie,
+        "id_photo": id_photo,
+        "client": client,
+    }
+    report = await LENDING_PIPELINE.run(ctx)
+
+    intake = ctx.get("intake")
+    ocr = {}
+    for doc in DOC_TYPES:
+        if ctx.get(f"{doc}_ocr"):
+            ocr[doc] = ctx[f"{doc}_ocr"]["result"]
+        elif ctx.get(f"decode_{doc}"):
+            ocr[doc] = _blurry_result()
+    explanation = ctx.get("explanation") or {}
+    return {
+        "app_id": intake.app_id if intake is not None else app_id,
+        "final_status": explanation.get("final_status"),
+        "explanation": explanation.get("explanation"),
+        "results": {
+            "ocr": ocr,
+            "kyc": ctx.get("kyc"),
+            "fraud": ctx.get("fraud"),
+            "scoring": ctx.get("scoring"),
+        },
+        **report,
+    }
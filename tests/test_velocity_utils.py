@@ -0,0 +1,42 @@
+from backend.utils.velocity_utils import ExactWindowCounter, VelocityEngine
+from backend.utils.redis_utils import LocalRedis
+
+
+def test_add_releases_expired_keys():
+    counter = ExactWindowCounter(window=3600, buckets=60)
+    for i in range(1000):
+        counter.add(f"phone-{i}", now=0)
+    assert len(counter) == 1000
+
+    # a window later the next add sweeps every key with no events in it
+    counter.add("phone-new", now=3600 * 2)
+    assert len(counter) == 1
+    assert counter.count("phone-0", now=3600 * 2) == 0
+    assert counter.count("phone-new", now=3600 * 2) == 1
+
+
+def test_live_keys_survive_the_sweep():
+    counter = ExactWindowCounter(window=600, buckets=60)
+    counter.add("old", now=0)
+    counter.add("live", now=500)
+    counter.add("other", now=700)      # one window after the first add: sweep runs
+    assert len(counter) == 2
+    assert counter.count("live", now=700) == 1
+
+
+def test_engine_records_do_not_grow_without_bound():
+    engine = VelocityEngine({"apply_phone_1h": {"window": 3600, "buckets": 60, "mode": "exact"}})
+    for hour in range(5):
+        for i in range(200):
+            engine.record("apply_phone_1h", f"{hour}-{i}", now=hour * 3600)
+    assert len(engine.counters["apply_phone_1h"]) <= 400
+
+
+def test_engines_sharing_redis_count_each_others_records():
+    redis = LocalRedis()
+    signals = {"apply_phone_1h": {"window": 3600, "buckets": 60, "mode": "exact"}}
+    first, second = VelocityEngine(signals, redis=redis), VelocityEngine(signals, redis=redis)
+    first.record("apply_phone_1h", "9876543210", now=1000)
+    second.record("apply_phone_1h", "9876543210", now=2000)
+    assert first.count("apply_phone_1h", "9876543210", now=2100) == 2
+    assert first.count("apply_phone_1h", "9876543210", now=4700) == 1     # the first record left the window